@@ -0,0 +1,245 @@
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+import numpy as np
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.common.adc_conversion import AdcConverter
+from src.common.decimation import MinMaxPyramid, minmax_decimate
+from src.common.recorder import FrameRecording
+
+
+@dataclass
+class Frame:
+    """
+    One block of acquired data.
+
+    Attributes:
+        time_axis (np.ndarray): Time of every sample in seconds.
+        data (np.ndarray): Voltage data, shape (num_channels, num_samples).
+        sequence (int): Running frame number assigned by the source.
+        timestamp (float): time.time() when the frame was acquired.
+    """
+    time_axis: np.ndarray
+    data: np.ndarray
+    sequence: int = 0
+    timestamp: float = field(default_factory=time.time)
+
+
+@dataclass
+class RawFrame:
+    """
+    One block of raw int16 ADC codes that is converted to volts only where it is needed.
+
+    Holds a quarter of the memory of float64 volts (half of float32). `data` converts the whole block, like
+    Frame.data, but the display only needs volts for the points it draws: volts() converts a sample range,
+    decimated() and pyramid() reduce the raw codes first and convert only the returned points. Results are cached,
+    so several consumers of the same frame convert once.
+
+    Attributes:
+        time_axis (np.ndarray): Time of every sample in seconds.
+        raw (np.ndarray): ADC codes, shape (num_channels, num_samples) or (num_segments, num_channels, num_samples).
+        converter (AdcConverter): Conversion of the codes to volts.
+        sequence (int): Running frame number assigned by the source.
+        timestamp (float): time.time() when the frame was acquired.
+    """
+    time_axis: np.ndarray
+    raw: np.ndarray
+    converter: AdcConverter
+    sequence: int = 0
+    timestamp: float = field(default_factory=time.time)
+    _cache: dict = field(default_factory=dict, repr=False, compare=False)
+
+    def _cached(self, key, compute):
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    @property
+    def data(self) -> np.ndarray:
+        """All samples in volts (float32), converted on first access."""
+        return self._cached("data", lambda: self.converter.convert(self.raw))
+
+    @property
+    def nbytes(self) -> int:
+        """Memory of the raw codes; cached conversions come on top."""
+        return self.raw.nbytes
+
+    def segment_raw(self, segment: int | None = None) -> np.ndarray:
+        """Codes of one rapid block segment (default: the last one), or the whole (channels, samples) block."""
+        if self.raw.ndim == 2:
+            return self.raw
+        return self.raw[-1 if segment is None else segment]
+
+    def volts(self, start: int = 0, stop: int | None = None, segment: int | None = None) -> np.ndarray:
+        """Samples [start, stop) of all channels in volts."""
+        return self._cached(("volts", start, stop, segment),
+                            lambda: self.converter.convert(self.segment_raw(segment)[:, start:stop]))
+
+    def decimated(self, num_points: int, segment: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """Min/max decimation (minmax_decimate) to about num_points points per channel, in volts."""
+        def compute():
+            x_data, y_codes = minmax_decimate(self.time_axis, self.segment_raw(segment), num_points)
+            return x_data, self.converter.convert(y_codes)
+        return self._cached(("decimated", num_points, segment), compute)
+
+    def pyramid(self, segment: int | None = None, base_level: int = 4) -> MinMaxPyramid:
+        """Min/max pyramid of the codes; its queries return volts."""
+        return self._cached(("pyramid", segment, base_level),
+                            lambda: MinMaxPyramid.from_data(self.time_axis, self.segment_raw(segment), base_level,
+                                                            converter=self.converter))
+
+
+class FrameQueue:
+    """
+    Bounded, thread-safe frame queue with a drop-oldest policy.
+
+    The producer never blocks: when the queue is full the oldest frame is discarded and counted in dropped_frames.
+    A display consumer calls get_latest(), which returns the newest frame and discards the older ones
+    (counted in skipped_frames). A consumer that processes every frame takes all queued frames with get_all().
+    """
+
+    def __init__(self, max_size: int = 4):
+        if max_size < 1:
+            raise ValueError("Queue size must be at least 1")
+        self.max_size = max_size
+        self._frames = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self.put_frames = 0
+        self.dropped_frames = 0
+        self.skipped_frames = 0
+
+    def put(self, frame: Frame) -> None:
+        with self._lock:
+            if len(self._frames) >= self.max_size:
+                self._frames.popleft()
+                self.dropped_frames += 1
+            self._frames.append(frame)
+            self.put_frames += 1
+            self._not_empty.notify()
+
+    def get(self, timeout: float = None) -> Frame | None:
+        """Return the oldest frame, waiting up to `timeout` seconds (None: wait forever). Returns None on timeout."""
+        with self._not_empty:
+            if not self._frames and not self._not_empty.wait_for(lambda: self._frames, timeout):
+                return None
+            return self._frames.popleft()
+
+    def get_latest(self) -> Frame | None:
+        """Return the newest frame and discard all older ones; None if the queue is empty."""
+        with self._lock:
+            if not self._frames:
+                return None
+            frame = self._frames.pop()
+            self.skipped_frames += len(self._frames)
+            self._frames.clear()
+            return frame
+
+    def get_all(self) -> list[Frame]:
+        """Return all queued frames, oldest first; empty if the queue is empty."""
+        with self._lock:
+            frames = list(self._frames)
+            self._frames.clear()
+            return frames
+
+    @property
+    def depth(self) -> int:
+        with self._lock:
+            return len(self._frames)
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+
+
+class AcquisitionWorker:
+    """
+    Runs an acquisition source in a background thread and publishes its frames to a FrameQueue.
+
+    The source owns the device handle and is only used from the worker thread. It must implement:
+
+    - open(): Open and configure the device.
+    - read_frame() -> Frame | None: Return the next frame, or None if no data is ready yet. Should not block for
+      long, so that stop() is handled promptly.
+    - close(): Stop the acquisition and release the device.
+
+    Exceptions raised by the source end the thread; they are stored in `error` so the GUI can report them.
+
+    start_recording() records every acquired frame to disk (StreamRecorder) from the worker thread, before frames
+    can be dropped by the queue; the recorder only copies the samples, its own thread writes them.
+    """
+
+    def __init__(self, source, frame_queue: FrameQueue = None, name: str = "AcquisitionWorker"):
+        self.source = source
+        self.frame_queue = frame_queue if frame_queue is not None else FrameQueue()
+        self.error = None
+        self.frames_acquired = 0
+        self.recording = None
+        self._recording_commands = queue.SimpleQueue()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def _run(self):
+        try:
+            self.source.open()
+            try:
+                while not self._stop_event.is_set():
+                    frame = self.source.read_frame()
+                    self._handle_recording_commands()
+                    if frame is not None:
+                        if self.recording is not None:
+                            self.recording.write_frame(frame)
+                        self.frame_queue.put(frame)
+                        self.frames_acquired += 1
+            finally:
+                self.source.close()
+                if self.recording is not None:
+                    self.recording.close()
+        except Exception as e:
+            print(f"Acquisition error: {e}")
+            self.error = e
+
+    def _handle_recording_commands(self):
+        while not self._recording_commands.empty():
+            recording = self._recording_commands.get()
+            if self.recording is not None:
+                self.recording.close()
+            self.recording = recording
+
+    def start_recording(self, path: str, **recorder_kwargs):
+        """Record all frames from the next one on to `path` (see StreamRecorder for the options)."""
+        self._recording_commands.put(FrameRecording(path, **recorder_kwargs))
+
+    def stop_recording(self):
+        """Finish the recording file."""
+        self._recording_commands.put(None)
+
+    @property
+    def recording_stats(self) -> dict:
+        """Progress of the current recording (FrameRecording.stats), empty if there is none."""
+        recording = self.recording
+        return recording.stats() if recording is not None else {}
+
+    def source_stat(self, name: str, default=None):
+        """Current value of a source attribute such as dropped_samples (same call as ProcessAcquisitionWorker)."""
+        return getattr(self.source, name, default)
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop_event.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def is_alive(self) -> bool:
+        return self._thread.is_alive()
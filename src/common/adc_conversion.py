@@ -0,0 +1,163 @@
+import time
+import numpy as np
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.common.utils import scale_adc_two_complement
+
+
+class AdcConverter:
+    """
+    Convert whole (..., num_channels, num_samples) blocks of int16 ADC codes to float32 volts in one pass.
+
+    Every channel has its own range and offset: volts = code * voltage_range / full_scale + offset. Two kernels are
+    available:
+
+    - 'fma': multiply by the per-channel scale and add the offset, broadcast over the whole block, written straight
+      into the output array (two passes, no temporaries).
+    - 'lut': look every code up in a 65536-entry float32 table per channel (256 kB, stays in the cache). Costs one
+      table lookup per sample whatever the conversion is, so it also handles non-linear calibrations
+      (from_polynomials, e.g. the NI device scaling coefficients) at the price of a linear one.
+
+    Rapid block data (segments, channels, samples) is converted like a stack of (channels, samples) blocks.
+    """
+
+    METHODS = ('fma', 'lut')
+
+    def __init__(self, num_channels: int, voltage_range: float | np.ndarray, offset: float | np.ndarray = 0.0,
+                 bit_resolution: int = 16, full_scale: float | None = None, method: str = 'fma'):
+        """
+        Args:
+            num_channels (int): Number of channels (rows) of the converted blocks.
+            voltage_range (float | np.ndarray): Input range in volts, one for all channels or one per channel.
+            offset (float | np.ndarray): Offset in volts added after scaling, one for all or one per channel.
+            bit_resolution (int): Resolution of the ADC; the codes are two's complement.
+            full_scale (float | None): Code that corresponds to voltage_range (default: 2 ** (bit_resolution - 1),
+                like scale_adc_two_complement; PicoScopes use their maximum ADC value).
+            method (str): 'fma' or 'lut'.
+        """
+        if method not in self.METHODS:
+            raise ValueError(f"Invalid method. Choose one of {', '.join(self.METHODS)}.")
+        full_scale = full_scale if full_scale is not None else 2 ** (bit_resolution - 1)
+        self.num_channels = num_channels
+        self.method = method
+        self.scale = np.broadcast_to(np.asarray(voltage_range, dtype=np.float64) / full_scale,
+                                     (num_channels,)).astype(np.float32)[:, np.newaxis]
+        self.offset = np.broadcast_to(np.asarray(offset, dtype=np.float64),
+                                      (num_channels,)).astype(np.float32)[:, np.newaxis]
+        self.lut = self._linear_lut() if method == 'lut' else None
+        # False if the table holds a non-linear calibration; scale and offset do not apply then
+        self.linear = True
+
+    @classmethod
+    def from_polynomials(cls, coefficients: list[np.ndarray]) -> "AdcConverter":
+        """
+        Table converter for per-channel calibration polynomials, volts = sum(c[i] * code ** i).
+
+        Args:
+            coefficients (list[np.ndarray]): Polynomial coefficients per channel, lowest order first.
+        """
+        converter = cls(len(coefficients), 1.0, method='lut')
+        converter.linear = False
+        codes = np.arange(65536, dtype=np.uint16).view(np.int16).astype(np.float64)
+        for i, channel_coefficients in enumerate(coefficients):
+            converter.lut[i] = np.polynomial.polynomial.polyval(codes, channel_coefficients)
+        return converter
+
+    @classmethod
+    def from_lut(cls, lut: np.ndarray) -> "AdcConverter":
+        """
+        Table converter for a given (num_channels, 65536) table, e.g. one stored with a recording.
+
+        Args:
+            lut (np.ndarray): Volts per channel, indexed by the code reinterpreted as uint16.
+        """
+        converter = cls(lut.shape[0], 1.0, method='lut')
+        converter.linear = False
+        converter.lut[:] = lut
+        return converter
+
+    @property
+    def is_uniform(self) -> bool:
+        """True if all channels are linear with the same range and offset, so one code threshold fits all."""
+        return self.linear and bool(np.all(self.scale == self.scale[0]) and np.all(self.offset == self.offset[0]))
+
+    def to_codes(self, volts: float) -> float:
+        """Fractional ADC code of a voltage for a uniform converter, e.g. to compare raw data with a threshold."""
+        if not self.is_uniform:
+            raise ValueError("Voltages only map to one code if all channels share range and offset")
+        return (volts - float(self.offset[0, 0])) / float(self.scale[0, 0])
+
+    def _linear_lut(self) -> np.ndarray:
+        # Row index is the code reinterpreted as uint16: 0 ... 32767, then -32768 ... -1
+        codes = np.arange(65536, dtype=np.uint16).view(np.int16).astype(np.float32)
+        return codes[np.newaxis, :] * self.scale + self.offset
+
+    def convert(self, raw: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Convert int16 codes to volts.
+
+        Args:
+            raw (np.ndarray): int16 codes, shape (num_channels, num_samples) or (..., num_channels, num_samples).
+            out (np.ndarray | None): float32 array of the same shape to write into; a new one is allocated if None.
+
+        Returns:
+            np.ndarray: The converted float32 block (`out` if given).
+        """
+        if raw.dtype != np.int16:
+            raise TypeError(f"Expected int16 ADC codes, got {raw.dtype}")
+        if raw.ndim < 2 or raw.shape[-2] != self.num_channels:
+            raise ValueError(f"Expected {self.num_channels} channels in the second to last axis, got {raw.shape}")
+        if out is None:
+            out = np.empty(raw.shape, dtype=np.float32)
+        elif out.shape != raw.shape or out.dtype != np.float32:
+            raise ValueError(f"Output must be a float32 array of shape {raw.shape}")
+
+        if self.method == 'fma':
+            np.multiply(raw, self.scale, out=out)
+            out += self.offset
+        else:
+            # The uint16 view of the codes indexes the table directly; mode='clip' skips the bounds check buffer
+            indices = raw.view(np.uint16)
+            for row in np.ndindex(raw.shape[:-1]):
+                np.take(self.lut[row[-1]], indices[row], out=out[row], mode='clip')
+        return out
+
+
+def benchmark_adc_conversion(num_channels: int = 8, num_samples: int = 10_000_000, repeats: int = 5):
+    """
+    Compare AdcConverter with the per-channel scale_adc_two_complement loop on random int16 codes.
+
+    :param num_channels: Number of channels
+    :param num_samples: Samples per channel
+    :param repeats: Number of runs per implementation; the best time is reported
+    """
+    rng = np.random.default_rng(0)
+    raw = rng.integers(-32768, 32768, (num_channels, num_samples), dtype=np.int16)
+    voltage_ranges = np.linspace(0.5, 2.0, num_channels)
+    fma = AdcConverter(num_channels, voltage_ranges, method='fma')
+    lut = AdcConverter(num_channels, voltage_ranges, method='lut')
+    out = np.empty(raw.shape, dtype=np.float32)
+
+    implementations = {
+        "per channel, float64": lambda: [scale_adc_two_complement(row, 16, voltage_range)
+                                         for row, voltage_range in zip(raw, voltage_ranges)],
+        "fma": lambda: fma.convert(raw),
+        "fma, out=": lambda: fma.convert(raw, out=out),
+        "lut, out=": lambda: lut.convert(raw, out=out),
+    }
+    for name, implementation in implementations.items():
+        best = np.inf
+        for _ in range(repeats):
+            start_time = time.perf_counter()
+            implementation()
+            best = min(best, time.perf_counter() - start_time)
+        print(f"{name:>22}: {best * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    benchmark_adc_conversion()
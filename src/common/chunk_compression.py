@@ -0,0 +1,170 @@
+import lzma
+import time
+import zlib
+import numpy as np
+
+
+class ChunkCodec:
+    """
+    Lossless compression of (num_channels, num_samples) sample chunks with a preconditioning filter and a standard
+    library codec.
+
+    Raw ADC codes compress poorly as they are: neighbouring samples differ little, but their bytes look random to
+    a general purpose compressor. Two filters make the redundancy visible first:
+
+    - 'delta': replace every sample by its difference to the previous sample of the channel (wrapping integer
+      arithmetic, so it is exact); slowly varying signals become small numbers. Only applied to integer samples.
+    - 'shuffle': store the first byte of all samples, then the second byte and so on; the (mostly constant) high
+      bytes form long runs.
+
+    Codecs: 'zlib' (fast, levels 1-9) and 'lzma' (better ratio, several times slower, presets 0-9). Both release
+    the GIL while compressing, so chunks can be compressed in parallel by a thread pool (see StreamRecorder).
+    """
+
+    CODECS = ("zlib", "lzma")
+    FILTERS = ("delta", "shuffle")
+    DEFAULT_LEVELS = {"zlib": 1, "lzma": 0}
+
+    def __init__(self, codec: str = "zlib", level: int | None = None, filters: tuple = ("delta", "shuffle")):
+        """
+        Args:
+            codec (str): 'zlib' or 'lzma'.
+            level (int | None): Compression level or preset (default: the fastest, DEFAULT_LEVELS).
+            filters (tuple): Preconditioning filters applied in this order, 'delta' and 'shuffle' at most once
+                each; decode() undoes them in reverse order.
+        """
+        if codec not in self.CODECS:
+            raise ValueError(f"Invalid codec. Choose one of {', '.join(self.CODECS)}.")
+        for name in filters:
+            if name not in self.FILTERS:
+                raise ValueError(f"Invalid filter. Choose from {', '.join(self.FILTERS)}.")
+        if len(set(filters)) != len(filters):
+            raise ValueError("Every filter may only be used once")
+        self.codec = codec
+        self.level = level if level is not None else self.DEFAULT_LEVELS[codec]
+        self.filters = tuple(filters)
+
+    @classmethod
+    def from_spec(cls, spec: "str | ChunkCodec | None") -> "ChunkCodec | None":
+        """Codec from a 'codec' or 'codec:level' string (e.g. 'zlib:6'); a ChunkCodec or None is returned as is."""
+        if spec is None or isinstance(spec, ChunkCodec):
+            return spec
+        codec, _, level = spec.partition(":")
+        return cls(codec, int(level) if level else None)
+
+    @classmethod
+    def from_info(cls, info: dict) -> "ChunkCodec":
+        return cls(info["codec"], info["level"], info["filters"])
+
+    def to_info(self) -> dict:
+        """JSON serializable description, stored in the recording header."""
+        return {"codec": self.codec, "level": self.level, "filters": list(self.filters)}
+
+    def __repr__(self):
+        return f"ChunkCodec({self.codec!r}, level={self.level}, filters={self.filters})"
+
+    def _steps(self, dtype: np.dtype, shape: tuple) -> tuple[list[tuple[str, np.dtype, tuple]], np.dtype, tuple]:
+        """
+        The filters that apply, each with the type and shape of its input, and the type and shape of the filtered
+        data; shuffle turns samples into a (itemsize, num_values) array of bytes.
+        """
+        steps = []
+        for name in self.filters:
+            if name == "delta" and dtype.kind in "iu":
+                steps.append((name, dtype, shape))
+            elif name == "shuffle" and dtype.itemsize > 1:
+                steps.append((name, dtype, shape))
+                dtype, shape = np.dtype(np.uint8), (dtype.itemsize, int(np.prod(shape)))
+        return steps, dtype, shape
+
+    def encode(self, chunk: np.ndarray) -> bytes:
+        """Compress a (num_channels, num_samples) chunk."""
+        data = np.ascontiguousarray(chunk)
+        for name, dtype, shape in self._steps(data.dtype, data.shape)[0]:
+            if name == "delta":
+                diff = np.empty_like(data)
+                diff[:, :1] = data[:, :1]
+                np.subtract(data[:, 1:], data[:, :-1], out=diff[:, 1:])
+                data = diff
+            else:
+                data = np.ascontiguousarray(data.view(np.uint8).reshape(-1, dtype.itemsize).T)
+        if self.codec == "zlib":
+            return zlib.compress(data, self.level)
+        return lzma.compress(data, preset=self.level)
+
+    def decode(self, payload: bytes, dtype, shape: tuple) -> np.ndarray:
+        """Decompress a chunk of the given dtype and (num_channels, num_samples) shape."""
+        dtype = np.dtype(dtype)
+        steps, filtered_dtype, filtered_shape = self._steps(dtype, shape)
+        raw = zlib.decompress(payload) if self.codec == "zlib" else lzma.decompress(payload)
+        data = np.frombuffer(raw, dtype=filtered_dtype).reshape(filtered_shape)
+        # Undo the filters in reverse order
+        for name, step_dtype, step_shape in reversed(steps):
+            if name == "delta":
+                # The running sum wraps like the differences did
+                data = np.cumsum(data, axis=1, dtype=step_dtype)
+            else:
+                data = np.ascontiguousarray(data.T).view(step_dtype).reshape(step_shape)
+        return data
+
+
+def benchmark_chunk_compression(num_channels: int = 8, chunk_samples: int = 262_144, num_chunks: int = 16,
+                                threads: int | None = None):
+    """
+    Compress chunks of simulated ADC codes (delayed pulses and 12-bit noise on a 16-bit scale, like a PicoScope
+    capture) with every codec and filter combination, check the round trip and report the compression ratio and the
+    raw MB/s of one thread and of a thread pool.
+
+    :param num_channels: Number of channels
+    :param chunk_samples: Samples per channel and chunk (StreamRecorder default)
+    :param num_chunks: Chunks compressed per measurement
+    :param threads: Threads of the pool (default: number of CPUs)
+    """
+    import os
+    from concurrent.futures import ThreadPoolExecutor
+    from itertools import permutations
+
+    threads = threads or os.cpu_count() or 1
+    rng = np.random.default_rng(0)
+    t = np.arange(chunk_samples)
+    chunks = []
+    for i in range(num_chunks):
+        signal = np.stack([8000 * np.sin(2 * np.pi * (t - 20 * channel + i * chunk_samples) / 50_000)
+                           for channel in range(num_channels)])
+        noise = rng.normal(0, 8, signal.shape) * 16
+        chunks.append(np.round(signal + noise).astype(np.int16))
+    raw_bytes = sum(chunk.nbytes for chunk in chunks)
+
+    # Every accepted codec and filter order must give the samples back
+    combinations = [(codec_name, filters) for codec_name in ChunkCodec.CODECS
+                    for count in range(len(ChunkCodec.FILTERS) + 1)
+                    for filters in permutations(ChunkCodec.FILTERS, count)]
+    for codec_name, filters in combinations:
+        codec = ChunkCodec(codec_name, filters=filters)
+        for sample in (chunks[0][:, :10_000], chunks[0][:, :10_000].astype(np.float32)):
+            assert np.array_equal(codec.decode(codec.encode(sample), sample.dtype, sample.shape), sample), \
+                f"Round trip differs for {codec}"
+    print(f"Round trip checked for {len(combinations)} codec and filter combinations")
+
+    print(f"{num_chunks} chunks of {num_channels} x {chunk_samples} int16 samples ({raw_bytes / 1e6:.0f} MB), "
+          f"{threads} threads")
+    with ThreadPoolExecutor(threads) as pool:
+        for codec_name in ChunkCodec.CODECS:
+            for filters in ((), ("shuffle",), ("delta", "shuffle")):
+                codec = ChunkCodec(codec_name, filters=filters)
+                start_time = time.perf_counter()
+                payloads = [codec.encode(chunk) for chunk in chunks]
+                single_time = time.perf_counter() - start_time
+                start_time = time.perf_counter()
+                list(pool.map(codec.encode, chunks))
+                pool_time = time.perf_counter() - start_time
+                assert np.array_equal(codec.decode(payloads[-1], np.int16, chunks[-1].shape), chunks[-1]), \
+                    "Round trip differs"
+                ratio = raw_bytes / sum(len(payload) for payload in payloads)
+                label = f"{codec_name} {'+'.join(filters) or 'no filter'}"
+                print(f"{label:>22}: ratio {ratio:5.2f}, {raw_bytes / single_time / 1e6:7.1f} MB/s one thread, "
+                      f"{raw_bytes / pool_time / 1e6:7.1f} MB/s pool")
+
+
+if __name__ == "__main__":
+    benchmark_chunk_compression()
@@ -0,0 +1,221 @@
+import math
+import numpy as np
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.common.growable_array import GrowableArray
+
+
+def minmax_decimate(x_data: np.ndarray, y_data: np.ndarray, num_points: int,
+                    ignore_nan: bool = False) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Reduce data to about `num_points` points per channel while keeping every peak.
+
+    The samples are split into num_points // 2 buckets; of every bucket the minimum and the maximum are kept, in the
+    order in which they occur, so spikes and glitches of a single sample stay visible. Plotting the result at
+    num_points >= 2 x the pixel width looks the same as plotting all samples.
+
+    :param x_data: Time axis, shape (num_samples,), or one per channel with the shape of y_data (e.g. the output
+        of MinMaxPyramid.query)
+    :param y_data: Data, shape (num_samples,) or (..., num_samples), e.g. (num_channels, num_samples)
+    :param num_points: Maximum number of output points per channel
+    :param ignore_nan: Skip NaN samples when looking for the extrema (a bucket is only NaN if all its samples are);
+        needs an extra pass over the data, so it is off by default
+    :return: Tuple (x, y) of decimated arrays with the same leading shape as y_data; x has the leading shape
+        of y_data as well, because the positions of the extrema differ between channels
+    """
+    y_data = np.asarray(y_data)
+    num_samples = y_data.shape[-1]
+    num_buckets = max(1, num_points // 2)
+    if num_samples <= 2 * num_buckets:
+        return np.broadcast_to(x_data[..., :num_samples], y_data.shape), y_data
+
+    bucket_size = num_samples // num_buckets
+    num_main = num_buckets * bucket_size
+    search_min = search_max = y_data
+    if ignore_nan:
+        missing = np.isnan(y_data)
+        search_min = np.where(missing, np.inf, y_data)
+        search_max = np.where(missing, -np.inf, y_data)
+    bucket_shape = y_data.shape[:-1] + (num_buckets, bucket_size)
+
+    # Index of the extrema within every bucket, converted to a sample index
+    offsets = np.arange(num_buckets) * bucket_size
+    index_min = search_min[..., :num_main].reshape(bucket_shape).argmin(axis=-1) + offsets
+    index_max = search_max[..., :num_main].reshape(bucket_shape).argmax(axis=-1) + offsets
+
+    # Samples that do not fill a whole bucket form one last, shorter bucket
+    if num_main < num_samples:
+        tail_min = search_min[..., num_main:].argmin(axis=-1)[..., np.newaxis] + num_main
+        tail_max = search_max[..., num_main:].argmax(axis=-1)[..., np.newaxis] + num_main
+        index_min = np.concatenate([index_min, tail_min], axis=-1)
+        index_max = np.concatenate([index_max, tail_max], axis=-1)
+
+    # Keep the two extrema of each bucket in time order
+    first = np.minimum(index_min, index_max)
+    second = np.maximum(index_min, index_max)
+    indices = np.stack([first, second], axis=-1).reshape(first.shape[:-1] + (-1,))
+
+    x_plot = x_data[indices] if x_data.ndim == 1 else np.take_along_axis(x_data, indices, axis=-1)
+    return x_plot, np.take_along_axis(y_data, indices, axis=-1)
+
+
+class MinMaxPyramid:
+    """
+    Multi-resolution min/max (level of detail) pyramid of uniformly sampled multi-channel data.
+
+    Level 0 holds the min and max of every bucket of 2**base_level samples, every further level halves the
+    resolution again (power-of-two buckets). The pyramid is extended incrementally by append(), so each sample is
+    only reduced once. query() picks the coarsest level that still gives the requested number of points for a time
+    range, so zooming and panning costs the same for 10 thousand or 10 million samples.
+
+    With base_level=4 the pyramid needs about a quarter of the memory of the raw data. NaN samples (e.g. missed
+    measurements) are ignored by the levels; a bucket is only NaN if all its samples are.
+
+    The pyramid can also be built on int16 ADC codes with a `converter` (AdcConverter): the levels then stay int16
+    and only the points returned by query() are converted to volts. Positive scaling keeps the min and max.
+    """
+
+    def __init__(self, num_channels: int, t0: float = 0.0, dt: float = 1.0, dtype=np.float64, base_level: int = 4,
+                 converter=None):
+        self.num_channels = num_channels
+        self.dtype = dtype
+        self.base_level = base_level
+        self.converter = converter
+        self.raw = GrowableArray((num_channels,), dtype=dtype)
+        self.levels = []
+        self.reset(t0, dt)
+
+    def reset(self, t0: float = 0.0, dt: float = 1.0):
+        """Remove all data and set the time of the first sample and the sample interval."""
+        self.t0 = t0
+        self.dt = dt
+        self.raw.clear()
+        self.levels = []
+
+    @classmethod
+    def from_data(cls, x_data: np.ndarray, y_data: np.ndarray, base_level: int = 4,
+                  converter=None) -> "MinMaxPyramid":
+        """Build a pyramid for a (num_channels, num_samples) array with a uniform time axis."""
+        y_data = np.atleast_2d(y_data)
+        dt = float(x_data[1] - x_data[0]) if len(x_data) > 1 else 1.0
+        pyramid = cls(y_data.shape[0], float(x_data[0]), dt, dtype=y_data.dtype, base_level=base_level,
+                      converter=converter)
+        # Use the data in place instead of copying it into the pyramid
+        pyramid.raw = GrowableArray.from_array(y_data)
+        pyramid.update_levels()
+        return pyramid
+
+    @property
+    def num_samples(self) -> int:
+        return self.raw.size
+
+    def bucket_size(self, level: int) -> int:
+        return 2 ** (self.base_level + level)
+
+    def append(self, block: np.ndarray) -> None:
+        """Append a (num_channels, n) block and update all levels."""
+        self.raw.extend(block)
+        self.update_levels()
+
+    def update_levels(self) -> None:
+        """Reduce all samples and buckets that are not part of a coarser level yet."""
+        source_min = source_max = self.raw.data
+        factor = self.bucket_size(0)
+        level = 0
+        while True:
+            num_complete = source_min.shape[-1] // factor
+            if level == len(self.levels):
+                if num_complete < 1:
+                    break
+                self.levels.append((GrowableArray((self.num_channels,), dtype=self.dtype),
+                                    GrowableArray((self.num_channels,), dtype=self.dtype)))
+            mins, maxs = self.levels[level]
+            num_done = mins.size
+            if num_complete > num_done:
+                new_min = source_min[:, num_done * factor:num_complete * factor]
+                new_max = source_max[:, num_done * factor:num_complete * factor]
+                if factor == 2:
+                    mins.extend(np.fmin(new_min[:, 0::2], new_min[:, 1::2]))
+                    maxs.extend(np.fmax(new_max[:, 0::2], new_max[:, 1::2]))
+                else:
+                    # reduceat is much faster than reshape(...).min(axis=-1) for short buckets
+                    bucket_starts = np.arange(0, new_min.shape[-1], factor)
+                    mins.extend(np.fmin.reduceat(new_min, bucket_starts, axis=-1))
+                    maxs.extend(np.fmax.reduceat(new_max, bucket_starts, axis=-1))
+            if mins.size < 2:
+                break
+            source_min, source_max = mins.data, maxs.data
+            factor = 2
+            level += 1
+
+    def _tail_extrema(self, level: int, start: int, stop: int):
+        """Min and max of samples [start, stop) that are not covered by `level`, using the finer levels."""
+        tail_min = np.full(self.num_channels, np.nan)
+        tail_max = np.full(self.num_channels, np.nan)
+        position = start
+        # Every finer level has fewer than two buckets that are not part of the next coarser one
+        for finer in range(level - 1, -1, -1):
+            size = self.bucket_size(finer)
+            mins, maxs = self.levels[finer]
+            while position + size <= stop and (position + size) // size <= mins.size:
+                tail_min = np.fmin(tail_min, mins.data[:, position // size])
+                tail_max = np.fmax(tail_max, maxs.data[:, position // size])
+                position += size
+        if position < stop:
+            tail_min = np.fmin(tail_min, np.fmin.reduce(self.raw.data[:, position:stop], axis=-1))
+            tail_max = np.fmax(tail_max, np.fmax.reduce(self.raw.data[:, position:stop], axis=-1))
+        return tail_min, tail_max
+
+    def query(self, start_time: float, stop_time: float, num_points: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return about `num_points` min/max points per channel for the time range [start_time, stop_time].
+
+        :param start_time: Start of the visible range in the units of the time axis
+        :param stop_time: End of the visible range
+        :param num_points: Number of points per channel to return (usually 2 x the pixel width)
+        :return: Tuple (x, y) with shapes (num_channels, n), like minmax_decimate
+        """
+        num_samples = self.num_samples
+        start = int(np.clip(math.floor((start_time - self.t0) / self.dt), 0, num_samples))
+        stop = int(np.clip(math.ceil((stop_time - self.t0) / self.dt) + 1, start, num_samples))
+        span = stop - start
+        num_buckets = max(1, num_points // 2)
+
+        # Short ranges are decimated from the raw samples (at most 2**base_level * num_points samples)
+        needed_bucket = span / num_buckets
+        if needed_bucket < self.bucket_size(0) or not self.levels:
+            x_data = self.t0 + self.dt * np.arange(start, stop)
+            x_data, y_data = minmax_decimate(x_data, self.raw.data[:, start:stop], num_points,
+                                             ignore_nan=np.issubdtype(self.dtype, np.floating))
+            return x_data, self._to_volts(y_data)
+        # Coarsest level whose buckets are not larger than needed
+        level = min(math.floor(math.log2(needed_bucket)) - self.base_level, len(self.levels) - 1)
+
+        size = self.bucket_size(level)
+        mins, maxs = self.levels[level]
+        first_bucket = start // size
+        last_bucket = min(-(-stop // size), mins.size)
+        bucket_min = mins.data[:, first_bucket:last_bucket]
+        bucket_max = maxs.data[:, first_bucket:last_bucket]
+        bucket_start = np.arange(first_bucket, last_bucket) * size
+
+        # Samples after the last complete bucket of this level
+        covered = last_bucket * size
+        if stop > covered:
+            tail_min, tail_max = self._tail_extrema(level, max(covered, start), stop)
+            bucket_min = np.concatenate([bucket_min, tail_min[:, np.newaxis].astype(bucket_min.dtype)], axis=-1)
+            bucket_max = np.concatenate([bucket_max, tail_max[:, np.newaxis].astype(bucket_max.dtype)], axis=-1)
+            bucket_start = np.append(bucket_start, max(covered, start))
+
+        # Draw every bucket as a vertical segment from its min to its max
+        x_data = self.t0 + self.dt * np.stack([bucket_start, bucket_start + size / 2], axis=-1).reshape(-1)
+        y_data = np.stack([bucket_min, bucket_max], axis=-1).reshape(self.num_channels, -1)
+        return np.broadcast_to(x_data, y_data.shape), self._to_volts(y_data)
+
+    def _to_volts(self, y_data: np.ndarray) -> np.ndarray:
+        return self.converter.convert(y_data) if self.converter is not None else y_data
@@ -0,0 +1,46 @@
+import importlib
+
+
+class DriverBackend:
+    """
+    Stand-in for a driver module that forwards attribute access to one of several interchangeable backends.
+
+    Every backend is a list of sources, "package.module" or "package.module:object"; an attribute is looked up in
+    the sources in order. The sources are only imported on first use, so selecting a software fake never imports
+    (and never needs) the real driver library. Select the backend before the first driver call.
+    """
+
+    def __init__(self, backends: dict[str, tuple[str, ...]], name: str):
+        self.backends = backends
+        self._name = None
+        self._sources = None
+        self.select(name)
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def select(self, name: str):
+        if name not in self.backends:
+            raise ValueError(f"Unknown driver backend '{name}', choose one of {list(self.backends)}")
+        if name != self._name:
+            self._name = name
+            self._sources = None
+
+    def _load_sources(self) -> list:
+        sources = []
+        for source in self.backends[self._name]:
+            module_name, _, object_name = source.partition(":")
+            module = importlib.import_module(module_name)
+            sources.append(getattr(module, object_name) if object_name else module)
+        return sources
+
+    def __getattr__(self, attribute):
+        if attribute.startswith("_"):
+            raise AttributeError(attribute)
+        if self._sources is None:
+            self._sources = self._load_sources()
+        for source in self._sources:
+            if hasattr(source, attribute):
+                return getattr(source, attribute)
+        raise AttributeError(f"Driver backend '{self._name}' has no attribute '{attribute}'")
@@ -0,0 +1,122 @@
+import time
+import numpy as np
+
+
+def find_first_edges(x_data: np.ndarray, y_data: np.ndarray, threshold: float, hysteresis: float = 0.0,
+                     edge: str = "rising", interpolate: bool = True, chunk_size: int = 65536) -> np.ndarray:
+    """
+    Find the first threshold crossing of every channel of a (..., samples) array.
+
+    All channels are searched together, chunk by chunk, and the search stops as soon as every channel has its
+    crossing, so an edge near the start of a 10M-sample record only costs one chunk. With hysteresis a rising edge
+    is only accepted after the signal was below threshold - hysteresis (above threshold + hysteresis for falling
+    edges), so noise around the threshold does not trigger early crossings.
+
+    :param x_data: Time axis, shape (num_samples,)
+    :param y_data: Data, shape (num_samples,) or (..., num_samples), e.g. (num_channels, num_samples) or
+        (num_segments, num_channels, num_samples); raw int16 ADC counts work as well
+    :param threshold: Threshold in the units of y_data
+    :param hysteresis: Distance from the threshold the signal has to leave before an edge counts
+    :param edge: 'rising' or 'falling'
+    :param interpolate: Interpolate linearly between the samples around the crossing for sub-sample times;
+        otherwise the time of the first sample past the threshold is returned
+    :param chunk_size: Number of samples per channel searched at once
+    :return: Crossing times with the shape y_data.shape[:-1]; NaN where no edge was found
+    """
+    if edge == "rising":
+        arm_level = threshold - hysteresis
+        is_armed = np.less
+        is_crossed = np.greater_equal
+    elif edge == "falling":
+        arm_level = threshold + hysteresis
+        is_armed = np.greater
+        is_crossed = np.less_equal
+    else:
+        raise ValueError(f"Unknown edge type: {edge}")
+
+    y_data = np.asarray(y_data)
+    num_samples = y_data.shape[-1]
+    rows = y_data.reshape(-1, num_samples)
+    num_rows = rows.shape[0]
+
+    # Sample index at which each row was armed and at which it crossed the threshold, -1 if not yet
+    armed_at = np.full(num_rows, -1, dtype=np.int64)
+    crossed_at = np.full(num_rows, -1, dtype=np.int64)
+    pending = np.arange(num_rows)
+
+    for start in range(0, num_samples, chunk_size):
+        if pending.size == 0:
+            break
+        block = rows[pending, start:start + chunk_size]
+
+        not_armed = armed_at[pending] < 0
+        if not_armed.any():
+            arm_mask = is_armed(block[not_armed], arm_level)
+            found = arm_mask.any(axis=-1)
+            armed_at[pending[not_armed][found]] = start + arm_mask[found].argmax(axis=-1)
+
+        # Only samples after the arming sample count as a crossing
+        armed_local = armed_at[pending] - start
+        cross_mask = is_crossed(block, threshold)
+        cross_mask &= np.arange(block.shape[-1]) > armed_local[:, np.newaxis]
+        cross_mask &= (armed_at[pending] >= 0)[:, np.newaxis]
+        found = cross_mask.any(axis=-1)
+        crossed_at[pending[found]] = start + cross_mask[found].argmax(axis=-1)
+        pending = pending[~found]
+
+    crossing_times = np.full(num_rows, np.nan)
+    found_rows = np.flatnonzero(crossed_at >= 0)
+    after = crossed_at[found_rows]
+    if not interpolate:
+        crossing_times[found_rows] = x_data[after]
+    else:
+        # The crossing index is always after the arming index, so there is a sample before it on the other side
+        before = after - 1
+        y_before = rows[found_rows, before].astype(np.float64)
+        y_after = rows[found_rows, after].astype(np.float64)
+        fraction = (threshold - y_before) / (y_after - y_before)
+        crossing_times[found_rows] = x_data[before] + fraction * (x_data[after] - x_data[before])
+    return crossing_times.reshape(y_data.shape[:-1])
+
+
+def _find_rising_edge_crossing_per_channel(x_data, y_data, threshold):
+    """The per-channel search PicoDtApp used before, kept as the benchmark baseline."""
+    crossing_times = []
+    for channel_data in y_data:
+        below_threshold = channel_data < threshold
+        edges = np.where(np.diff(below_threshold.astype(int)) == -1)[0]
+        crossing_times.append(x_data[edges[0] + 1] if len(edges) > 0 else np.nan)
+    return np.array(crossing_times)
+
+
+def benchmark_edge_detection(num_channels: int = 4, num_samples: int = 10_000_000, repeats: int = 5):
+    """
+    Compare find_first_edges with the per-channel implementation on a noisy square wave.
+
+    :param num_channels: Number of channels
+    :param num_samples: Samples per channel
+    :param repeats: Number of runs per implementation; the best time is reported
+    """
+    x_data = np.arange(num_samples) * 1e-9
+    # First rising edges at about 10 % of the record, a few samples apart per channel
+    period = num_samples // 5
+    phase = np.arange(num_samples)[np.newaxis, :] + 100 * np.arange(num_channels)[:, np.newaxis]
+    rng = np.random.default_rng(0)
+    y_data = np.where(phase % period >= period // 2, 1.0, 0.0) + rng.normal(0, 0.01, (num_channels, num_samples))
+
+    implementations = {
+        "per channel": lambda: _find_rising_edge_crossing_per_channel(x_data, y_data, 0.5),
+        "batched, early stop": lambda: find_first_edges(x_data, y_data, 0.5, interpolate=False),
+        "batched, interpolated": lambda: find_first_edges(x_data, y_data, 0.5, hysteresis=0.1),
+    }
+    for name, implementation in implementations.items():
+        best = np.inf
+        for _ in range(repeats):
+            start_time = time.perf_counter()
+            crossing_times = implementation()
+            best = min(best, time.perf_counter() - start_time)
+        print(f"{name:>22}: {best * 1000:8.2f} ms  {crossing_times}")
+
+
+if __name__ == "__main__":
+    benchmark_edge_detection()
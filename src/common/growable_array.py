@@ -0,0 +1,60 @@
+import numpy as np
+
+
+class GrowableArray:
+    """
+    Numpy array that grows along its last axis with amortized O(1) appends.
+
+    The storage doubles its capacity whenever it is full, so appending n samples costs O(n) in total instead of
+    O(n^2) for repeated np.append / list-to-array conversions. `data` is a view of the filled part.
+    """
+
+    def __init__(self, leading_shape: tuple = (), dtype=np.float64, initial_capacity: int = 1024, fill_value=0):
+        self.leading_shape = tuple(leading_shape)
+        self.dtype = np.dtype(dtype)
+        self.fill_value = fill_value
+        self._storage = np.full(self.leading_shape + (max(1, initial_capacity),), fill_value, dtype=self.dtype)
+        self.size = 0
+
+    @classmethod
+    def from_array(cls, array: np.ndarray) -> "GrowableArray":
+        """Wrap an existing array without copying it; the first append moves the data to new storage."""
+        growable = cls(array.shape[:-1], dtype=array.dtype, initial_capacity=1)
+        growable._storage = array
+        growable.size = array.shape[-1]
+        return growable
+
+    @property
+    def capacity(self) -> int:
+        return self._storage.shape[-1]
+
+    @property
+    def data(self) -> np.ndarray:
+        return self._storage[..., :self.size]
+
+    def __len__(self) -> int:
+        return self.size
+
+    def reserve(self, capacity: int) -> None:
+        if capacity <= self.capacity:
+            return
+        new_capacity = max(capacity, 2 * self.capacity)
+        storage = np.full(self.leading_shape + (new_capacity,), self.fill_value, dtype=self.dtype)
+        storage[..., :self.size] = self.data
+        self._storage = storage
+
+    def extend(self, block: np.ndarray) -> None:
+        """Append a block of shape leading_shape + (n,)."""
+        num_new = block.shape[-1]
+        self.reserve(self.size + num_new)
+        self._storage[..., self.size:self.size + num_new] = block
+        self.size += num_new
+
+    def append(self, values) -> None:
+        """Append a single entry of shape leading_shape."""
+        self.reserve(self.size + 1)
+        self._storage[..., self.size] = values
+        self.size += 1
+
+    def clear(self) -> None:
+        self.size = 0
@@ -0,0 +1,389 @@
+import multiprocessing
+from multiprocessing import shared_memory
+import threading
+import time
+import weakref
+from collections import deque
+import numpy as np
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.common.acquisition import AcquisitionWorker, Frame, FrameQueue, RawFrame
+from src.common.decimation import minmax_decimate
+from src.common.recorder import FrameRecording
+from src.common.shared_ring_buffer import attach_shared_memory
+
+# Source attributes reported to the GUI process, if the source has them
+DEFAULT_STAT_NAMES = ("dropped_samples", "throughput", "late_chunks", "trigger_count")
+# How often the acquisition process reports the source statistics, in seconds
+STATUS_INTERVAL = 0.25
+
+
+def _aligned(num_bytes: int, alignment: int = 64) -> int:
+    return (num_bytes + alignment - 1) // alignment * alignment
+
+
+def _source_stats(source, stat_names) -> dict:
+    return {name: getattr(source, name) for name in stat_names if hasattr(source, name)}
+
+
+class _AttachedSlot:
+    """
+    Mapping of one shared memory slot in the GUI process.
+
+    Frames are numpy views of a byte array that np.frombuffer creates on the slot; its base is a memoryview of its
+    own per frame, which is deallocated when the last array of the frame is and only then calls its weak reference
+    callbacks, after it has released the slot's buffer. The mapping is closed when the worker retired the slot and
+    the last frame on it is gone, so frames may outlive the worker.
+    """
+
+    def __init__(self, name: str, slot_bytes: int):
+        self.shm = attach_shared_memory(name)
+        self.slot_bytes = slot_bytes
+        self.frames = 0
+        self.retired = False
+        self._lock = threading.Lock()
+
+    def frame_buffer(self, on_release) -> np.ndarray:
+        """New uint8 array over the slot; `on_release` is called once no array of it is left."""
+        buffer = np.frombuffer(self.shm.buf, dtype=np.uint8, count=self.slot_bytes)
+        with self._lock:
+            self.frames += 1
+        weakref.finalize(buffer.base, self._frame_released, on_release)
+        return buffer
+
+    def _frame_released(self, on_release):
+        on_release()
+        with self._lock:
+            self.frames -= 1
+            close = self.retired and self.frames == 0
+        if close:
+            self.shm.close()
+
+    def retire(self):
+        """Close the mapping now or, if frames still use it, with the last of them."""
+        with self._lock:
+            self.retired = True
+            close = self.frames == 0
+        if close:
+            self.shm.close()
+
+
+def _acquisition_process(conn, source_factory, num_slots: int, stat_names: tuple, initializer, initargs: tuple):
+    """
+    Main function of the acquisition process: runs the source and publishes its frames in shared memory slots.
+
+    Messages to the GUI process: ("slots", names, slot_bytes), ("converter", converter), ("frame", slot, ...),
+    ("status", stats), ("error", exception) and ("closed",). From the GUI process: ("release", slot) when a frame
+    is no longer used, ("record", path, recorder_kwargs), ("stop_recording",) and ("stop",).
+    """
+    slots = []
+    free_slots = deque()
+    stop_requested = False
+    converter = None
+    recording = None
+    stats = {"frames_acquired": 0, "frames_without_slot": 0}
+
+    def handle_messages(timeout: float = 0.0):
+        nonlocal stop_requested, recording
+        try:
+            while conn.poll(timeout):
+                message = conn.recv()
+                if message[0] == "release":
+                    free_slots.append(message[1])
+                elif message[0] in ("record", "stop_recording"):
+                    if recording is not None:
+                        recording.close()
+                    recording = FrameRecording(message[1], **message[2]) if message[0] == "record" else None
+                elif message[0] == "stop":
+                    stop_requested = True
+                timeout = 0.0
+        except (EOFError, OSError):
+            # The GUI process is gone
+            stop_requested = True
+
+    def status() -> dict:
+        recording_stats = {"recording": recording.stats()} if recording is not None else {}
+        return {**_source_stats(source, stat_names), **stats, **recording_stats}
+
+    def publish(frame):
+        nonlocal converter
+        is_raw = isinstance(frame, RawFrame)
+        data = np.ascontiguousarray(frame.raw if is_raw else frame.data)
+        time_axis = np.ascontiguousarray(frame.time_axis)
+        time_offset = _aligned(data.nbytes)
+        if not slots:
+            # The slots are sized by the first frame; a source keeps its frame size while it runs
+            slot_bytes = time_offset + _aligned(time_axis.nbytes)
+            slots.extend(shared_memory.SharedMemory(create=True, size=slot_bytes) for _ in range(num_slots))
+            free_slots.extend(range(num_slots))
+            conn.send(("slots", [slot.name for slot in slots], slot_bytes))
+        if time_offset + time_axis.nbytes > slots[0].size:
+            raise ValueError(f"Frame of {data.nbytes + time_axis.nbytes} bytes does not fit into the "
+                             f"{slots[0].size} byte shared memory slots")
+        if not free_slots:
+            # All slots are still used by the GUI: drop the new frame, the acquisition must not wait
+            stats["frames_without_slot"] += 1
+            return
+
+        slot = free_slots.popleft()
+        buffer = slots[slot].buf
+        np.ndarray(data.shape, data.dtype, buffer=buffer)[...] = data
+        np.ndarray(time_axis.shape, time_axis.dtype, buffer=buffer, offset=time_offset)[...] = time_axis
+        if is_raw and frame.converter is not converter:
+            converter = frame.converter
+            conn.send(("converter", converter))
+        conn.send(("frame", slot, is_raw, frame.sequence, frame.timestamp, data.shape, data.dtype.str,
+                   time_offset, time_axis.shape, time_axis.dtype.str))
+        stats["frames_acquired"] += 1
+
+    try:
+        if initializer is not None:
+            initializer(*initargs)
+        source = source_factory()
+        source.open()
+        try:
+            next_status = time.perf_counter()
+            while not stop_requested:
+                handle_messages()
+                frame = source.read_frame()
+                if frame is not None:
+                    # Every frame is recorded, also those the GUI has no free slot for
+                    if recording is not None:
+                        recording.write_frame(frame)
+                    publish(frame)
+                if time.perf_counter() >= next_status:
+                    conn.send(("status", status()))
+                    next_status += STATUS_INTERVAL
+        finally:
+            source.close()
+            if recording is not None:
+                recording.close()
+            conn.send(("status", status()))
+    except Exception as e:
+        try:
+            conn.send(("error", e))
+        except Exception:
+            # Exceptions that cannot be pickled are passed on as text
+            conn.send(("error", RuntimeError(f"{type(e).__name__}: {e}")))
+    finally:
+        try:
+            conn.send(("closed",))
+            # The GUI process may still attach to the slots until it has seen the end, so wait for its stop
+            deadline = time.perf_counter() + 5.0
+            while not stop_requested and time.perf_counter() < deadline:
+                handle_messages(0.1)
+        except (EOFError, OSError):
+            pass
+        for slot in slots:
+            # The GUI process keeps its own mapping while it still uses frames
+            slot.close()
+            slot.unlink()
+
+
+class ProcessAcquisitionWorker:
+    """
+    Runs an acquisition source in a separate process and publishes its frames to a FrameQueue in this process.
+
+    Drop-in replacement for AcquisitionWorker when the device loop (ctypes polling, driver callbacks, scaling)
+    should not compete with processing and rendering for the GIL of the GUI process. The source is created in the
+    child process by `source_factory` (a picklable callable, e.g. functools.partial of the source class), so the
+    device handle never exists in the GUI process.
+
+    Frame data goes through a small pool of shared memory slots, sized by the first frame: the child copies every
+    frame into a free slot and only sends a short notification through a pipe. The frames put into the queue are
+    RawFrame / Frame objects whose arrays are zero-copy views of the slot; the slot is handed back to the child when
+    the last view of it is garbage collected. If the GUI holds all slots, the child drops new frames (counted in
+    the `frames_without_slot` statistic) instead of waiting.
+
+    The child process is started with the "spawn" method (fork is not safe with Qt and threads); `initializer` is
+    called in the child before the source is created, e.g. to select the same driver backend as the GUI process.
+    Source attributes listed in `stat_names` are reported a few times per second and read with source_stat().
+    start_recording() records the frames to disk inside the acquisition process.
+    """
+
+    def __init__(self, source_factory, frame_queue: FrameQueue = None, name: str = "AcquisitionProcess",
+                 num_slots: int = 8, initializer=None, initargs: tuple = (), stat_names: tuple = DEFAULT_STAT_NAMES):
+        self.source_factory = source_factory
+        self.frame_queue = frame_queue if frame_queue is not None else FrameQueue()
+        self.error = None
+        self.frames_acquired = 0
+        self.source_stats = {}
+        self.num_slots = num_slots
+        self._slots = []
+        self._converter = None
+        self._closed = False
+
+        context = multiprocessing.get_context("spawn")
+        self._conn, child_conn = context.Pipe()
+        self._send_lock = threading.Lock()
+        self._process = context.Process(target=_acquisition_process, name=name, daemon=True,
+                                        args=(child_conn, source_factory, num_slots, stat_names, initializer,
+                                              initargs))
+        self._receiver = threading.Thread(target=self._receive, name=f"{name}Receiver", daemon=True)
+
+    def _send(self, message):
+        with self._send_lock:
+            if not self._closed:
+                try:
+                    self._conn.send(message)
+                except (OSError, ValueError):
+                    pass
+
+    def _release(self, slot: int):
+        self._send(("release", slot))
+
+    def _attach_slots(self, names: list[str], slot_bytes: int):
+        self._retire_slots()
+        self._slots = [_AttachedSlot(name, slot_bytes) for name in names]
+
+    def _retire_slots(self):
+        for slot in self._slots:
+            slot.retire()
+        self._slots = []
+
+    def _make_frame(self, slot, is_raw, sequence, timestamp, shape, dtype, time_offset, time_shape, time_dtype):
+        # The slot is handed back to the child when the last array of the frame is garbage collected
+        buffer = self._slots[slot].frame_buffer(lambda: self._release(slot))
+        data = np.ndarray(shape, np.dtype(dtype), buffer=buffer)
+        time_axis = np.ndarray(time_shape, np.dtype(time_dtype), buffer=buffer, offset=time_offset)
+        if is_raw:
+            return RawFrame(time_axis, data, self._converter, sequence, timestamp)
+        return Frame(time_axis, data, sequence, timestamp)
+
+    def _receive(self):
+        try:
+            while True:
+                message = self._conn.recv()
+                kind = message[0]
+                if kind == "frame":
+                    self.frame_queue.put(self._make_frame(*message[1:]))
+                    self.frames_acquired += 1
+                elif kind == "slots":
+                    self._attach_slots(*message[1:])
+                elif kind == "converter":
+                    self._converter = message[1]
+                elif kind == "status":
+                    self.source_stats = message[1]
+                elif kind == "error":
+                    print(f"Acquisition error: {message[1]}")
+                    self.error = message[1]
+                elif kind == "closed":
+                    break
+        except (EOFError, OSError) as e:
+            if self.error is None:
+                self.error = RuntimeError(f"Acquisition process ended unexpectedly: {e}")
+
+    def source_stat(self, name: str, default=None):
+        """Latest reported value of a source attribute (see stat_names)."""
+        return self.source_stats.get(name, default)
+
+    def start_recording(self, path: str, **recorder_kwargs):
+        """Record all frames in the acquisition process to `path` (see StreamRecorder for the options)."""
+        self._send(("record", path, recorder_kwargs))
+
+    def stop_recording(self):
+        """Finish the recording file."""
+        self._send(("stop_recording", None, None))
+
+    @property
+    def recording_stats(self) -> dict:
+        """Latest reported progress of the recording (FrameRecording.stats), empty if there is none."""
+        return self.source_stats.get("recording", {})
+
+    def start(self):
+        self._process.start()
+        self._receiver.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._send(("stop",))
+        if self._receiver.is_alive():
+            self._receiver.join(timeout)
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+        with self._send_lock:
+            self._closed = True
+            self._conn.close()
+        # Frames still in use keep their slot mapped; the mappings are closed with their last frame
+        self._retire_slots()
+
+    def is_alive(self) -> bool:
+        return self._receiver.is_alive()
+
+
+def _simulated_source(num_channels: int, sampling_freq: float, frame_samples: int):
+    # Imported here so that src.common does not depend on the simulation package
+    from src.simple_simulation.simulated_source import SimulatedSource
+    return SimulatedSource(num_channels, sampling_freq, frame_samples, noise_scale=0.1, seed=0)
+
+
+def _gui_load(frame, render_points: int, busy_time: float):
+    """Stand-in for the GUI thread: display reduction of the frame plus pure Python work that holds the GIL."""
+    if isinstance(frame, RawFrame):
+        frame.pyramid().query(frame.time_axis[0], frame.time_axis[-1], render_points)
+    else:
+        minmax_decimate(frame.time_axis, frame.data, render_points)
+    end_time = time.perf_counter() + busy_time
+    while time.perf_counter() < end_time:
+        pass
+
+
+def benchmark_process_acquisition(num_channels: int = 8, sampling_freqs: tuple = (1e6, 4e6, 8e6),
+                                  frame_rate: float = 20, duration: float = 3.0, busy_time: float = 0.02):
+    """
+    Compare the sustained throughput of a simulated device run by AcquisitionWorker (thread in the GUI process)
+    and ProcessAcquisitionWorker (separate process) while the main thread simulates GUI work.
+
+    The simulated device generates its signal on its own thread and drops samples when its consumer lags, so the
+    delivered rate and dropped samples show how much the GIL-bound GUI work slows acquisition down.
+
+    :param num_channels: Number of channels
+    :param sampling_freqs: Sample rates per channel to test
+    :param frame_rate: Frames per second delivered by the source
+    :param duration: Seconds per run
+    :param busy_time: Seconds of GIL-holding work per displayed frame
+    """
+    from functools import partial
+
+    for sampling_freq in sampling_freqs:
+        frame_samples = int(sampling_freq / frame_rate)
+        factory = partial(_simulated_source, num_channels, sampling_freq, frame_samples)
+        for mode in ("thread", "process"):
+            frame_queue = FrameQueue(max_size=4)
+            if mode == "thread":
+                source = factory()
+                worker = AcquisitionWorker(source, frame_queue)
+                stats = lambda: {name: getattr(source, name) for name in DEFAULT_STAT_NAMES if hasattr(source, name)}
+            else:
+                worker = ProcessAcquisitionWorker(factory, frame_queue)
+                stats = lambda: worker.source_stats
+            worker.start()
+            # Let the process start up before measuring
+            while worker.frames_acquired == 0 and worker.error is None:
+                time.sleep(0.01)
+            frames_before = worker.frames_acquired
+            start_time = time.perf_counter()
+            while time.perf_counter() - start_time < duration and worker.error is None:
+                frame = frame_queue.get_latest()
+                if frame is None:
+                    time.sleep(0.001)
+                    continue
+                _gui_load(frame, 2000, busy_time)
+                del frame
+            elapsed = time.perf_counter() - start_time
+            frames = worker.frames_acquired - frames_before
+            worker.stop()
+            result = stats()
+            print(f"{sampling_freq / 1e6:5.1f} MS/s x {num_channels} channels, {mode:>7}: "
+                  f"{frames * frame_samples / elapsed / 1e6:6.2f} MS/s per channel delivered, "
+                  f"device {result.get('throughput', 0) / 1e6:6.2f} MS/s, "
+                  f"dropped samples: {result.get('dropped_samples', 0)}, late chunks: {result.get('late_chunks', 0)}")
+
+
+if __name__ == "__main__":
+    benchmark_process_acquisition()
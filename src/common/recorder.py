@@ -0,0 +1,538 @@
+import json
+import os
+import queue
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.common.adc_conversion import AdcConverter
+from src.common.chunk_compression import ChunkCodec
+
+
+def _frame_samples(frame) -> np.ndarray:
+    # The raw codes of a RawFrame, the data of a Frame
+    return frame.raw if hasattr(frame, "raw") else frame.data
+
+
+# Per-chunk entry of the trailing index
+CHUNK_INDEX_DTYPE = np.dtype([
+    ("offset", "<u8"),  # file offset of the chunk data
+    ("stored_bytes", "<u8"),  # bytes of the chunk in the file
+    ("first_sample", "<i8"),  # sample index of the first sample (time = first_sample / sample_rate)
+    ("num_samples", "<i8"),  # samples per channel
+    ("timestamp", "<f8"),  # time.time() when the first block of the chunk was recorded
+])
+
+
+class StreamRecorder:
+    """
+    Continuous recorder of raw sample blocks (usually int16 ADC codes) to a chunked binary file, written by a
+    dedicated thread.
+
+    write() copies the samples into one of `num_buffers` preallocated (num_channels, chunk_samples) buffers and
+    returns; full chunks are handed to the writer thread, which writes them with one unbuffered write call each
+    (the GIL is released while the OS copies) into a file that is preallocated in `preallocate_bytes` steps. If
+    the disk falls behind and all buffers are queued, new samples are dropped and counted in dropped_samples
+    instead of blocking the acquisition; the gap is visible in the index.
+
+    A chunk ends when it is full or when the next block does not continue it (a gap, or a new block capture).
+
+    With `compression`, every chunk is compressed (ChunkCodec) by a pool of `compression_threads` threads before
+    the writer thread writes it; the writer takes the results in chunk order, so the file layout is the same. A
+    buffer is only reused once its chunk is written, so if the compression falls behind, samples are dropped like
+    for a slow disk rather than slowing down the acquisition.
+
+    File format:
+    - HEADER_SIZE bytes (more if the metadata does not fit): MAGIC, the length of the JSON metadata as uint32 and
+      the metadata in UTF-8 (channels, dtype, sample rate, start time, per-channel scale and offset or the offset
+      of a float32 (num_channels, 65536) conversion table, user metadata), zero padded.
+    - The chunks, each a C-ordered (num_channels, num_samples) array, or its ChunkCodec encoding (stored_bytes
+      long) if the header names a compression.
+    - The chunk index, an array of CHUNK_INDEX_DTYPE, followed by the footer: INDEX_MAGIC, index offset and number of
+      chunks as uint64.
+
+    Every uncompressed chunk can be opened with np.memmap(path, dtype, "r", offset, (num_channels, num_samples))
+    from its index entry, a compressed one decoded on its own; RecordingReader does this.
+    """
+
+    MAGIC = b"HSQREC01"
+    INDEX_MAGIC = b"HSQIDX01"
+    HEADER_SIZE = 4096
+    FOOTER = struct.Struct("<8sQQ")
+
+    def __init__(self, path: str, num_channels: int, sample_rate: float, dtype=np.int16,
+                 converter: AdcConverter | None = None, chunk_samples: int = 262_144, num_buffers: int = 32,
+                 preallocate_bytes: int = 1 << 30, metadata: dict | None = None, blocking: bool = False,
+                 compression: str | ChunkCodec | None = None, compression_threads: int | None = None):
+        """
+        Args:
+            path (str): Recording file; an existing file is overwritten.
+            num_channels (int): Number of channels.
+            sample_rate (float): Samples per second and channel.
+            dtype: Sample type.
+            converter (AdcConverter | None): Conversion of the codes to volts, stored in the header.
+            chunk_samples (int): Samples per channel and chunk.
+            num_buffers (int): Number of chunk buffers; bounds the memory and how far the disk may fall behind.
+            preallocate_bytes (int): Size of the steps in which the file is extended.
+            metadata (dict | None): Additional JSON serializable information stored in the header.
+            blocking (bool): Wait for a free buffer instead of dropping samples, for writing files offline.
+            compression (str | ChunkCodec | None): Chunk compression, e.g. 'zlib', 'lzma:6' (ChunkCodec.from_spec);
+                None stores the raw samples.
+            compression_threads (int | None): Threads compressing chunks (default: number of CPUs).
+        """
+        self.path = path
+        self.num_channels = num_channels
+        self.sample_rate = sample_rate
+        self.dtype = np.dtype(dtype)
+        self.chunk_samples = chunk_samples
+        self.preallocate_bytes = preallocate_bytes
+        self.blocking = blocking
+        self.compression = ChunkCodec.from_spec(compression)
+        self.error = None
+
+        # Statistics
+        self.samples_written = 0
+        self.bytes_written = 0
+        self.raw_bytes = 0
+        self.dropped_samples = 0
+        self.write_time = 0.0
+        self.compression_time = 0.0
+        self.start_time = time.time()
+
+        self._index = []
+        self._free_buffers = queue.Queue()
+        for _ in range(num_buffers):
+            self._free_buffers.put(np.empty((num_channels, chunk_samples), dtype=self.dtype))
+        self._queue = queue.Queue()
+        self._buffer = None
+        self._fill = 0
+        self._chunk_first_sample = 0
+        self._chunk_timestamp = 0.0
+        self._next_sample = None
+        self._compressor = None
+        if self.compression is not None:
+            self._compressor = ThreadPoolExecutor(compression_threads or os.cpu_count() or 1,
+                                                  thread_name_prefix="StreamRecorderCompression")
+
+        self._file = open(path, "wb+", buffering=0)
+        header = self._header(converter, metadata)
+        self._file.write(header)
+        if converter is not None and not converter.linear:
+            self._file.write(np.ascontiguousarray(converter.lut, dtype="<f4").tobytes())
+        self._offset = self._file.tell()
+        self._allocated = self._offset
+        self._thread = threading.Thread(target=self._run, name="StreamRecorder", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def for_frame(cls, path: str, frame, **kwargs) -> "StreamRecorder":
+        """Recorder configured by the first Frame / RawFrame of an acquisition (channels, type, rate, conversion)."""
+        samples = _frame_samples(frame)
+        time_axis = frame.time_axis
+        sample_rate = 1.0 / (time_axis[1] - time_axis[0]) if len(time_axis) > 1 else 1.0
+        return cls(path, samples.shape[-2], sample_rate, samples.dtype, getattr(frame, "converter", None), **kwargs)
+
+    def _header(self, converter: AdcConverter | None, metadata: dict | None) -> bytes:
+        info = {
+            "version": 1,
+            "num_channels": self.num_channels,
+            "dtype": self.dtype.str,
+            "sample_rate": self.sample_rate,
+            "start_time": self.start_time,
+            "chunk_samples": self.chunk_samples,
+            "scale": None,
+            "offset": None,
+            "lut_offset": None,
+            "compression": self.compression.to_info() if self.compression is not None else None,
+            "metadata": metadata or {},
+        }
+        if converter is not None and converter.linear:
+            info["scale"] = converter.scale[:, 0].tolist()
+            info["offset"] = converter.offset[:, 0].tolist()
+        if converter is not None and not converter.linear:
+            # The conversion table follows the header; reserve room for its offset before sizing the header
+            info["lut_offset"] = 0
+        description = json.dumps(info).encode("utf-8")
+        header_size = max(self.HEADER_SIZE, -(-(len(self.MAGIC) + 4 + len(description) + 32) // 4096) * 4096)
+        if info["lut_offset"] is not None:
+            info["lut_offset"] = header_size
+            description = json.dumps(info).encode("utf-8")
+        header = self.MAGIC + struct.pack("<I", len(description)) + description
+        return header.ljust(header_size, b"\0")
+
+    @property
+    def throughput(self) -> float:
+        """Bytes per second the writer thread achieved while writing (excluding idle time)."""
+        return self.bytes_written / self.write_time if self.write_time > 0 else 0.0
+
+    @property
+    def compression_ratio(self) -> float:
+        """Raw sample bytes per byte in the file (1 without compression)."""
+        return self.raw_bytes / self.bytes_written if self.bytes_written > 0 else 1.0
+
+    @property
+    def compression_throughput(self) -> float:
+        """Raw bytes per second one compression thread achieved (multiply by the threads for the pool)."""
+        return self.raw_bytes / self.compression_time if self.compression_time > 0 else 0.0
+
+    @property
+    def num_chunks(self) -> int:
+        return len(self._index)
+
+    def write_frame(self, frame) -> None:
+        """
+        Record a frame; its first sample index is derived from the time axis. Streamed frames continue each other,
+        block captures and rapid block segments (which all start at the same time) become separate chunks.
+        """
+        samples = _frame_samples(frame)
+        first_sample = int(round(frame.time_axis[0] * self.sample_rate))
+        for block in (samples if samples.ndim == 3 else [samples]):
+            self.write(block, first_sample, frame.timestamp)
+
+    def write(self, block: np.ndarray, first_sample: int | None = None, timestamp: float | None = None) -> None:
+        """
+        Record a (num_channels, n) block; only call from one thread.
+
+        Args:
+            block (np.ndarray): Samples, one row per channel.
+            first_sample (int | None): Sample index of the first sample; None continues the previous block.
+            timestamp (float | None): time.time() of the block (default: now).
+        """
+        if self._thread is None:
+            raise RuntimeError("Recorder is closed")
+        if block.shape[0] != self.num_channels:
+            raise ValueError(f"Expected {self.num_channels} channels, got {block.shape[0]}")
+        if first_sample is None:
+            first_sample = self._next_sample if self._next_sample is not None else 0
+        if self._buffer is not None and first_sample != self._next_sample:
+            self._submit()
+        timestamp = timestamp if timestamp is not None else time.time()
+
+        position = 0
+        num_samples = block.shape[1]
+        while position < num_samples:
+            if self._buffer is None:
+                try:
+                    self._buffer = self._free_buffers.get(block=self.blocking)
+                except queue.Empty:
+                    # The disk does not keep up: drop the rest of the block, the next chunk starts after the gap
+                    self.dropped_samples += num_samples - position
+                    break
+                self._fill = 0
+                self._chunk_first_sample = first_sample + position
+                self._chunk_timestamp = timestamp
+            count = min(num_samples - position, self.chunk_samples - self._fill)
+            self._buffer[:, self._fill:self._fill + count] = block[:, position:position + count]
+            self._fill += count
+            position += count
+            if self._fill == self.chunk_samples:
+                self._submit()
+        self._next_sample = first_sample + num_samples
+
+    def _submit(self):
+        payload = None
+        if self._compressor is not None:
+            payload = self._compressor.submit(self._compress, self._buffer[:, :self._fill])
+        self._queue.put((self._buffer, self._fill, self._chunk_first_sample, self._chunk_timestamp, payload))
+        self._buffer = None
+
+    def _compress(self, chunk: np.ndarray) -> tuple[bytes, float]:
+        start_time = time.perf_counter()
+        payload = self.compression.encode(chunk)
+        return payload, time.perf_counter() - start_time
+
+    def close(self) -> None:
+        """Write the last chunk, the index and the footer, trim the preallocated space and close the file."""
+        if self._thread is None:
+            return
+        if self._buffer is not None and self._fill > 0:
+            self._submit()
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            buffer, num_samples, first_sample, timestamp, payload = item
+            try:
+                if payload is not None:
+                    # Chunks are compressed in parallel but written in order
+                    payload, compression_time = payload.result()
+                    self.compression_time += compression_time
+                if self.error is None:
+                    self._write_chunk(buffer, num_samples, first_sample, timestamp, payload)
+            except Exception as e:
+                # Keep returning buffers so write() never blocks; the error is reported by the owner
+                self.error = e
+            finally:
+                self._free_buffers.put(buffer)
+
+        try:
+            self._write_index()
+        except Exception as e:
+            self.error = e
+        self._file.close()
+        if self._compressor is not None:
+            self._compressor.shutdown()
+
+    def _write_chunk(self, buffer: np.ndarray, num_samples: int, first_sample: int, timestamp: float,
+                     payload: bytes | None = None):
+        # A partial chunk is made contiguous; full chunks are written straight from the buffer
+        data = buffer if num_samples == buffer.shape[1] else np.ascontiguousarray(buffer[:, :num_samples])
+        raw_bytes = data.nbytes
+        if payload is not None:
+            data = np.frombuffer(payload, dtype=np.uint8)
+        start_time = time.perf_counter()
+        self._reserve(data.nbytes)
+        view = memoryview(data).cast("B")
+        while view:
+            # Unbuffered writes may be partial
+            view = view[self._file.write(view):]
+        self.write_time += time.perf_counter() - start_time
+        self._index.append((self._offset, data.nbytes, first_sample, num_samples, timestamp))
+        self._offset += data.nbytes
+        self.samples_written += num_samples
+        self.bytes_written += data.nbytes
+        self.raw_bytes += raw_bytes
+
+    def _reserve(self, num_bytes: int):
+        """Extend the file in large steps, so the file system allocates big contiguous extents ahead of the data."""
+        if self._offset + num_bytes <= self._allocated:
+            return
+        new_size = self._offset + max(num_bytes, self.preallocate_bytes)
+        if hasattr(os, "posix_fallocate"):
+            os.posix_fallocate(self._file.fileno(), self._allocated, new_size - self._allocated)
+        else:
+            self._file.truncate(new_size)
+            self._file.seek(self._offset)
+        self._allocated = new_size
+
+    def _write_index(self):
+        index = np.array(self._index, dtype=CHUNK_INDEX_DTYPE)
+        self._file.seek(self._offset)
+        self._file.write(index.tobytes())
+        self._file.write(self.FOOTER.pack(self.INDEX_MAGIC, self._offset, len(index)))
+        self._file.truncate()
+        os.fsync(self._file.fileno())
+
+
+class FrameRecording:
+    """
+    Recording of the frames of a running acquisition, used by the acquisition workers: the StreamRecorder is
+    created from the first frame, so channels, sample rate and conversion need not be known up front.
+    """
+
+    def __init__(self, path: str, **recorder_kwargs):
+        self.path = path
+        self.recorder_kwargs = recorder_kwargs
+        self.recorder = None
+
+    def write_frame(self, frame) -> None:
+        if self.recorder is None:
+            self.recorder = StreamRecorder.for_frame(self.path, frame, **self.recorder_kwargs)
+        self.recorder.write_frame(frame)
+
+    def close(self) -> None:
+        if self.recorder is not None:
+            self.recorder.close()
+
+    def stats(self) -> dict:
+        """Progress of the recording as plain values, so it can also be sent from an acquisition process."""
+        recorder = self.recorder
+        if recorder is None:
+            return {"path": self.path, "bytes_written": 0, "dropped_samples": 0, "throughput": 0.0,
+                    "compression_ratio": 1.0, "error": None}
+        return {"path": self.path, "bytes_written": recorder.bytes_written, "dropped_samples": recorder.dropped_samples,
+                "throughput": recorder.throughput, "compression_ratio": recorder.compression_ratio,
+                "error": None if recorder.error is None else str(recorder.error)}
+
+
+class RecordingReader:
+    """
+    Memory-mapped access to a StreamRecorder file.
+
+    Only the header and the index are read; chunk(), read() and iter_chunks() return np.memmap views (or copies
+    where a range spans several chunks), so recordings larger than the memory can be processed. Chunks of a
+    compressed recording are read and decoded one at a time through the index (the last one is kept), so random
+    access works the same way.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as file:
+            start = file.read(len(StreamRecorder.MAGIC) + 4)
+            if not start.startswith(StreamRecorder.MAGIC):
+                raise ValueError(f"{path} is not a recording")
+            (description_length,) = struct.unpack_from("<I", start, len(StreamRecorder.MAGIC))
+            self.info = json.loads(file.read(description_length).decode("utf-8"))
+            file.seek(-StreamRecorder.FOOTER.size, os.SEEK_END)
+            magic, index_offset, num_chunks = StreamRecorder.FOOTER.unpack(file.read(StreamRecorder.FOOTER.size))
+        if magic != StreamRecorder.INDEX_MAGIC:
+            raise ValueError(f"{path} has no chunk index (recording not closed)")
+
+        self.num_channels = self.info["num_channels"]
+        self.dtype = np.dtype(self.info["dtype"])
+        self.sample_rate = self.info["sample_rate"]
+        self.metadata = self.info["metadata"]
+        self.index = np.fromfile(path, dtype=CHUNK_INDEX_DTYPE, count=num_chunks, offset=index_offset)
+        self.converter = self._converter()
+        compression = self.info.get("compression")
+        self.compression = ChunkCodec.from_info(compression) if compression is not None else None
+        self._decoded = (None, None)
+
+    def _converter(self) -> AdcConverter | None:
+        if self.info["lut_offset"] is not None:
+            lut = np.fromfile(self.path, dtype="<f4", count=self.num_channels * 65536, offset=self.info["lut_offset"])
+            return AdcConverter.from_lut(lut.reshape(self.num_channels, 65536))
+        if self.info["scale"] is not None:
+            return AdcConverter(self.num_channels, np.array(self.info["scale"]), np.array(self.info["offset"]),
+                                full_scale=1.0)
+        return None
+
+    @property
+    def num_chunks(self) -> int:
+        return len(self.index)
+
+    @property
+    def num_samples(self) -> int:
+        """Samples per channel in all chunks."""
+        return int(self.index["num_samples"].sum())
+
+    @property
+    def compression_ratio(self) -> float:
+        """Raw sample bytes per stored byte (1 for uncompressed recordings)."""
+        stored_bytes = int(self.index["stored_bytes"].sum())
+        raw_bytes = self.num_samples * self.num_channels * self.dtype.itemsize
+        return raw_bytes / stored_bytes if stored_bytes > 0 else 1.0
+
+    @property
+    def is_sequential(self) -> bool:
+        """
+        True if every chunk starts at or after the end of the previous one (a stream, possibly with gaps), so sample
+        indices are unique; False for separate captures (block, rapid block), which all start at their trigger.
+        """
+        ends = self.index["first_sample"][:-1] + self.index["num_samples"][:-1]
+        return bool(np.all(ends <= self.index["first_sample"][1:]))
+
+    @property
+    def is_contiguous(self) -> bool:
+        """True if every chunk continues the previous one (no dropped samples, no separate captures)."""
+        ends = self.index["first_sample"][:-1] + self.index["num_samples"][:-1]
+        return bool(np.all(ends == self.index["first_sample"][1:]))
+
+    def chunk(self, i: int) -> np.ndarray:
+        """Samples of chunk i, a (num_channels, num_samples) memmap (a decoded array if compressed)."""
+        entry = self.index[i]
+        shape = (self.num_channels, int(entry["num_samples"]))
+        if self.compression is None:
+            return np.memmap(self.path, self.dtype, "r", int(entry["offset"]), shape)
+        if self._decoded[0] != i:
+            with open(self.path, "rb") as file:
+                file.seek(int(entry["offset"]))
+                payload = file.read(int(entry["stored_bytes"]))
+            samples = self.compression.decode(payload, self.dtype, shape)
+            samples.flags.writeable = False
+            self._decoded = (i, samples)
+        return self._decoded[1]
+
+    def time_axis(self, i: int) -> np.ndarray:
+        """Time of every sample of chunk i in seconds."""
+        entry = self.index[i]
+        return (entry["first_sample"] + np.arange(entry["num_samples"])) / self.sample_rate
+
+    def iter_chunks(self):
+        """Yield (first_sample, samples) of all chunks in order."""
+        for i in range(self.num_chunks):
+            yield int(self.index[i]["first_sample"]), self.chunk(i)
+
+    def read(self, first_sample: int, num_samples: int) -> np.ndarray:
+        """
+        Samples [first_sample, first_sample + num_samples) of all channels; a memmap view if they are in one chunk.
+        Samples that were not recorded (gaps) are zero.
+
+        Raises:
+            ValueError: If the recording holds separate captures (not is_sequential), whose sample ranges overlap;
+                read those per chunk.
+        """
+        if not self.is_sequential:
+            raise ValueError(f"{self.path} holds separate captures with overlapping sample ranges; use chunk()")
+        starts = self.index["first_sample"]
+        ends = starts + self.index["num_samples"]
+        chunks = np.flatnonzero((starts < first_sample + num_samples) & (ends > first_sample))
+        if len(chunks) == 1 and starts[chunks[0]] <= first_sample and ends[chunks[0]] >= first_sample + num_samples:
+            start = first_sample - starts[chunks[0]]
+            return self.chunk(chunks[0])[:, start:start + num_samples]
+        out = np.zeros((self.num_channels, num_samples), dtype=self.dtype)
+        for i in chunks:
+            start, stop = max(starts[i], first_sample), min(ends[i], first_sample + num_samples)
+            out[:, start - first_sample:stop - first_sample] = self.chunk(i)[:, start - starts[i]:stop - starts[i]]
+        return out
+
+
+def benchmark_stream_recorder(path: str | None = None, num_channels: int = 8, sample_rate: float = 10e6,
+                              duration: float = 3.0, block_samples: int = 100_000, compression: str | None = None):
+    """
+    Record int16 blocks arriving at the sample rate, report the disk rate of the writer thread compared with the
+    rate needed for real-time recording, and read a range back.
+
+    :param path: Recording file (default: a temporary file)
+    :param num_channels: Number of channels
+    :param sample_rate: Samples per second and channel the disk rate is compared with
+    :param duration: Seconds of data to record
+    :param block_samples: Samples per channel per write() call, like one acquisition frame
+    :param compression: Chunk compression (e.g. 'zlib'); the samples are then simulated ADC codes instead of random
+    """
+    import tempfile
+
+    if path is None:
+        path = os.path.join(tempfile.gettempdir(), "hsqdaq_recorder_benchmark.hsq")
+    rng = np.random.default_rng(0)
+    if compression is None:
+        block = rng.integers(-32768, 32768, (num_channels, block_samples), dtype=np.int16)
+    else:
+        # Random codes do not compress; use a sine with noise of a few bits
+        t = np.arange(block_samples)
+        block = np.round(np.stack([8000 * np.sin(2 * np.pi * (t - 20 * channel) / 50_000)
+                                   for channel in range(num_channels)])
+                         + rng.normal(0, 128, (num_channels, block_samples))).astype(np.int16)
+    num_blocks = int(sample_rate * duration) // block_samples
+    converter = AdcConverter(num_channels, 2.0)
+
+    # Blocks arrive at the sample rate like from an acquisition; the buffers have to absorb disk stalls
+    recorder = StreamRecorder(path, num_channels, sample_rate, converter=converter, compression=compression)
+    start_time = time.perf_counter()
+    for i in range(num_blocks):
+        delay = start_time + i * block_samples / sample_rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        recorder.write(block, i * block_samples)
+    recorder.close()
+    required = num_channels * sample_rate * block.itemsize
+    print(f"Recorded {recorder.bytes_written / 1e6:.0f} MB in real time, writer {recorder.throughput / 1e6:.0f} MB/s "
+          f"while writing, required {required / 1e6:.0f} MB/s, dropped samples: {recorder.dropped_samples}")
+    if compression is not None:
+        print(f"Compression {recorder.compression}: ratio {recorder.compression_ratio:.2f}, "
+              f"{recorder.compression_throughput / 1e6:.0f} MB/s per thread")
+
+    reader = RecordingReader(path)
+    check = reader.read(3 * block_samples + 123, 1000)
+    assert np.array_equal(check, block[:, 123:1123]), "Read back data differs"
+    print(f"Read back {reader.num_chunks} chunks, {reader.num_samples} samples per channel, "
+          f"contiguous: {reader.is_contiguous}")
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    benchmark_stream_recorder()
+    benchmark_stream_recorder(sample_rate=1e6, compression="zlib")
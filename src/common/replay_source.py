@@ -0,0 +1,205 @@
+import time
+import numpy as np
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.common.acquisition import Frame, RawFrame
+from src.common.recorder import RecordingReader
+
+
+class ReplaySource:
+    """
+    Acquisition source that plays a StreamRecorder file back, e.g. to tune processing without hardware.
+
+    Implements the source interface of AcquisitionWorker (open / read_frame / close), like the Pico, NI and
+    simulated sources. The recording is memory mapped; frames are zero-copy views of the file where they lie in one
+    chunk (decoded chunks for compressed recordings). Raw int16 recordings with a stored conversion give RawFrame
+    objects, all others Frame objects.
+
+    Frames: without `frame_samples`, a continuous (streamed) recording gives one frame per chunk, and a recording
+    of separate captures (block captures, rapid block segments) gives one frame per capture, i.e. per run of chunks
+    that continue each other. With `frame_samples`, a continuous recording is cut into consecutive frames of that
+    length.
+
+    Pacing: "realtime" delivers every frame when it was due in the recording, scaled by `speed` (sample times for
+    continuous recordings, the recorded timestamps otherwise); "fast" delivers frames as fast as they are read, so
+    the achieved `throughput` (samples per second and channel) measures everything downstream.
+    """
+
+    PACINGS = ("realtime", "fast")
+
+    def __init__(self, path: str, frame_samples: int | None = None, pacing: str = "realtime", speed: float = 1.0,
+                 loop: bool = False):
+        """
+        Args:
+            path (str): Recording file.
+            frame_samples (int | None): Samples per channel and frame; None for one frame per recorded chunk.
+            pacing (str): "realtime" or "fast".
+            speed (float): Playback speed factor for realtime pacing.
+            loop (bool): Start over at the end of the recording instead of ending the acquisition.
+        """
+        if pacing not in self.PACINGS:
+            raise ValueError(f"Invalid pacing. Choose one of {', '.join(self.PACINGS)}.")
+        self.path = path
+        self.frame_samples = frame_samples
+        self.pacing = pacing
+        self.speed = speed
+        self.loop = loop
+
+        self.reader = None
+        self.frames = None  # (first chunk, end chunk, first_sample, num_samples, due time in seconds) per frame
+        self.sequence = 0
+        self.position = 0
+        self.loops = 0
+        self.finished = False
+        # Statistics
+        self.samples_delivered = 0
+        self._start_time = None
+        self._end_time = None
+        self._loop_start_time = None
+
+    def open(self):
+        self.reader = RecordingReader(self.path)
+        index = self.reader.index
+        starts = index["first_sample"]
+        if self.frame_samples is None:
+            if self.reader.is_contiguous:
+                bounds = np.arange(self.reader.num_chunks + 1)
+                due = (starts - starts[:1]) / self.reader.sample_rate
+            else:
+                # A capture ends where the next chunk does not continue it
+                ends = starts + index["num_samples"]
+                new_capture = np.concatenate([[True], ends[:-1] != starts[1:]])
+                bounds = np.append(np.flatnonzero(new_capture), self.reader.num_chunks)
+                due = (index["timestamp"] - index["timestamp"][:1])[bounds[:-1]]
+            self.frames = [(int(first), int(end), int(starts[first]),
+                            int(index["num_samples"][first:end].sum()), float(frame_due))
+                           for first, end, frame_due in zip(bounds[:-1], bounds[1:], due)]
+        else:
+            if not self.reader.is_contiguous:
+                raise ValueError("Only continuous recordings can be cut into frames; use one frame per chunk")
+            num_frames = self.reader.num_samples // self.frame_samples
+            self.frames = [(0, 0, int(starts[0]) + i * self.frame_samples, self.frame_samples,
+                            i * self.frame_samples / self.reader.sample_rate) for i in range(num_frames)]
+        if not self.frames:
+            raise ValueError(f"{self.path} contains no complete frame")
+        print(f"Replaying {self.path}: {len(self.frames)} frames, {self.reader.num_channels} channels, "
+              f"{self.reader.sample_rate:.0f} S/s, pacing {self.pacing}")
+        self.position = 0
+        self.loops = 0
+        self.finished = False
+        self.samples_delivered = 0
+        self._start_time = self._loop_start_time = time.perf_counter()
+        self._end_time = None
+
+    def read_frame(self) -> Frame | RawFrame | None:
+        if self.position == len(self.frames):
+            if not self.loop:
+                if not self.finished:
+                    self._end_time = time.perf_counter()
+                    self.finished = True
+                    print(f"Replay finished: {self.throughput / 1e6:.2f} MS/s per channel")
+                time.sleep(0.05)
+                return None
+            # The next pass follows without a pause
+            self.position = 0
+            self.loops += 1
+            self._loop_start_time = time.perf_counter()
+
+        first_chunk, end_chunk, first_sample, num_samples, due = self.frames[self.position]
+        if self.pacing == "realtime":
+            wait = self._loop_start_time + due / self.speed - time.perf_counter()
+            if wait > 0:
+                # Do not block for long, so that the worker handles stop() promptly
+                time.sleep(min(wait, 0.05))
+                if wait > 0.05:
+                    return None
+
+        if self.frame_samples is not None:
+            samples = np.asarray(self.reader.read(first_sample, num_samples))
+        elif end_chunk - first_chunk == 1:
+            samples = np.asarray(self.reader.chunk(first_chunk))
+        else:
+            samples = np.concatenate([self.reader.chunk(i) for i in range(first_chunk, end_chunk)], axis=1)
+        time_axis = (first_sample + np.arange(num_samples)) / self.reader.sample_rate
+        self.position += 1
+        self.sequence += 1
+        self.samples_delivered += num_samples
+        if self.reader.converter is not None and samples.dtype == np.int16:
+            return RawFrame(time_axis, samples, self.reader.converter, self.sequence)
+        if self.reader.converter is not None:
+            return Frame(time_axis, self.reader.converter.convert(samples), self.sequence)
+        return Frame(time_axis, samples, self.sequence)
+
+    def close(self):
+        self.reader = None
+
+    @property
+    def dropped_samples(self) -> int:
+        return 0
+
+    @property
+    def throughput(self) -> float:
+        """Samples per second and channel delivered since open() (until the end of the recording)."""
+        if self._start_time is None:
+            return 0.0
+        elapsed = (self._end_time or time.perf_counter()) - self._start_time
+        return self.samples_delivered / elapsed if elapsed > 0 else 0.0
+
+
+def benchmark_replay(path: str | None = None, num_channels: int = 8, num_samples: int = 20_000_000,
+                     frame_samples: int = 1_000_000):
+    """
+    Replay a recording as fast as possible, alone and with the display and delay processing of the apps applied to
+    every frame, and report the achieved samples per second and channel.
+
+    :param path: Recording to replay (default: a synthetic recording of pulses in a temporary file)
+    :param num_channels: Channels of the synthetic recording
+    :param num_samples: Samples per channel of the synthetic recording
+    :param frame_samples: Samples per channel and frame
+    """
+    import os
+    import tempfile
+    from src.common.adc_conversion import AdcConverter
+    from src.common.edge_detection import find_first_edges
+    from src.common.recorder import StreamRecorder
+
+    synthetic = path is None
+    if synthetic:
+        path = os.path.join(tempfile.gettempdir(), "hsqdaq_replay_benchmark.hsq")
+        rng = np.random.default_rng(0)
+        block = rng.normal(0, 300, (num_channels, frame_samples)).astype(np.int16)
+        # One pulse per frame, delayed by 10 samples per channel
+        for channel in range(num_channels):
+            block[channel, 1000 + 10 * channel:5000 + 10 * channel] += 16000
+        recorder = StreamRecorder(path, num_channels, 10e6, converter=AdcConverter(num_channels, 2.0), blocking=True)
+        for i in range(num_samples // frame_samples):
+            recorder.write(block, i * frame_samples)
+        recorder.close()
+
+    def process(frame):
+        if isinstance(frame, RawFrame):
+            frame.pyramid().query(frame.time_axis[0], frame.time_axis[-1], 2000)
+            find_first_edges(frame.time_axis, frame.raw, frame.converter.to_codes(0.5))
+        else:
+            find_first_edges(frame.time_axis, frame.data, 0.5)
+
+    for name, consumer in (("replay only", lambda frame: None), ("display + edge detection", process)):
+        source = ReplaySource(path, frame_samples, pacing="fast")
+        source.open()
+        while not source.finished:
+            frame = source.read_frame()
+            if frame is not None:
+                consumer(frame)
+        print(f"{name:>25}: {source.throughput / 1e6:8.2f} MS/s per channel")
+        source.close()
+    if synthetic:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    benchmark_replay()
@@ -0,0 +1,108 @@
+import threading
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Preallocated multi-channel ring buffer.
+
+    Samples are stored in a (num_channels, capacity) array. Every written sample gets a monotonically
+    increasing index, so a reader can tell how much it has missed when the writer laps it.
+    """
+
+    def __init__(self, num_channels: int, capacity: int, dtype=np.int16):
+        if num_channels < 1 or capacity < 1:
+            raise ValueError("Number of channels and capacity must be positive")
+        self.num_channels = num_channels
+        self.capacity = capacity
+        self.data = np.zeros((num_channels, capacity), dtype=dtype)
+        self.lock = threading.Lock()
+
+        # Total number of samples written since the last reset (index of the next sample)
+        self.write_index = 0
+        # Index of the next sample returned by read_new()
+        self.read_index = 0
+        # Samples overwritten before they were read
+        self.dropped_samples = 0
+
+    def reset(self):
+        with self.lock:
+            self.write_index = 0
+            self.read_index = 0
+            self.dropped_samples = 0
+
+    def write(self, block: np.ndarray) -> None:
+        """
+        Append a (num_channels, n) block. Blocks longer than the capacity only keep their last samples.
+
+        Args:
+            block (np.ndarray): Samples to append, one row per channel.
+        """
+        num_new = block.shape[1]
+        if num_new == 0:
+            return
+        with self.lock:
+            skipped = max(0, num_new - self.capacity)
+            if skipped:
+                block = block[:, skipped:]
+            num_copy = block.shape[1]
+
+            start = (self.write_index + skipped) % self.capacity
+            first = min(num_copy, self.capacity - start)
+            self.data[:, start:start + first] = block[:, :first]
+            if first < num_copy:
+                self.data[:, :num_copy - first] = block[:, first:]
+
+            self.write_index += num_new
+            oldest_available = self.write_index - self.capacity
+            if self.read_index < oldest_available:
+                self.dropped_samples += oldest_available - self.read_index
+                self.read_index = oldest_available
+
+    def available(self) -> int:
+        """Number of samples written but not yet returned by read_new()."""
+        with self.lock:
+            return self.write_index - self.read_index
+
+    def _copy_range(self, start_index: int, num_samples: int) -> np.ndarray:
+        out = np.empty((self.num_channels, num_samples), dtype=self.data.dtype)
+        start = start_index % self.capacity
+        first = min(num_samples, self.capacity - start)
+        out[:, :first] = self.data[:, start:start + first]
+        if first < num_samples:
+            out[:, first:] = self.data[:, :num_samples - first]
+        return out
+
+    def read_new(self, max_samples: int = None) -> tuple[int, np.ndarray]:
+        """
+        Return the samples written since the previous call.
+
+        Args:
+            max_samples (int): Optional limit on the number of returned samples per channel.
+
+        Returns:
+            tuple[int, np.ndarray]: Index of the first returned sample and a (num_channels, n) copy.
+        """
+        with self.lock:
+            num_samples = self.write_index - self.read_index
+            if max_samples is not None:
+                num_samples = min(num_samples, max_samples)
+            start_index = self.read_index
+            out = self._copy_range(start_index, num_samples)
+            self.read_index += num_samples
+        return start_index, out
+
+    def latest(self, num_samples: int) -> tuple[int, np.ndarray]:
+        """
+        Return a copy of the most recent samples without moving the read position.
+
+        Args:
+            num_samples (int): Number of samples per channel (limited by capacity and samples written).
+
+        Returns:
+            tuple[int, np.ndarray]: Index of the first returned sample and a (num_channels, n) copy.
+        """
+        with self.lock:
+            num_samples = min(num_samples, self.capacity, self.write_index)
+            start_index = self.write_index - num_samples
+            return start_index, self._copy_range(start_index, num_samples)
@@ -0,0 +1,146 @@
+import os
+import queue
+import struct
+import threading
+import time
+import numpy as np
+
+
+class RowLogWriter:
+    """
+    Append-only log of float64 rows (e.g. a measurement time and one delay per channel), written by a background
+    thread.
+
+    append() only queues the rows; the writer thread collects everything that is queued, writes it as one buffered
+    block and flushes it to the OS, so the file can be read (read_row_log) while the run is still going. The file is
+    fsync'ed at most every `fsync_interval` seconds, which bounds how much is lost on a power failure without
+    syncing on every frame. Nothing is kept in memory once it is written.
+
+    File format: a HEADER_SIZE byte header (MAGIC, number of columns as uint32, length of the comma separated column
+    names as uint32, the names in UTF-8, zero padding), followed by the rows as little-endian float64. An optional
+    CSV mirror gets the same rows as text.
+    """
+
+    MAGIC = b"HSQROWS1"
+    HEADER_SIZE = 4096
+
+    def __init__(self, path: str, columns: list[str], csv_mirror: bool = False, fsync_interval: float = 5.0,
+                 max_pending: int = 1024):
+        """
+        Args:
+            path (str): Binary log file; an existing file is overwritten.
+            columns (list[str]): Column names.
+            csv_mirror (bool): Also write the rows to `path` with a .csv suffix.
+            fsync_interval (float): Seconds between fsync calls.
+            max_pending (int): Maximum number of queued append() calls; append() blocks when the disk falls behind.
+        """
+        self.path = path
+        self.columns = list(columns)
+        self.csv_path = os.path.splitext(path)[0] + ".csv" if csv_mirror else None
+        self.fsync_interval = fsync_interval
+        self.rows_written = 0
+        self.error = None
+
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._file = open(path, "wb")
+        self._file.write(self._header())
+        self._file.flush()
+        self._csv_file = None
+        if self.csv_path is not None:
+            self._csv_file = open(self.csv_path, "w")
+            self._csv_file.write("# " + ",".join(self.columns) + "\n")
+        self._thread = threading.Thread(target=self._run, name="RowLogWriter", daemon=True)
+        self._thread.start()
+
+    def _header(self) -> bytes:
+        names = ",".join(self.columns).encode("utf-8")
+        header = self.MAGIC + struct.pack("<II", len(self.columns), len(names)) + names
+        if len(header) > self.HEADER_SIZE:
+            raise ValueError("Column names do not fit into the log header")
+        return header.ljust(self.HEADER_SIZE, b"\0")
+
+    def append(self, rows: np.ndarray) -> None:
+        """Queue a (num_rows, num_columns) array or a single row."""
+        rows = np.array(rows, dtype="<f8", ndmin=2)  # copy, the caller may reuse its array
+        if rows.shape[1] != len(self.columns):
+            raise ValueError(f"Expected {len(self.columns)} columns, got {rows.shape[1]}")
+        self._queue.put(rows)
+
+    def flush(self) -> None:
+        """Block until everything appended so far has been written and flushed to the OS."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Write the remaining rows, fsync and close the files."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        last_sync = time.monotonic()
+        running = True
+        while running:
+            try:
+                batch = [self._queue.get(timeout=self.fsync_interval)]
+            except queue.Empty:
+                batch = []
+            # Take everything that queued up meanwhile, so a slow disk gets fewer, larger writes
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if any(rows is None for rows in batch):
+                running = False
+            blocks = [rows for rows in batch if rows is not None]
+
+            try:
+                if blocks and self.error is None:
+                    rows = np.concatenate(blocks)
+                    self._file.write(rows.tobytes())
+                    self._file.flush()
+                    if self._csv_file is not None:
+                        np.savetxt(self._csv_file, rows, delimiter=",")
+                        self._csv_file.flush()
+                    self.rows_written += len(rows)
+                now = time.monotonic()
+                if not running or now - last_sync >= self.fsync_interval:
+                    self._sync()
+                    last_sync = now
+            except Exception as e:
+                # Keep draining the queue so append() never blocks; the error is reported by the owner
+                self.error = e
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+        self._file.close()
+        if self._csv_file is not None:
+            self._csv_file.close()
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        if self._csv_file is not None:
+            os.fsync(self._csv_file.fileno())
+
+
+def read_row_log(path: str) -> tuple[list[str], np.ndarray]:
+    """
+    Read a RowLogWriter file, also while it is still being written.
+
+    :param path: Path to the binary log
+    :return: Tuple (column names, array of shape (num_rows, num_columns)); a partially written last row is ignored
+    """
+    with open(path, "rb") as file:
+        header = file.read(RowLogWriter.HEADER_SIZE)
+    if not header.startswith(RowLogWriter.MAGIC):
+        raise ValueError(f"{path} is not a row log")
+    num_columns, names_length = struct.unpack_from("<II", header, len(RowLogWriter.MAGIC))
+    names_start = len(RowLogWriter.MAGIC) + 8
+    columns = header[names_start:names_start + names_length].decode("utf-8").split(",")
+
+    num_rows = max(0, os.path.getsize(path) - RowLogWriter.HEADER_SIZE) // (8 * num_columns)
+    data = np.fromfile(path, dtype="<f8", count=num_rows * num_columns, offset=RowLogWriter.HEADER_SIZE)
+    return columns, data.reshape(num_rows, num_columns)
@@ -0,0 +1,355 @@
+import time
+from multiprocessing import shared_memory
+import numpy as np
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.common.ring_buffer import RingBuffer
+
+# Header of the shared memory block, int64 fields
+_MAGIC = 0x48535244_52494E47  # "HSRDRING"
+_HEADER_FIELDS = 8
+(_MAGIC_FIELD, _CHANNELS_FIELD, _CAPACITY_FIELD, _MAX_VIEW_FIELD, _DTYPE_FIELD, _WRITE_INDEX_FIELD,
+ _WRITE_PENDING_FIELD) = range(7)
+_HEADER_BYTES = _HEADER_FIELDS * 8
+
+
+def attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """
+    Open a shared memory block created by another process without taking over its cleanup.
+
+    From Python 3.13 on the block is not registered with the resource tracker. Before, it is registered again,
+    which is harmless for processes started by multiprocessing: they share the resource tracker of their parent,
+    which the creator unregisters the block from when it unlinks it.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedRingBuffer:
+    """
+    Single-producer / multi-consumer multi-channel ring buffer with zero-copy reads, optionally in shared memory.
+
+    Samples live in a (num_channels, capacity + max_view) array. Every sample gets a monotonically increasing index.
+    The shared state is two indices, so neither side takes a lock: before the producer copies samples it announces
+    the index after them (write_pending), which marks the samples one capacity earlier as being overwritten, and
+    once they are in place it publishes the index of the next sample (write_index). The first `max_view` samples of
+    the ring are mirrored behind its end, so any range of up to max_view samples is one contiguous numpy view, also
+    across the wrap-around.
+
+    Consumers read through RingReader objects (reader()), each with its own cursor, so acquisition, recording,
+    processing and display can run at their own pace. The producer never waits: a consumer that falls more than
+    `capacity` samples behind loses the oldest samples (counted per reader). Views are not copies, so a consumer
+    that holds a view should copy (or process) it and then check is_valid() to be sure the producer has not started
+    to overwrite it meanwhile.
+
+    With shared=True the buffer is placed in multiprocessing.shared_memory and other processes attach() to it by
+    name. The 64-bit indices are single aligned stores, which other processes see atomically.
+    """
+
+    def __init__(self, num_channels: int, capacity: int, dtype=np.int16, max_view: int | None = None,
+                 shared: bool = False, name: str | None = None, _shm: shared_memory.SharedMemory | None = None):
+        """
+        Args:
+            num_channels (int): Number of channels.
+            capacity (int): Number of samples per channel kept in the ring.
+            dtype: Sample type.
+            max_view (int | None): Longest contiguous view in samples (default: capacity // 4). Writes into the first
+                max_view samples of the ring are done twice, so keep it at the longest read you need.
+            shared (bool): Place the buffer in shared memory so that other processes can attach().
+            name (str | None): Name of the shared memory block (default: generated).
+        """
+        if num_channels < 1 or capacity < 1:
+            raise ValueError("Number of channels and capacity must be positive")
+        max_view = max_view if max_view is not None else max(1, capacity // 4)
+        if not 1 <= max_view <= capacity:
+            raise ValueError("max_view must be between 1 and the capacity")
+        self.num_channels = num_channels
+        self.capacity = capacity
+        self.max_view = max_view
+        self.dtype = np.dtype(dtype)
+
+        data_bytes = num_channels * (capacity + max_view) * self.dtype.itemsize
+        self._shm = _shm
+        if _shm is None and shared:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=_HEADER_BYTES + data_bytes)
+        if self._shm is not None:
+            self._header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=self._shm.buf)
+            self.storage = np.ndarray((num_channels, capacity + max_view), dtype=self.dtype, buffer=self._shm.buf,
+                                      offset=_HEADER_BYTES)
+        else:
+            self._header = np.zeros(_HEADER_FIELDS, dtype=np.int64)
+            self.storage = np.zeros((num_channels, capacity + max_view), dtype=self.dtype)
+
+        if _shm is None:
+            self._header[:] = 0
+            self._header[_CHANNELS_FIELD] = num_channels
+            self._header[_CAPACITY_FIELD] = capacity
+            self._header[_MAX_VIEW_FIELD] = max_view
+            self._header[_DTYPE_FIELD] = ord(self.dtype.char)
+            self._header[_MAGIC_FIELD] = _MAGIC
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedRingBuffer":
+        """Open a shared buffer created by another process (usually a consumer)."""
+        shm = attach_shared_memory(name)
+        header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        if header[_MAGIC_FIELD] != _MAGIC:
+            shm.close()
+            raise ValueError(f"Shared memory '{name}' does not hold a SharedRingBuffer")
+        return cls(int(header[_CHANNELS_FIELD]), int(header[_CAPACITY_FIELD]), np.dtype(chr(header[_DTYPE_FIELD])),
+                   int(header[_MAX_VIEW_FIELD]), _shm=shm)
+
+    @property
+    def name(self) -> str | None:
+        """Name for attach(), None if the buffer is not shared."""
+        return self._shm.name if self._shm is not None else None
+
+    @property
+    def write_index(self) -> int:
+        """Total number of samples written (index of the next sample)."""
+        return int(self._header[_WRITE_INDEX_FIELD])
+
+    @property
+    def write_pending(self) -> int:
+        """Index after the samples the producer is writing; equals write_index between writes."""
+        return int(self._header[_WRITE_PENDING_FIELD])
+
+    @property
+    def oldest_index(self) -> int:
+        """Index of the oldest sample in the ring that is not being overwritten."""
+        return max(0, self.write_pending - self.capacity)
+
+    def reset(self):
+        """Forget all samples; only while no reader is active."""
+        self._header[_WRITE_INDEX_FIELD] = 0
+        self._header[_WRITE_PENDING_FIELD] = 0
+
+    # Producer
+
+    def write(self, block: np.ndarray) -> None:
+        """
+        Append a (num_channels, n) block. Blocks longer than the capacity only keep their last samples.
+
+        Args:
+            block (np.ndarray): Samples to append, one row per channel.
+        """
+        num_new = block.shape[-1]
+        if num_new == 0:
+            return
+        write_index = self.write_index
+        # Announce the overwrite before the first sample is touched
+        self._header[_WRITE_PENDING_FIELD] = write_index + num_new
+        skipped = max(0, num_new - self.capacity)
+        position = write_index + skipped
+        block = block[:, skipped:]
+        while block.shape[-1] > 0:
+            start = position % self.capacity
+            count = min(block.shape[-1], self.capacity - start)
+            self._store(start, block[:, :count])
+            block = block[:, count:]
+            position += count
+        # Publish only after the samples are in place
+        self._header[_WRITE_INDEX_FIELD] = write_index + num_new
+
+    def _store(self, start: int, block: np.ndarray):
+        """Copy samples that do not wrap to ring position `start`, and into the mirror if they are part of it."""
+        count = block.shape[-1]
+        self.storage[:, start:start + count] = block
+        if start < self.max_view:
+            mirrored = min(count, self.max_view - start)
+            self.storage[:, self.capacity + start:self.capacity + start + mirrored] = block[:, :mirrored]
+
+    def writable(self, num_samples: int) -> np.ndarray:
+        """
+        Contiguous view the next `num_samples` samples can be written into directly (e.g. by a driver or a reader
+        that fills a buffer); call commit() afterwards to publish them. The samples they replace count as
+        overwritten from now on.
+        """
+        if num_samples > self.max_view:
+            raise ValueError(f"At most {self.max_view} samples can be written in place")
+        self._header[_WRITE_PENDING_FIELD] = self.write_index + num_samples
+        start = self.write_index % self.capacity
+        return self.storage[:, start:start + num_samples]
+
+    def commit(self, num_samples: int) -> None:
+        """Publish samples written into writable()."""
+        write_index = self.write_index
+        self._header[_WRITE_PENDING_FIELD] = max(self.write_pending, write_index + num_samples)
+        start = write_index % self.capacity
+        first = min(num_samples, self.capacity - start)
+        # Samples written behind the end of the ring belong to its start; update the ring and the mirror
+        if first < num_samples:
+            self.storage[:, :num_samples - first] = self.storage[:, self.capacity:self.capacity + num_samples - first]
+        if start < self.max_view:
+            mirrored = min(first, self.max_view - start)
+            self.storage[:, self.capacity + start:self.capacity + start + mirrored] = \
+                self.storage[:, start:start + mirrored]
+        self._header[_WRITE_INDEX_FIELD] = write_index + num_samples
+
+    # Consumers
+
+    def view(self, start_index: int, num_samples: int) -> np.ndarray:
+        """
+        Zero-copy (num_channels, num_samples) view of samples [start_index, start_index + num_samples).
+
+        Raises:
+            ValueError: If the range is not (or no longer) in the ring or longer than max_view.
+        """
+        if num_samples > self.max_view:
+            raise ValueError(f"Views are limited to {self.max_view} samples")
+        if start_index < self.oldest_index or start_index + num_samples > self.write_index:
+            raise ValueError(f"Samples {start_index}...{start_index + num_samples} are not in the ring "
+                             f"({self.oldest_index}...{self.write_index})")
+        start = start_index % self.capacity
+        return self.storage[:, start:start + num_samples]
+
+    def is_valid(self, start_index: int) -> bool:
+        """True if the samples from start_index on are not overwritten (yet), including a write in progress."""
+        return start_index >= self.oldest_index
+
+    def reader(self, start: str = "now") -> "RingReader":
+        """
+        New consumer cursor.
+
+        Args:
+            start (str): "now" to read only samples written from now on, "oldest" to start with the oldest sample
+                in the ring.
+        """
+        if start not in ("now", "oldest"):
+            raise ValueError("start must be 'now' or 'oldest'")
+        return RingReader(self, self.write_index if start == "now" else self.oldest_index)
+
+    def close(self):
+        """Release this process's mapping of the shared memory."""
+        if self._shm is not None:
+            # The views must be released before the mapping can be closed
+            self._header = self._header.copy()
+            self.storage = None
+            self._shm.close()
+
+    def unlink(self):
+        """Remove the shared memory block (by the creating process, after all others closed it)."""
+        if self._shm is not None:
+            self._shm.unlink()
+
+
+class RingReader:
+    """
+    Read cursor of one consumer of a SharedRingBuffer.
+
+    read() returns zero-copy views of consecutive, gapless ranges. If the producer laps the reader, the cursor jumps
+    to the oldest sample still in the ring and the skipped samples are counted in dropped_samples.
+    """
+
+    def __init__(self, ring: SharedRingBuffer, cursor: int):
+        self.ring = ring
+        self.cursor = cursor
+        self.dropped_samples = 0
+
+    def _catch_up(self) -> int:
+        write_index = self.ring.write_index
+        oldest = self.ring.write_pending - self.ring.capacity
+        if self.cursor < oldest:
+            self.dropped_samples += oldest - self.cursor
+            self.cursor = oldest
+        return write_index
+
+    def available(self) -> int:
+        """Number of samples written since the cursor (at most the capacity)."""
+        return self._catch_up() - self.cursor
+
+    def read(self, max_samples: int | None = None) -> tuple[int, np.ndarray]:
+        """
+        Return the samples written since the previous read, up to max_samples and max_view, and advance the cursor.
+
+        Returns:
+            tuple[int, np.ndarray]: Index of the first returned sample and a (num_channels, n) view.
+        """
+        while True:
+            num_samples = min(self._catch_up() - self.cursor, self.ring.max_view)
+            if max_samples is not None:
+                num_samples = min(num_samples, max_samples)
+            start_index = self.cursor
+            try:
+                view = self.ring.view(start_index, num_samples)
+            except ValueError:
+                # The producer lapped the cursor between catching up and taking the view
+                continue
+            self.cursor += num_samples
+            return start_index, view
+
+    def read_exactly(self, num_samples: int, timeout: float = 0.0, poll_interval: float = 0.001) \
+            -> tuple[int, np.ndarray] | None:
+        """Like read(), but only returns once `num_samples` samples are available; None after `timeout` seconds."""
+        deadline = time.perf_counter() + timeout
+        while self.available() < num_samples:
+            if time.perf_counter() >= deadline:
+                return None
+            time.sleep(poll_interval)
+        return self.read(num_samples)
+
+    def latest(self, num_samples: int) -> tuple[int, np.ndarray]:
+        """View of the newest samples (up to max_view) without moving the cursor, e.g. for a display."""
+        write_index = self.ring.write_index
+        num_samples = min(num_samples, self.ring.max_view, write_index)
+        return write_index - num_samples, self.ring.view(write_index - num_samples, num_samples)
+
+    def is_valid(self, start_index: int) -> bool:
+        """True if a view starting at start_index has not been (partly) overwritten; check after using the view."""
+        return self.ring.is_valid(start_index)
+
+
+def benchmark_shared_ring_buffer(num_channels: int = 8, chunk_samples: int = 10_000, frame_samples: int = 1_000_000,
+                                 num_frames: int = 50):
+    """
+    Stream int16 chunks through the locked RingBuffer (copying reads) and the SharedRingBuffer (zero-copy views,
+    two independent readers, shared memory) and report the time per frame.
+
+    :param num_channels: Number of channels
+    :param chunk_samples: Samples per channel per write, like one driver callback
+    :param frame_samples: Samples per channel per read
+    :param num_frames: Number of frames read per implementation
+    """
+    chunk = np.arange(num_channels * chunk_samples, dtype=np.int16).reshape(num_channels, chunk_samples)
+    chunks_per_frame = frame_samples // chunk_samples
+
+    locked = RingBuffer(num_channels, 4 * frame_samples)
+    start_time = time.perf_counter()
+    for _ in range(num_frames):
+        for _ in range(chunks_per_frame):
+            locked.write(chunk)
+        locked.read_new(frame_samples)
+    locked_time = (time.perf_counter() - start_time) / num_frames
+
+    ring = SharedRingBuffer(num_channels, 4 * frame_samples, max_view=frame_samples, shared=True)
+    try:
+        # A second process would use SharedRingBuffer.attach(ring.name); a second mapping behaves the same
+        attached = SharedRingBuffer.attach(ring.name)
+        frame_reader, display_reader = ring.reader(), attached.reader()
+        checksum = 0
+        start_time = time.perf_counter()
+        for _ in range(num_frames):
+            for _ in range(chunks_per_frame):
+                ring.write(chunk)
+            start_index, view = frame_reader.read(frame_samples)
+            checksum += int(view[0, -1])
+            display_reader.latest(1000)
+        shared_time = (time.perf_counter() - start_time) / num_frames
+        print(f"RingBuffer (locked, copy): {locked_time * 1000:8.2f} ms per frame")
+        print(f"SharedRingBuffer (views):  {shared_time * 1000:8.2f} ms per frame, "
+              f"display reader dropped {display_reader.dropped_samples} samples (reads only the latest)")
+        attached.close()
+    finally:
+        ring.close()
+        ring.unlink()
+
+
+if __name__ == "__main__":
+    benchmark_shared_ring_buffer()
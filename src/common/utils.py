@@ -1,3 +1,6 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from scipy import signal
 from typing import Union, overload
@@ -43,35 +46,50 @@ def generate_waves(sampling_freq, sampling_time, num_channels, wave_type='sine')
     :return: numpy array of shape (num_channels, num_samples)
     """
     num_samples = int(sampling_freq * sampling_time)
-    t = np.linspace(0, sampling_time, num_samples, endpoint=False)
-
-    # Create a meshgrid for vectorized operations
-    channel_indices = np.arange(num_channels)[:, np.newaxis]
-    t_mesh, channel_mesh = np.meshgrid(t, channel_indices)
-
-    # Calculate frequencies and amplitudes for each channel
-    frequencies = 1 + channel_mesh * 0.5
-    amplitudes = 1 + channel_mesh * 0.2
-    phases = channel_mesh * np.pi / 8
+    # Time along the samples, channel parameters as a column: broadcasting instead of full-size meshgrids
+    t = np.linspace(0, sampling_time, num_samples, endpoint=False)[np.newaxis, :]
+    amplitudes, frequencies, phases = channel_wave_parameters(num_channels)
 
     if wave_type == 'sine':
-        waves = amplitudes * np.sin(2 * np.pi * frequencies * t_mesh + phases)
+        waves = amplitudes * np.sin(2 * np.pi * frequencies * t + phases)
     elif wave_type == 'square':
-        waves = amplitudes * signal.square(2 * np.pi * frequencies * t_mesh + phases)
+        waves = amplitudes * signal.square(2 * np.pi * frequencies * t + phases)
     elif wave_type == 'sawtooth':
-        waves = amplitudes * signal.sawtooth(2 * np.pi * frequencies * t_mesh + phases)
+        waves = amplitudes * signal.sawtooth(2 * np.pi * frequencies * t + phases)
     elif wave_type == 'chirp':
         # For chirp, we'll use a different frequency range for each channel
-        f0 = 1 + channel_mesh  # Start frequency
-        f1 = 10 + channel_mesh * 2  # End frequency
-        waves = amplitudes * signal.chirp(t_mesh, f0, sampling_time, f1)
+        # Linear chirp as in signal.chirp, which only accepts scalar frequencies
+        f0, f1 = channel_chirp_frequencies(num_channels)
+        waves = amplitudes * np.cos(2 * np.pi * (f0 * t + (f1 - f0) / (2 * sampling_time) * t ** 2))
     else:
         raise ValueError("Invalid wave type. Choose 'sine', 'square', 'sawtooth', or 'chirp'.")
 
     return waves
 
 
-def generate_random_noise(sampling_freq, sampling_time, num_channels, scale=0.1):
+def channel_wave_parameters(num_channels):
+    """
+    Amplitude, frequency (Hz) and phase of the simulated wave of every channel.
+
+    :param num_channels: Number of channels
+    :return: Tuple (amplitudes, frequencies, phases), each of shape (num_channels, 1)
+    """
+    channel_indices = np.arange(num_channels)[:, np.newaxis]
+    return 1 + channel_indices * 0.2, 1 + channel_indices * 0.5, channel_indices * np.pi / 8
+
+
+def channel_chirp_frequencies(num_channels):
+    """
+    Start and end frequency (Hz) of the simulated chirp of every channel.
+
+    :param num_channels: Number of channels
+    :return: Tuple (f0, f1), each of shape (num_channels, 1)
+    """
+    channel_indices = np.arange(num_channels)[:, np.newaxis]
+    return 1 + channel_indices, 10 + channel_indices * 2
+
+
+def generate_random_noise(sampling_freq, sampling_time, num_channels, scale=0.1, seed=None, num_threads=None):
     """
     Generate random noise for multiple channels.
 
@@ -79,10 +97,96 @@ def generate_random_noise(sampling_freq, sampling_time, num_channels, scale=0.1)
     :param sampling_time: Total sampling time in seconds
     :param num_channels: Number of channels to generate
     :param scale: Scale of the noise (standard deviation)
-    :return: numpy array of shape (num_channels, num_samples)
+    :param seed: Seed; the same seed gives the same noise for any number of threads
+    :param num_threads: Number of threads (default: number of CPUs)
+    :return: float32 numpy array of shape (num_channels, num_samples)
     """
     num_samples = int(sampling_freq * sampling_time)
-    return np.random.normal(0, scale, (num_channels, num_samples))
+    with ParallelNoiseGenerator(num_channels, seed, num_threads=num_threads) as noise_generator:
+        return noise_generator.normal(num_samples, scale)
+
+
+class ParallelNoiseGenerator:
+    """
+    Gaussian noise for many channels, generated on several threads.
+
+    Every block of `channels_per_block` channels has its own np.random.Generator, seeded from one child of
+    SeedSequence(seed).spawn(). The blocks are filled in parallel by a thread pool (numpy releases the GIL while
+    filling), directly into a preallocated float32 array. Since the random stream belongs to the channel block and
+    not to the thread, the output for a given seed is the same for any number of threads, and consecutive calls
+    continue each channel's stream. Adding noise to existing data draws into a scratch buffer per thread, which is
+    reused by later calls.
+    """
+
+    def __init__(self, num_channels, seed=None, channels_per_block=1, num_threads=None):
+        """
+        :param num_channels: Number of channels
+        :param seed: Seed (int, SeedSequence or None for fresh entropy)
+        :param channels_per_block: Number of channels sharing one random stream
+        :param num_threads: Number of threads (default: number of CPUs)
+        """
+        self.num_channels = num_channels
+        self.blocks = [slice(start, min(start + channels_per_block, num_channels))
+                       for start in range(0, num_channels, channels_per_block)]
+        seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.generators = [np.random.default_rng(child) for child in seed_sequence.spawn(len(self.blocks))]
+        self.num_threads = num_threads or os.cpu_count() or 1
+        self._executor = None
+        self._thread_data = threading.local()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _scratch(self, shape):
+        """float32 array of the given shape, reused by later calls from the same thread."""
+        size = int(np.prod(shape))
+        buffer = getattr(self._thread_data, "scratch", None)
+        if buffer is None or buffer.size < size:
+            buffer = self._thread_data.scratch = np.empty(size, dtype=np.float32)
+        return buffer[:size].reshape(shape)
+
+    def fill(self, out, scale=1.0, add=False):
+        """
+        Fill (or add to) a float32 array of shape (num_channels, num_samples) with N(0, scale) noise.
+
+        :param out: Output array, C-contiguous float32
+        :param scale: Standard deviation
+        :param add: Add the noise to the existing content instead of overwriting it
+        :return: out
+        """
+        def fill_block(generator, block):
+            if add:
+                scratch = self._scratch(out[block].shape)
+                generator.standard_normal(out=scratch, dtype=np.float32)
+                np.multiply(scratch, np.float32(scale), out=scratch)
+                np.add(out[block], scratch, out=out[block])
+            else:
+                generator.standard_normal(out=out[block], dtype=np.float32)
+                out[block] *= np.float32(scale)
+
+        if self.num_threads == 1 or len(self.blocks) == 1:
+            for generator, block in zip(self.generators, self.blocks):
+                fill_block(generator, block)
+            return out
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.num_threads, thread_name_prefix="NoiseGenerator")
+        futures = [self._executor.submit(fill_block, generator, block)
+                   for generator, block in zip(self.generators, self.blocks)]
+        for future in futures:
+            future.result()
+        return out
+
+    def normal(self, num_samples, scale=1.0):
+        """Return a new (num_channels, num_samples) float32 array of N(0, scale) noise."""
+        return self.fill(np.empty((self.num_channels, num_samples), dtype=np.float32), scale)
 
 
 def generate_composite_signal(sampling_freq, sampling_time, num_channels, wave_type='sine', noise_scale=0.1):
@@ -101,6 +205,122 @@ def generate_composite_signal(sampling_freq, sampling_time, num_channels, wave_t
     return waves + noise
 
 
+class SignalChunkGenerator:
+    """
+    Endless multi-channel test signal, generated in fixed-size float32 chunks.
+
+    Produces the same waves as generate_composite_signal ('sine', 'square', 'sawtooth', 'chirp', or 'noise' for
+    noise only), but only one chunk at a time, so memory use does not depend on how long the simulation runs. The
+    phase of every channel is carried from one chunk to the next, so consecutive chunks join without jumps. The chirp
+    sweeps from f0 to f1 in `sweep_time` seconds and then starts again, phase-continuously.
+
+    Iterating yields new (num_channels, chunk_size) arrays; next_chunk(out=...) fills an existing array instead.
+    """
+
+    WAVE_TYPES = ('sine', 'square', 'sawtooth', 'chirp', 'noise')
+
+    def __init__(self, sampling_freq, num_channels, chunk_size, wave_type='sine', noise_scale=0.1, sweep_time=10.0,
+                 seed=None, num_threads=None):
+        """
+        :param sampling_freq: Sampling frequency in Hz
+        :param num_channels: Number of channels
+        :param chunk_size: Number of samples per channel and chunk
+        :param wave_type: 'sine', 'square', 'sawtooth', 'chirp' or 'noise'
+        :param noise_scale: Standard deviation of the added noise (0 for none)
+        :param sweep_time: Duration of one chirp sweep in seconds
+        :param seed: Seed of the noise generator
+        :param num_threads: Number of threads generating the noise (default: number of CPUs)
+        """
+        if wave_type not in self.WAVE_TYPES:
+            raise ValueError(f"Invalid wave type. Choose one of {', '.join(self.WAVE_TYPES)}.")
+        self.sampling_freq = sampling_freq
+        self.num_channels = num_channels
+        self.chunk_size = chunk_size
+        self.wave_type = wave_type
+        self.noise_scale = noise_scale
+        self.sweep_time = sweep_time
+        self.noise_generator = ParallelNoiseGenerator(num_channels, seed, num_threads=num_threads)
+        self.sample_index = 0
+
+        amplitudes, frequencies, phases = channel_wave_parameters(num_channels)
+        self.amplitudes = amplitudes.astype(np.float32)
+        # Phase advance per sample and the phase at the start of the next chunk, in radians
+        self.phase_step = 2 * np.pi * frequencies / sampling_freq
+        self.phase = phases.astype(np.float64)
+        self.sample_offsets = np.arange(chunk_size, dtype=np.float32)[np.newaxis, :]
+        self.f0, self.f1 = channel_chirp_frequencies(num_channels)
+
+    def __iter__(self):
+        while True:
+            yield self.next_chunk()
+
+    def close(self):
+        """Stop the noise threads."""
+        self.noise_generator.close()
+
+    @property
+    def time(self):
+        """Time of the first sample of the next chunk in seconds."""
+        return self.sample_index / self.sampling_freq
+
+    def time_axis(self):
+        """Time axis of the next chunk in seconds (float64)."""
+        return (self.sample_index + np.arange(self.chunk_size)) / self.sampling_freq
+
+    def next_chunk(self, out=None):
+        """
+        Generate the next chunk.
+
+        :param out: Optional float32 array of shape (num_channels, chunk_size) to fill
+        :return: The chunk
+        """
+        if out is None:
+            out = np.empty((self.num_channels, self.chunk_size), dtype=np.float32)
+
+        if self.wave_type == 'chirp':
+            self._chirp(out)
+        elif self.wave_type == 'noise':
+            out[...] = 0
+        else:
+            # Phase within this chunk; the float64 start phase is kept modulo 2 pi, so float32 stays accurate
+            np.multiply(self.phase_step.astype(np.float32), self.sample_offsets, out=out)
+            out += self.phase.astype(np.float32)
+            if self.wave_type == 'sine':
+                np.sin(out, out=out)
+            else:
+                np.mod(out, np.float32(2 * np.pi), out=out)
+                if self.wave_type == 'square':
+                    np.copyto(out, np.where(out < np.pi, np.float32(1), np.float32(-1)))
+                else:  # sawtooth
+                    out *= np.float32(1 / np.pi)
+                    out -= np.float32(1)
+            out *= self.amplitudes
+            self.phase = np.mod(self.phase + self.phase_step * self.chunk_size, 2 * np.pi)
+
+        if self.noise_scale > 0:
+            self.noise_generator.fill(out, self.noise_scale, add=True)
+        self.sample_index += self.chunk_size
+        return out
+
+    def _chirp(self, out):
+        """Linear chirp from f0 to f1 (like signal.chirp), restarted every sweep_time seconds."""
+        sweep_samples = max(1, int(round(self.sweep_time * self.sampling_freq)))
+        sweep_time = sweep_samples / self.sampling_freq
+        sweep, position = np.divmod(self.sample_index + np.arange(self.chunk_size), sweep_samples)
+        t = position / self.sampling_freq
+        # Phase reached at the end of one sweep, so that the next sweep continues from there
+        sweep_phase = np.mod(np.pi * sweep_time * (self.f0 + self.f1), 2 * np.pi)
+        start_phase = np.mod(sweep[0] * sweep_phase, 2 * np.pi)
+
+        # 2 pi (f0 t + (f1 - f0) / (2 T) t^2): the time terms are per sample, the frequencies per channel.
+        # Within a sweep the phase stays below a few thousand radians, so float32 is accurate enough.
+        np.multiply((2 * np.pi * self.f0).astype(np.float32), t.astype(np.float32), out=out)
+        out += (np.pi * (self.f1 - self.f0) / sweep_time).astype(np.float32) * (t ** 2).astype(np.float32)
+        out += (start_phase + (sweep - sweep[0]) * sweep_phase).astype(np.float32)
+        np.cos(out, out=out)
+        out *= self.amplitudes
+
+
 def calculate_rms(data):
     """Calculate the Root Mean Square (RMS) of the input data."""
     return np.sqrt(np.mean(np.square(data)))
@@ -0,0 +1,189 @@
+from abc import ABC, abstractmethod
+import numpy as np
+import pyqtgraph as pg
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.common.decimation import minmax_decimate, MinMaxPyramid
+
+
+def display_points(widget) -> int:
+    """Number of points needed to draw a curve on the widget without visible loss: 2 x its pixel width."""
+    return 2 * max(widget.width(), 100)
+
+
+class ChannelPlot(ABC):
+    """
+    Persistent multi-channel plot: the curves are created once and later only get new data.
+
+    Data is either set directly (set_data, min/max decimated to the widget width) or as a MinMaxPyramid
+    (set_pyramid), which is re-queried whenever the visible x range changes.
+    """
+
+    def __init__(self, widget, labels=None):
+        self.widget = widget
+        self.labels = labels
+        self.pyramid = None
+        self._updating = False
+
+    def label(self, channel: int) -> str:
+        return self.labels[channel] if self.labels and channel < len(self.labels) else f"Channel {channel}"
+
+    def set_data(self, x_data: np.ndarray, y_data) -> None:
+        """
+        Replace the data of all curves.
+
+        Args:
+            x_data (np.ndarray): The time axis data, or one time axis per channel.
+            y_data (list[np.ndarray] | np.ndarray): Data for each channel, shape (channels, samples).
+        """
+        self.pyramid = None
+        y_data = np.atleast_2d(np.asarray(y_data))
+        x_plot, y_plot = minmax_decimate(x_data, y_data, display_points(self.widget))
+        self.ensure_curves(y_plot.shape[0])
+        self.update_curves(x_plot, y_plot, rescale=True)
+
+    def set_pyramid(self, pyramid: MinMaxPyramid) -> None:
+        """Display a pyramid; zooming and panning only re-query the level that matches the visible range."""
+        self.pyramid = pyramid
+        self.ensure_curves(pyramid.num_channels)
+        # Start with the whole capture; the view keeps its range if the user zoomed in
+        x_plot, y_plot = pyramid.query(pyramid.t0, pyramid.t0 + pyramid.dt * pyramid.num_samples,
+                                       display_points(self.widget))
+        self._updating = True
+        try:
+            self.update_curves(x_plot, y_plot, rescale=True)
+        finally:
+            self._updating = False
+        self.update_view()
+
+    def update_view(self) -> None:
+        """Re-query the pyramid for the visible x range."""
+        if self.pyramid is None or self._updating:
+            return
+        self._updating = True
+        try:
+            x_plot, y_plot = self.pyramid.query(*self.visible_x_range(), display_points(self.widget))
+            self.update_curves(x_plot, y_plot, rescale=False)
+        finally:
+            self._updating = False
+
+    @abstractmethod
+    def ensure_curves(self, num_channels: int) -> None:
+        pass
+
+    @abstractmethod
+    def update_curves(self, x_plot: np.ndarray, y_plot: np.ndarray, rescale: bool) -> None:
+        pass
+
+    @abstractmethod
+    def visible_x_range(self) -> tuple[float, float]:
+        pass
+
+
+class PyqtgraphChannelPlot(ChannelPlot):
+    """ChannelPlot on a pyqtgraph PlotWidget; curves are updated with setData."""
+
+    def __init__(self, plot_widget: pg.PlotWidget, labels=None):
+        super().__init__(plot_widget, labels)
+        self.curves = []
+        plot_widget.sigXRangeChanged.connect(lambda *args: self.update_view())
+
+    def ensure_curves(self, num_channels: int) -> None:
+        if len(self.curves) == num_channels:
+            return
+        for curve in self.curves:
+            self.widget.removeItem(curve)
+        self.curves = [self.widget.plot(pen=pg.intColor(i), name=self.label(i)) for i in range(num_channels)]
+
+    def update_curves(self, x_plot: np.ndarray, y_plot: np.ndarray, rescale: bool) -> None:
+        # pyqtgraph rescales by itself while auto range is enabled
+        for i, curve in enumerate(self.curves):
+            curve.setData(x_plot[i], y_plot[i])
+
+    def visible_x_range(self) -> tuple[float, float]:
+        view_box = self.widget.getViewBox()
+        if view_box.autoRangeEnabled()[0] and self.pyramid is not None:
+            return self.pyramid.t0, self.pyramid.t0 + self.pyramid.dt * self.pyramid.num_samples
+        return tuple(view_box.viewRange()[0])
+
+
+class PyplotChannelPlot(ChannelPlot):
+    """
+    ChannelPlot on a matplotlib canvas using blitting.
+
+    The lines are animated artists: a full canvas.draw() only happens when the axis limits have to change (with 10 %
+    headroom, so growing data rarely triggers it) or the canvas is resized/zoomed. Otherwise the saved background is
+    restored and only the lines are redrawn.
+    """
+
+    def __init__(self, canvas, ax, labels=None):
+        super().__init__(canvas, labels)
+        self.ax = ax
+        self.lines = []
+        self.background = None
+        self._xlim_callback_id = None
+        canvas.mpl_connect("draw_event", self.on_draw)
+
+    def ensure_curves(self, num_channels: int) -> None:
+        if len(self.lines) == num_channels and all(line in self.ax.lines for line in self.lines):
+            return
+        for line in self.lines:
+            if line in self.ax.lines:
+                line.remove()
+        self.lines = [self.ax.plot([], [], label=self.label(i), animated=True)[0] for i in range(num_channels)]
+        self.ax.legend()
+        # Axes.clear() removes callbacks as well, so (re)connect whenever the lines are created
+        if self._xlim_callback_id is not None:
+            self.ax.callbacks.disconnect(self._xlim_callback_id)
+        self._xlim_callback_id = self.ax.callbacks.connect("xlim_changed", lambda changed_ax: self.update_view())
+        self.background = None
+
+    def on_draw(self, event):
+        # Save the background without the animated lines, then draw the lines on top
+        self.background = self.widget.copy_from_bbox(self.ax.bbox)
+        for line in self.lines:
+            self.ax.draw_artist(line)
+
+    def rescale(self, x_plot: np.ndarray, y_plot: np.ndarray) -> bool:
+        """Extend the axis limits if the data does not fit. Returns True if the limits changed."""
+        if x_plot.size == 0 or not np.isfinite(y_plot).any():
+            return False
+        changed = False
+        limits = [(self.ax.get_xlim(), np.nanmin(x_plot), np.nanmax(x_plot), self.ax.set_xlim,
+                   self.ax.get_autoscalex_on()),
+                  (self.ax.get_ylim(), np.nanmin(y_plot), np.nanmax(y_plot), self.ax.set_ylim,
+                   self.ax.get_autoscaley_on())]
+        for (low, high), data_min, data_max, set_limits, autoscale in limits:
+            # A limit set by zooming turns autoscaling off; keep the user's view in that case
+            if not autoscale:
+                continue
+            span = data_max - data_min
+            # Shrink only if the data uses less than half of the axis; constant data (span 0) only has to fit
+            if data_min < low or data_max > high or 0 < span < 0.5 * (high - low):
+                headroom = 0.1 * span or 0.5 * abs(data_max) or 1.0
+                new_limits = (data_min - headroom, data_max + headroom)
+                if new_limits != (low, high):
+                    set_limits(*new_limits, auto=None)
+                    changed = True
+        return changed
+
+    def update_curves(self, x_plot: np.ndarray, y_plot: np.ndarray, rescale: bool) -> None:
+        for i, line in enumerate(self.lines):
+            line.set_data(x_plot[i], y_plot[i])
+
+        if (rescale and self.rescale(x_plot, y_plot)) or self.background is None:
+            # Limits changed: full redraw, on_draw saves the new background
+            self.widget.draw()
+            return
+        self.widget.restore_region(self.background)
+        for line in self.lines:
+            self.ax.draw_artist(line)
+        self.widget.blit(self.ax.bbox)
+
+    def visible_x_range(self) -> tuple[float, float]:
+        return self.ax.get_xlim()
@@ -1,11 +1,22 @@
 import numpy as np
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                                QPushButton, QLineEdit, QLabel, QGridLayout,
-                               QTabWidget, QFileDialog, QSplitter)
+                               QTabWidget, QFileDialog, QSplitter, QComboBox)
 from PySide6.QtCore import Qt
 import pyqtgraph as pg
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.common.decimation import MinMaxPyramid
+from src.gui_tools.channel_plot import ChannelPlot, PyqtgraphChannelPlot, PyplotChannelPlot
+from src.gui_tools.render_scheduler import RenderScheduler
 
 
 def set_parameter_value(parameter_widget, value):
@@ -68,6 +79,11 @@ class DAQWindow(QMainWindow):
         main_layout.addLayout(top_layout)
         main_layout.addWidget(splitter)
 
+        # Persistent plots, keyed by the plot widget / canvas
+        self.channel_plots = {}
+        # Redraws plots at a limited rate, independent of how often data arrives
+        self.render_scheduler = RenderScheduler(max_fps=30, parent=self)
+
 
 
     def setup_parameter_list(self):
@@ -86,13 +102,14 @@ class DAQWindow(QMainWindow):
         # Implement this method in the subclass
         pass
 
-    def process_data(self, x_data: np.ndarray, y_data: list[np.ndarray]) -> None:
+    def process_data(self, x_data: np.ndarray, y_data: list[np.ndarray] | np.ndarray) -> None:
         """
         Method to process the acquired data and update the plots or internal variables.
 
         Args:
             x_data (np.ndarray): The time axis data.
-            y_data (list[np.ndarray]): List of voltage data for each channel.
+            y_data (list[np.ndarray] | np.ndarray): Voltage data for each channel, shape (channels, samples),
+                or (segments, channels, samples) for rapid block captures.
 
         Returns:
             None: This method updates the internal state and plot but does not return a value.
@@ -122,10 +139,31 @@ class DAQWindow(QMainWindow):
         self.parameter_layout.addWidget(line_edit, row, 1)
         return line_edit
 
+    def add_choice_parameter(self, name, options, default_value=None):
+        row = self.parameter_layout.rowCount()
+        self.parameter_layout.addWidget(QLabel(name), row, 0)
+        combo_box = QComboBox()
+        combo_box.addItems([str(option) for option in options])
+        if default_value is not None:
+            combo_box.setCurrentText(str(default_value))
+        self.parameter_layout.addWidget(combo_box, row, 1)
+        return combo_box
+
+    def add_output_field(self, name, default_value=""):
+        row = self.parameter_layout.rowCount()
+        self.parameter_layout.addWidget(QLabel(name), row, 0)
+        label = QLabel(str(default_value))
+        self.parameter_layout.addWidget(label, row, 1)
+        return label
+
     @staticmethod
     def get_string_parameter(parameter_widget):
         return parameter_widget.text()
 
+    @staticmethod
+    def get_choice_parameter(parameter_widget) -> str:
+        return parameter_widget.currentText()
+
     @staticmethod
     def get_int_parameter_value(parameter_widget) -> int:
         return int(parameter_widget.text())
@@ -145,12 +183,75 @@ class DAQWindow(QMainWindow):
     def add_pyplot_tab(self, name):
         figure, ax = plt.subplots()
         canvas = FigureCanvas(figure)
-        self.tab_widget.addTab(canvas, name)
+        # The toolbar provides zoom and pan
+        tab = QWidget()
+        tab_layout = QVBoxLayout(tab)
+        tab_layout.addWidget(NavigationToolbar(canvas, tab))
+        tab_layout.addWidget(canvas)
+        self.tab_widget.addTab(tab, name)
         return canvas, figure, ax
 
     def add_widget_tab(self, widget, name):
         self.tab_widget.addTab(widget, name)
 
+    def channel_plot(self, widget, ax=None, labels=None) -> ChannelPlot:
+        """
+        Persistent plot for a tab created by add_plot_tab (widget) or add_pyplot_tab (widget=canvas, ax).
+
+        The curves of a channel are created once and afterwards only their data is updated (pyqtgraph setData,
+        matplotlib set_data with blitting), instead of clearing and rebuilding the figure for every frame.
+        """
+        plot = self.channel_plots.get(widget)
+        if plot is None:
+            if ax is None:
+                plot = PyqtgraphChannelPlot(widget, labels)
+            else:
+                plot = PyplotChannelPlot(widget, ax, labels)
+            self.channel_plots[widget] = plot
+        elif labels is not None:
+            plot.labels = labels
+        return plot
+
+    def plot_pyplot_channels(self, canvas, ax, x_data, y_data, labels=None):
+        """
+        Plot one line per channel on a tab created by add_pyplot_tab, min/max decimated to the canvas width.
+
+        Args:
+            canvas (FigureCanvas): Canvas of the tab.
+            ax (matplotlib.axes.Axes): Axes of the tab.
+            x_data (np.ndarray): The time axis data, or one time axis per channel.
+            y_data (list[np.ndarray] | np.ndarray): Data for each channel, shape (channels, samples).
+            labels (list[str]): Optional legend entry for each channel.
+        """
+        self.channel_plot(canvas, ax, labels).set_data(x_data, y_data)
+
+    def plot_pyqtgraph_channels(self, plot_widget, x_data, y_data):
+        """
+        Plot one curve per channel on a tab created by add_plot_tab, min/max decimated to the widget width.
+
+        Args:
+            plot_widget (pg.PlotWidget): Plot widget of the tab.
+            x_data (np.ndarray): The time axis data.
+            y_data (list[np.ndarray] | np.ndarray): Data for each channel, shape (channels, samples).
+        """
+        self.channel_plot(plot_widget).set_data(x_data, y_data)
+
+    def show_pyramid_pyqtgraph(self, plot_widget, pyramid: MinMaxPyramid):
+        """
+        Display a MinMaxPyramid on a tab created by add_plot_tab.
+
+        Zooming and panning re-query the pyramid for the visible range, which costs the same for any capture length.
+        """
+        self.channel_plot(plot_widget).set_pyramid(pyramid)
+
+    def show_pyramid_pyplot(self, canvas, ax, pyramid: MinMaxPyramid, labels=None):
+        """
+        Display a MinMaxPyramid on a tab created by add_pyplot_tab.
+
+        Zooming and panning (toolbar) re-query the pyramid for the visible range.
+        """
+        self.channel_plot(canvas, ax, labels).set_pyramid(pyramid)
+
     def closeEvent(self, event):
         self.close_daq()
         event.accept()
@@ -0,0 +1,98 @@
+import time
+from collections import deque
+from PySide6.QtCore import QObject, QTimer
+
+
+class RenderScheduler(QObject):
+    """
+    Decouples the display rate from the acquisition rate.
+
+    Producers submit() new data for a named render target whenever it arrives; nothing is drawn at that point.
+    A timer running at `max_fps` calls the target's render callback with the newest submitted payload only:
+    payloads replaced before they were drawn count as skipped frames. Targets whose widget is not visible
+    (e.g. a QTabWidget tab that is not selected) are not rendered at all; their newest payload is drawn as soon as
+    they are shown again.
+    """
+
+    def __init__(self, max_fps: float = 30.0, parent=None):
+        super().__init__(parent)
+        self.targets = {}
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.render_pending)
+        self.max_fps = None
+        self.set_max_fps(max_fps)
+
+        # Statistics
+        self.submitted_frames = 0
+        self.rendered_frames = 0
+        self.skipped_frames = 0
+        self._render_times = deque()
+
+    def set_max_fps(self, max_fps: float):
+        if max_fps <= 0:
+            raise ValueError("Maximum frame rate must be positive")
+        self.max_fps = max_fps
+        self.timer.setInterval(max(1, int(1000 / max_fps)))
+
+    def add_target(self, name: str, render_callback, widget=None):
+        """
+        Register a render target.
+
+        Args:
+            name (str): Key used by submit().
+            render_callback (callable): Called with the newest payload when the target is rendered.
+            widget (QWidget): Optional widget that shows the target; not rendered while it is hidden.
+        """
+        self.targets[name] = {"render": render_callback, "widget": widget, "pending": False, "payload": None}
+
+    def submit(self, name: str, payload=None):
+        """Hand new data to a target. Replaces (and counts as skipped) a payload that was not rendered yet."""
+        target = self.targets[name]
+        if target["pending"]:
+            self.skipped_frames += 1
+        target["payload"] = payload
+        target["pending"] = True
+        self.submitted_frames += 1
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def render_pending(self):
+        rendered = False
+        waiting = False
+        for target in self.targets.values():
+            if not target["pending"]:
+                continue
+            widget = target["widget"]
+            if widget is not None and not widget.isVisible():
+                waiting = True
+                continue
+            payload = target["payload"]
+            target["pending"] = False
+            target["payload"] = None
+            target["render"](payload)
+            self.rendered_frames += 1
+            rendered = True
+
+        if rendered:
+            now = time.perf_counter()
+            self._render_times.append(now)
+            while self._render_times and now - self._render_times[0] > 1.0:
+                self._render_times.popleft()
+        # Keep ticking while frames arrive or hidden targets wait; idle after a tick without work
+        if not rendered and not waiting:
+            self.timer.stop()
+
+    @property
+    def fps(self) -> float:
+        """Display updates per second over the last second."""
+        now = time.perf_counter()
+        return float(sum(1 for render_time in self._render_times if now - render_time <= 1.0))
+
+    def status_text(self) -> str:
+        return f"{self.fps:.1f} FPS, skipped {self.skipped_frames}"
+
+    def reset_statistics(self):
+        self.submitted_frames = 0
+        self.rendered_frames = 0
+        self.skipped_frames = 0
+        self._render_times.clear()
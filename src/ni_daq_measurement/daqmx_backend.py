@@ -0,0 +1,30 @@
+import os
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.common.driver_backend import DriverBackend
+
+# Environment variable that selects the driver at startup: "nidaqmx" (default) or "fake"
+NI_BACKEND_ENV = "HSQTDAQ_NI_BACKEND"
+NI_BACKENDS = {
+    "nidaqmx": ("nidaqmx", "nidaqmx.stream_readers"),
+    "fake": ("src.ni_daq_measurement.fake_nidaqmx",),
+}
+
+# Task and the stream readers; the constants and DaqError are shared by both backends and come from nidaqmx
+daqmx = DriverBackend(NI_BACKENDS, os.environ.get(NI_BACKEND_ENV, "nidaqmx"))
+
+
+def select_ni_backend(name: str):
+    """Select the driver used by the NI sources, e.g. select_ni_backend("fake")."""
+    daqmx.select(name)
+
+
+def select_ni_backend_from_args(argv: list[str]):
+    """Use the fake driver if the command line contains --fake-ni."""
+    if "--fake-ni" in argv:
+        select_ni_backend("fake")
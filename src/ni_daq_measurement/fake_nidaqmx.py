@@ -0,0 +1,354 @@
+import itertools
+import re
+import threading
+import time
+import numpy as np
+from nidaqmx.constants import AcquisitionType, EveryNSamplesEventType, READ_ALL_AVAILABLE, TerminalConfiguration
+from nidaqmx.errors import DaqError
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.common.ring_buffer import RingBuffer
+from src.common.utils import SignalChunkGenerator
+
+# Limits of the simulated device (similar to a PCIe-6353)
+MAX_CHANNELS = 32
+MAX_AGGREGATE_RATE = 1.25e6
+
+# DAQmx error codes raised by the fake
+INVALID_PHYSICAL_CHANNEL = -200170
+INVALID_TIMING = -200077
+BUFFER_OVERWRITTEN = -200279
+READ_TIMEOUT = -200284
+TASK_NOT_RUNNING = -200473
+INVALID_ARRAY_SHAPE = -200229
+
+_task_handles = itertools.count(1)
+
+
+class FakeAIChannel:
+    """One voltage input channel; the ADC codes map to volts with ai_dev_scaling_coeff like on the device."""
+
+    def __init__(self, name: str, terminal_config, min_val: float, max_val: float):
+        self.name = name
+        self.ai_term_cfg = terminal_config
+        self.ai_min = min_val
+        self.ai_max = max_val
+        self.ai_dev_scaling_coeff = [0.0, max(abs(min_val), abs(max_val)) / 32767, 0.0, 0.0]
+
+
+class FakeAIChannelCollection:
+
+    def __init__(self, task: "Task"):
+        self._task = task
+        self._channels = []
+
+    def add_ai_voltage_chan(self, physical_channel: str, name_to_assign_to_channel: str = "",
+                            terminal_config=TerminalConfiguration.DEFAULT, min_val: float = -5.0,
+                            max_val: float = 5.0, **kwargs):
+        """Add "Dev1/ai0" or a range like "Dev1/ai0:3"; any device name is accepted."""
+        match = re.fullmatch(r"\s*([^/]+)/ai(\d+)(?::(\d+))?\s*", physical_channel)
+        if match is None:
+            raise DaqError(f"Invalid physical channel '{physical_channel}'", INVALID_PHYSICAL_CHANNEL,
+                           self._task.name)
+        first = int(match.group(2))
+        last = int(match.group(3)) if match.group(3) is not None else first
+        if last < first or last >= MAX_CHANNELS:
+            raise DaqError(f"Physical channel '{physical_channel}' does not exist, the device has "
+                           f"{MAX_CHANNELS} inputs", INVALID_PHYSICAL_CHANNEL, self._task.name)
+        for i in range(first, last + 1):
+            self._channels.append(FakeAIChannel(name_to_assign_to_channel or f"{match.group(1)}/ai{i}",
+                                                terminal_config, min_val, max_val))
+        return self._channels[-1]
+
+    def __iter__(self):
+        return iter(self._channels)
+
+    def __len__(self):
+        return len(self._channels)
+
+    def __getitem__(self, index):
+        return self._channels[index]
+
+
+class FakeTiming:
+
+    def __init__(self):
+        self.samp_clk_rate = None
+        self.samp_quant_samp_mode = AcquisitionType.FINITE
+        self.samp_quant_samp_per_chan = 1000
+
+    def cfg_samp_clk_timing(self, rate: float, source: str = "", active_edge=None,
+                            sample_mode=AcquisitionType.FINITE, samps_per_chan: int = 1000):
+        self.samp_clk_rate = float(rate)
+        self.samp_quant_samp_mode = sample_mode
+        self.samp_quant_samp_per_chan = int(samps_per_chan)
+
+
+class FakeInStream:
+
+    def __init__(self, task: "Task"):
+        self._task = task
+
+    @property
+    def avail_samp_per_chan(self) -> int:
+        return self._task._buffer.available() if self._task._buffer is not None else 0
+
+
+class Task:
+    """
+    Software stand-in for the parts of `nidaqmx.Task` used by the NI sources.
+
+    start() starts a device thread that acquires samples in real time at the configured sample clock into the
+    DAQmx input buffer (a RingBuffer of int16 ADC codes): `samps_per_chan` samples for a finite task, continuously
+    otherwise. The signal comes from SignalChunkGenerator (sine per channel plus noise), quantized to 16 bits in the
+    channel's range. is_task_done(), read() and the stream readers work on that buffer and, like DAQmx, raise
+    DaqError on read timeouts and when unread samples were overwritten. Every-N-samples callbacks are called from
+    a separate thread whenever another N samples are in the buffer.
+    """
+
+    def __init__(self, new_task_name: str = ""):
+        self._handle = next(_task_handles)
+        self.name = new_task_name or f"_unnamedTask<{self._handle}>"
+        self.ai_channels = FakeAIChannelCollection(self)
+        self.timing = FakeTiming()
+        self.in_stream = FakeInStream(self)
+
+        self._buffer = None
+        self._scale = None
+        self._samples_to_acquire = None
+        self._running = False
+        self._stop_event = threading.Event()
+        self._data_condition = threading.Condition()
+        self._device_thread = None
+        self._callback_thread = None
+        self._every_n_samples = None
+        self._every_n_callback = None
+        self._error = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def register_every_n_samples_acquired_into_buffer_event(self, sample_interval: int, callback_method):
+        """callback_method(task_handle, every_n_samples_event_type, number_of_samples, callback_data) -> int"""
+        self._every_n_samples = sample_interval if callback_method is not None else None
+        self._every_n_callback = callback_method
+
+    def start(self):
+        num_channels = len(self.ai_channels)
+        rate = self.timing.samp_clk_rate
+        if num_channels == 0:
+            raise DaqError("Task contains no channels", INVALID_PHYSICAL_CHANNEL, self.name)
+        if rate is None or rate <= 0 or rate * num_channels > MAX_AGGREGATE_RATE:
+            raise DaqError(f"Sample rate {rate} Hz on {num_channels} channels exceeds the maximum aggregate rate "
+                           f"of {MAX_AGGREGATE_RATE} S/s", INVALID_TIMING, self.name)
+
+        finite = self.timing.samp_quant_samp_mode == AcquisitionType.FINITE
+        buffer_samples = self.timing.samp_quant_samp_per_chan
+        if not finite:
+            # DAQmx enlarges small continuous buffers depending on the rate
+            buffer_samples = max(buffer_samples, 100_000 if rate > 1e6 else 10_000 if rate > 1e4 else 1000)
+        self._samples_to_acquire = self.timing.samp_quant_samp_per_chan if finite else None
+        self._buffer = RingBuffer(num_channels, buffer_samples, dtype=np.int16)
+        self._scale = np.array([channel.ai_dev_scaling_coeff[1] for channel in self.ai_channels])[:, np.newaxis]
+        self._error = None
+
+        self._stop_event.clear()
+        self._running = True
+        self._device_thread = threading.Thread(target=self._acquire, name=f"FakeDAQmx {self.name}", daemon=True)
+        self._device_thread.start()
+        if self._every_n_callback is not None:
+            self._callback_thread = threading.Thread(target=self._run_callbacks, name=f"FakeDAQmx {self.name} events",
+                                                     daemon=True)
+            self._callback_thread.start()
+
+    def _acquire(self):
+        """Device thread: deliver chunks of samples when the sample clock has produced them."""
+        rate = self.timing.samp_clk_rate
+        chunk_size = max(1, int(rate * 0.005))
+        if self._every_n_samples is not None:
+            chunk_size = min(chunk_size, self._every_n_samples)
+        generator = SignalChunkGenerator(rate, len(self.ai_channels), chunk_size, 'sine', noise_scale=0.05,
+                                         num_threads=1)
+        full_scale = np.array([max(abs(channel.ai_min), abs(channel.ai_max)) for channel in self.ai_channels])
+        codes = np.empty((len(self.ai_channels), chunk_size), dtype=np.int16)
+        start_time = time.perf_counter()
+        acquired = 0
+        try:
+            while not self._stop_event.is_set():
+                if self._samples_to_acquire is not None and acquired >= self._samples_to_acquire:
+                    break
+                volts = generator.next_chunk()
+                np.clip(np.rint(volts * (32767 / full_scale)[:, np.newaxis]), -32768, 32767, out=codes,
+                        casting="unsafe")
+                count = chunk_size
+                if self._samples_to_acquire is not None:
+                    count = min(count, self._samples_to_acquire - acquired)
+                acquired += count
+
+                delay = start_time + acquired / rate - time.perf_counter()
+                if delay > 0 and self._stop_event.wait(delay):
+                    break
+                with self._data_condition:
+                    self._buffer.write(codes[:, :count])
+                    self._data_condition.notify_all()
+        except Exception as e:
+            self._error = e
+        finally:
+            generator.close()
+            with self._data_condition:
+                self._running = False
+                self._data_condition.notify_all()
+
+    def _run_callbacks(self):
+        """Event thread: one callback for every N samples acquired into the buffer."""
+        every_n = self._every_n_samples
+        next_event = every_n
+        while not self._stop_event.is_set():
+            with self._data_condition:
+                self._data_condition.wait_for(lambda: self._buffer.write_index >= next_event or not self._running
+                                              or self._stop_event.is_set())
+                if self._buffer.write_index < next_event:
+                    if not self._running:
+                        return
+                    continue
+            self._every_n_callback(self._handle, EveryNSamplesEventType.ACQUIRED_INTO_BUFFER.value, every_n, None)
+            next_event += every_n
+
+    def is_task_done(self) -> bool:
+        if self._error is not None:
+            raise self._error
+        return self._buffer is not None and not self._running
+
+    def _read_codes(self, number_of_samples_per_channel: int, timeout: float) -> np.ndarray:
+        """Wait for and take the next samples from the buffer as (channels, n) int16 ADC codes."""
+        if self._buffer is None:
+            raise DaqError("Task is not running", TASK_NOT_RUNNING, self.name)
+        if self._error is not None:
+            raise self._error
+
+        finite = self._samples_to_acquire is not None
+        if number_of_samples_per_channel == READ_ALL_AVAILABLE:
+            # Finite tasks read the whole acquisition, continuous tasks what is in the buffer now
+            number = self._samples_to_acquire - self._buffer.read_index if finite else None
+        else:
+            number = number_of_samples_per_channel
+
+        if number is not None:
+            # A negative timeout waits forever, like nidaqmx.constants.WAIT_INFINITELY
+            with self._data_condition:
+                self._data_condition.wait_for(lambda: self._buffer.available() >= number or not self._running,
+                                              None if timeout < 0 else timeout)
+                if self._buffer.available() < number:
+                    raise DaqError(f"Timeout: {number} samples requested, {self._buffer.available()} available",
+                                   READ_TIMEOUT, self.name)
+
+        if self._buffer.dropped_samples:
+            raise DaqError(f"The application is not able to keep up with the hardware acquisition: "
+                           f"{self._buffer.dropped_samples} samples were overwritten before they were read",
+                           BUFFER_OVERWRITTEN, self.name)
+        return self._buffer.read_new(number)[1]
+
+    def read(self, number_of_samples_per_channel: int = READ_ALL_AVAILABLE, timeout: float = 10.0):
+        """Read volts as lists, like nidaqmx: a list per channel, or a plain list for a single channel."""
+        volts = self._read_codes(number_of_samples_per_channel, timeout) * self._scale
+        return volts[0].tolist() if volts.shape[0] == 1 else volts.tolist()
+
+    def stop(self):
+        self._stop_event.set()
+        for thread in (self._device_thread, self._callback_thread):
+            if thread is not None and thread is not threading.current_thread():
+                thread.join()
+        self._device_thread = None
+        self._callback_thread = None
+        self._running = False
+
+    def close(self):
+        self.stop()
+        self._buffer = None
+
+
+class _FakeReader:
+
+    def __init__(self, task_in_stream: FakeInStream):
+        self._task = task_in_stream._task
+
+    def _read_into(self, data: np.ndarray, number_of_samples_per_channel: int, timeout: float) -> np.ndarray:
+        if number_of_samples_per_channel == READ_ALL_AVAILABLE:
+            number_of_samples_per_channel = data.shape[1]
+        if data.ndim != 2 or data.shape[0] != len(self._task.ai_channels) or \
+                data.shape[1] < number_of_samples_per_channel:
+            raise DaqError(f"Array of shape {data.shape} does not fit {len(self._task.ai_channels)} channels x "
+                           f"{number_of_samples_per_channel} samples", INVALID_ARRAY_SHAPE, self._task.name)
+        return self._task._read_codes(number_of_samples_per_channel, timeout)
+
+
+class AnalogMultiChannelReader(_FakeReader):
+    """Reads volts (float64) into a preallocated (channels, samples) array."""
+
+    def read_many_sample(self, data: np.ndarray, number_of_samples_per_channel: int = READ_ALL_AVAILABLE,
+                         timeout: float = 10.0) -> int:
+        codes = self._read_into(data, number_of_samples_per_channel, timeout)
+        np.multiply(codes, self._task._scale, out=data[:, :codes.shape[1]])
+        return codes.shape[1]
+
+
+class AnalogUnscaledReader(_FakeReader):
+    """Reads the raw int16 ADC codes into a preallocated (channels, samples) array."""
+
+    def read_int16(self, data: np.ndarray, number_of_samples_per_channel: int = READ_ALL_AVAILABLE,
+                   timeout: float = 10.0) -> int:
+        codes = self._read_into(data, number_of_samples_per_channel, timeout)
+        data[:, :codes.shape[1]] = codes
+        return codes.shape[1]
+
+
+def benchmark_fake_nidaqmx(num_channels: int = 16, sampling_freq: float = 10_000, sampling_time: float = 0.1,
+                           duration: float = 3.0):
+    """
+    Run the finite and continuous NI sources against the fake driver and report cycle rate and read time.
+
+    :param num_channels: Number of channels
+    :param sampling_freq: Sampling frequency in Hz
+    :param sampling_time: Length of one frame in seconds
+    :param duration: Run time per acquisition mode in seconds
+    """
+    from src.ni_daq_measurement.daqmx_backend import select_ni_backend
+    from src.ni_daq_measurement.ni_source import NiFiniteSource, NiContinuousSource
+
+    select_ni_backend("fake")
+    source_args = ("Dev1", num_channels, sampling_freq, sampling_time, 10.0)
+    sources = {
+        "finite": lambda: NiFiniteSource(*source_args),
+        "continuous": lambda: NiContinuousSource(*source_args),
+        "continuous (int16)": lambda: NiContinuousSource(*source_args, raw_int16=True),
+    }
+    for name, create_source in sources.items():
+        source = create_source()
+        source.open()
+        frames = 0
+        read_time = 0.0
+        start_time = time.perf_counter()
+        try:
+            while time.perf_counter() - start_time < duration:
+                read_start = time.perf_counter()
+                frame = source.read_frame()
+                if frame is not None:
+                    frames += 1
+                    read_time += time.perf_counter() - read_start
+        finally:
+            source.close()
+        elapsed = time.perf_counter() - start_time
+        print(f"{name:>18}: {frames / elapsed:8.2f} frames/s, {read_time / max(frames, 1) * 1000:8.3f} ms per frame, "
+              f"dropped samples: {getattr(source, 'dropped_samples', 0)}")
+
+
+if __name__ == "__main__":
+    benchmark_fake_nidaqmx()
@@ -1,12 +1,22 @@
 import sys
 import time
 import numpy as np
-from PySide6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QPushButton, QLineEdit, QLabel
+from PySide6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QPushButton, QLineEdit, \
+    QLabel, QComboBox
 from PySide6.QtCore import QTimer, Signal, Slot
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
-import nidaqmx
-from nidaqmx.constants import TerminalConfiguration, AcquisitionType
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.common.acquisition import AcquisitionWorker, FrameQueue
+from src.gui_tools.channel_plot import PyplotChannelPlot
+from src.gui_tools.render_scheduler import RenderScheduler
+from src.ni_daq_measurement.daqmx_backend import select_ni_backend_from_args
+from src.ni_daq_measurement.ni_source import NiFiniteSource, NiContinuousSource
 
 class DAQMeasurement(QMainWindow):
     data_ready = Signal(np.ndarray)
@@ -19,13 +29,15 @@ class DAQMeasurement(QMainWindow):
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
         self.layout = QVBoxLayout(self.central_widget)
+        self.render_scheduler = RenderScheduler(max_fps=20, parent=self)
 
         self.create_input_fields()
         self.create_buttons()
         self.create_plot()
         self.create_output_fields()
 
-        self.task = None
+        self.worker = None
+        self.frame_queue = None
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.check_acquisition_status)
 
@@ -44,6 +56,8 @@ class DAQMeasurement(QMainWindow):
         self.sampling_time_input = QLineEdit("1")
         self.num_channels_input = QLineEdit("1")
         self.voltage_range_input = QLineEdit("10")
+        self.acquisition_mode_input = QComboBox()
+        self.acquisition_mode_input.addItems(['finite', 'continuous', 'continuous (int16)'])
 
         input_layout.addWidget(QLabel("Device Name:"))
         input_layout.addWidget(self.device_name_input)
@@ -55,6 +69,8 @@ class DAQMeasurement(QMainWindow):
         input_layout.addWidget(self.num_channels_input)
         input_layout.addWidget(QLabel("Voltage Range (V):"))
         input_layout.addWidget(self.voltage_range_input)
+        input_layout.addWidget(QLabel("Acquisition Mode:"))
+        input_layout.addWidget(self.acquisition_mode_input)
 
         self.layout.addLayout(input_layout)
 
@@ -78,86 +94,79 @@ class DAQMeasurement(QMainWindow):
         self.figure = Figure(figsize=(5, 4), dpi=100)
         self.canvas = FigureCanvas(self.figure)
         self.ax = self.figure.add_subplot(111)
+        self.ax.set_xlabel("Time (s)")
+        self.ax.set_ylabel("Voltage (V)")
         self.layout.addWidget(self.canvas)
+        # Lines are created once and only get new data (with blitting) for every frame
+        self.channel_plot = PyplotChannelPlot(self.canvas, self.ax, labels=[f"Channel {i+1}" for i in range(16)])
+        self.render_scheduler.add_target("waveforms", lambda payload: self.channel_plot.set_data(*payload),
+                                         self.canvas)
 
     def create_output_fields(self):
         output_layout = QHBoxLayout()
         self.cycle_rate_label = QLabel("Average Cycle Rate: 0 Hz")
         self.processing_time_label = QLabel("Average Processing Time: 0 ms")
+        self.queue_status_label = QLabel("Queue Depth: 0, Dropped Frames: 0")
+        self.display_status_label = QLabel("Display: 0.0 FPS, skipped 0")
 
         output_layout.addWidget(self.cycle_rate_label)
         output_layout.addWidget(self.processing_time_label)
+        output_layout.addWidget(self.queue_status_label)
+        output_layout.addWidget(self.display_status_label)
 
         self.layout.addLayout(output_layout)
 
     def start_measurement(self):
         if not self.is_running:
+            try:
+                source_args = (self.device_name_input.text(),
+                               int(self.num_channels_input.text()),
+                               float(self.sampling_freq_input.text()),
+                               float(self.sampling_time_input.text()),
+                               float(self.voltage_range_input.text()))
+                acquisition_mode = self.acquisition_mode_input.currentText()
+                if acquisition_mode == 'finite':
+                    source = NiFiniteSource(*source_args)
+                else:
+                    source = NiContinuousSource(*source_args, raw_int16=acquisition_mode == 'continuous (int16)')
+            except Exception as e:
+                print(f"Error starting measurement: {e}")
+                return
+
             self.is_running = True
             self.start_time = time.time()
             self.cycle_count = 0
             self.total_processing_time = 0
-            self.start_acquisition_cycle()
-
-    def start_acquisition_cycle(self):
-        try:
-            device_name = self.device_name_input.text()
-            sampling_freq = float(self.sampling_freq_input.text())
-            sampling_time = float(self.sampling_time_input.text())
-            num_channels = int(self.num_channels_input.text())
-            voltage_range = float(self.voltage_range_input.text())
-
-            if num_channels < 1 or num_channels > 16:
-                raise ValueError("Number of channels must be between 1 and 16")
-
-            self.task = nidaqmx.Task()
-            for i in range(num_channels):
-                self.task.ai_channels.add_ai_voltage_chan(f"{device_name}/ai{i}",
-                                                          terminal_config=TerminalConfiguration.RSE,
-                                                          min_val=-voltage_range, max_val=voltage_range)
-
-            samples_per_channel = int(sampling_freq * sampling_time)
-            self.task.timing.cfg_samp_clk_timing(sampling_freq, sample_mode=AcquisitionType.FINITE,
-                                                 samps_per_chan=samples_per_channel)
 
-            self.all_data = np.zeros((num_channels, samples_per_channel))
-
-            self.task.start()
-            self.timer.start(50)  # Check acquisition status every 50 ms
-
-        except Exception as e:
-            print(f"Error starting measurement: {e}")
-            self.is_running = False
+            # The worker owns the DAQmx task; the GUI only takes the newest frame at display rate
+            self.frame_queue = FrameQueue(max_size=4)
+            self.worker = AcquisitionWorker(source, self.frame_queue, name="NiDaqAcquisition")
+            self.worker.start()
+            # Frames are processed as they arrive; the render scheduler redraws at up to 20 Hz
+            self.render_scheduler.reset_statistics()
+            self.timer.start(10)
 
     def stop_measurement(self):
         self.is_running = False
-        if self.task:
-            self.task.stop()
-            self.task.close()
-            self.task = None
+        if self.worker is not None:
+            self.worker.stop()
+            self.worker = None
         self.timer.stop()
 
     def check_acquisition_status(self):
-        if self.task and self.task.is_task_done():
-            self.timer.stop()
-            self.read_and_process_data()
-
-    def read_and_process_data(self):
-        try:
-            data = self.task.read(number_of_samples_per_channel=nidaqmx.constants.READ_ALL_AVAILABLE)
-            self.task.stop()
-            self.task.close()
-            self.task = None
-
-            if data and len(data) > 0:
-                data_array = np.array(data)
-                if data_array.size > 0:
-                    self.data_ready.emit(data_array)
-            else:
-                print("No data available")
-
-        except nidaqmx.errors.DaqError as e:
-            print(f"Error reading data: {e}")
+        if self.worker is None:
+            return
+        if self.worker.error is not None:
+            print(f"Error reading data: {self.worker.error}")
             self.stop_measurement()
+            return
+
+        self.queue_status_label.setText(f"Queue Depth: {self.frame_queue.depth}, "
+                                        f"Dropped Frames: {self.frame_queue.dropped_frames}")
+        self.display_status_label.setText(f"Display: {self.render_scheduler.status_text()}")
+        frame = self.frame_queue.get_latest()
+        if frame is not None:
+            self.data_ready.emit(frame.data)
 
     @Slot(np.ndarray)
     def process_data(self, data):
@@ -173,16 +182,8 @@ class DAQMeasurement(QMainWindow):
         num_channels, samples_per_channel = data.shape
         self.all_data = data
 
-        self.ax.clear()
         time_array = np.linspace(0, samples_per_channel / float(self.sampling_freq_input.text()), samples_per_channel)
-
-        for i in range(num_channels):
-            self.ax.plot(time_array, self.all_data[i], label=f"Channel {i+1}")
-
-        self.ax.set_xlabel("Time (s)")
-        self.ax.set_ylabel("Voltage (V)")
-        self.ax.legend()
-        self.canvas.draw()
+        self.render_scheduler.submit("waveforms", (time_array, self.all_data))
 
         processing_time = (time.time() - start_time) * 1000  # Convert to ms
         self.total_processing_time += processing_time
@@ -195,10 +196,12 @@ class DAQMeasurement(QMainWindow):
         self.cycle_rate_label.setText(f"Average Cycle Rate: {avg_cycle_rate:.2f} Hz")
         self.processing_time_label.setText(f"Average Processing Time: {avg_processing_time:.2f} ms")
 
-        if self.is_running:
-            self.start_acquisition_cycle()
+    def closeEvent(self, event):
+        self.stop_measurement()
+        event.accept()
 
 if __name__ == "__main__":
+    select_ni_backend_from_args(sys.argv)
     app = QApplication(sys.argv)
     window = DAQMeasurement()
     window.show()
@@ -0,0 +1,178 @@
+import threading
+import time
+import numpy as np
+import nidaqmx
+from nidaqmx.constants import TerminalConfiguration, AcquisitionType
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.common.acquisition import Frame
+from src.common.adc_conversion import AdcConverter
+from src.common.shared_ring_buffer import SharedRingBuffer
+from src.ni_daq_measurement.daqmx_backend import daqmx
+
+
+class NiFiniteSource:
+    """
+    NI-DAQmx finite acquisition: one task per frame, as in the original measurement cycle.
+
+    Used by an AcquisitionWorker, so the task is created, polled and read outside of the GUI thread.
+    """
+
+    def __init__(self, device_name: str, num_channels: int, sampling_freq: float, sampling_time: float,
+                 voltage_range: float):
+        if num_channels < 1 or num_channels > 16:
+            raise ValueError("Number of channels must be between 1 and 16")
+        self.device_name = device_name
+        self.num_channels = num_channels
+        self.sampling_freq = sampling_freq
+        self.sampling_time = sampling_time
+        self.voltage_range = voltage_range
+        self.samples_per_channel = int(sampling_freq * sampling_time)
+        self.time_axis = np.linspace(0, self.samples_per_channel / sampling_freq, self.samples_per_channel)
+        self.task = None
+        self.sequence = 0
+
+    def open(self):
+        pass
+
+    def start_task(self):
+        self.task = daqmx.Task()
+        for i in range(self.num_channels):
+            self.task.ai_channels.add_ai_voltage_chan(f"{self.device_name}/ai{i}",
+                                                      terminal_config=TerminalConfiguration.RSE,
+                                                      min_val=-self.voltage_range, max_val=self.voltage_range)
+        self.task.timing.cfg_samp_clk_timing(self.sampling_freq, sample_mode=AcquisitionType.FINITE,
+                                             samps_per_chan=self.samples_per_channel)
+        self.task.start()
+
+    def close_task(self):
+        if self.task is not None:
+            self.task.stop()
+            self.task.close()
+            self.task = None
+
+    def read_frame(self) -> Frame | None:
+        if self.task is None:
+            self.start_task()
+        if not self.task.is_task_done():
+            time.sleep(0.005)
+            return None
+
+        data = self.task.read(number_of_samples_per_channel=nidaqmx.constants.READ_ALL_AVAILABLE)
+        self.close_task()
+
+        data_array = np.array(data)
+        if data_array.size == 0:
+            print("No data available")
+            return None
+        if data_array.ndim == 1:
+            data_array = data_array.reshape(1, -1)
+        self.sequence += 1
+        return Frame(self.time_axis[:data_array.shape[1]], data_array, self.sequence)
+
+    def close(self):
+        self.close_task()
+
+
+class NiContinuousSource(NiFiniteSource):
+    """
+    NI-DAQmx continuous acquisition with one long-lived task.
+
+    DAQmx calls an every-N-samples callback (on its own thread) that reads the new samples with a stream reader
+    into a reused numpy buffer and appends them to a SharedRingBuffer. read_frame() returns consecutive, gapless
+    frames of `sampling_time` seconds read through its own ring reader; further consumers can add readers.
+
+    With raw_int16=True the unscaled ADC codes are read (half the memory traffic of float64) and converted to
+    float32 volts with a lookup table of the device scaling polynomials when a frame is taken.
+    """
+
+    def __init__(self, *args, callback_interval: float = 0.05, raw_int16: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.raw_int16 = raw_int16
+        self.samples_per_callback = max(1, int(self.sampling_freq * callback_interval))
+        self.reader = None
+        self.read_buffer = None
+        self.ring = None
+        self.ring_reader = None
+        self.converter = None
+        self.error = None
+        # Samples of frames discarded because the callback overwrote them while they were copied
+        self.torn_samples = 0
+        self._data_event = threading.Event()
+
+    def open(self):
+        self.task = daqmx.Task()
+        for i in range(self.num_channels):
+            self.task.ai_channels.add_ai_voltage_chan(f"{self.device_name}/ai{i}",
+                                                      terminal_config=TerminalConfiguration.RSE,
+                                                      min_val=-self.voltage_range, max_val=self.voltage_range)
+        # In continuous mode samps_per_chan sets the size of the DAQmx input buffer
+        self.task.timing.cfg_samp_clk_timing(self.sampling_freq, sample_mode=AcquisitionType.CONTINUOUS,
+                                             samps_per_chan=20 * self.samples_per_callback)
+
+        dtype = np.int16 if self.raw_int16 else np.float64
+        if self.raw_int16:
+            self.reader = daqmx.AnalogUnscaledReader(self.task.in_stream)
+            # The device scaling polynomials are evaluated once for all 65536 codes
+            self.converter = AdcConverter.from_polynomials(
+                [np.array(channel.ai_dev_scaling_coeff) for channel in self.task.ai_channels])
+        else:
+            self.reader = daqmx.AnalogMultiChannelReader(self.task.in_stream)
+        self.read_buffer = np.zeros((self.num_channels, self.samples_per_callback), dtype=dtype)
+        self.ring = SharedRingBuffer(self.num_channels,
+                                     max(4 * self.samples_per_channel, 2 * self.samples_per_callback),
+                                     dtype=dtype, max_view=self.samples_per_channel)
+        self.ring_reader = self.ring.reader()
+
+        self.task.register_every_n_samples_acquired_into_buffer_event(self.samples_per_callback,
+                                                                      self.samples_acquired_callback)
+        self.task.start()
+
+    def samples_acquired_callback(self, task_handle, every_n_samples_event_type, number_of_samples, callback_data):
+        try:
+            if self.raw_int16:
+                self.reader.read_int16(self.read_buffer, number_of_samples_per_channel=self.samples_per_callback,
+                                       timeout=0)
+            else:
+                self.reader.read_many_sample(self.read_buffer, number_of_samples_per_channel=self.samples_per_callback,
+                                             timeout=0)
+            self.ring.write(self.read_buffer)
+            self._data_event.set()
+        except nidaqmx.errors.DaqError as e:
+            self.error = e
+            self._data_event.set()
+        return 0
+
+    def scale(self, raw: np.ndarray) -> np.ndarray:
+        if not self.raw_int16:
+            return raw
+        return self.converter.convert(raw)
+
+    def read_frame(self) -> Frame | None:
+        if self.error is not None:
+            raise self.error
+        self._data_event.clear()
+        if self.ring_reader.available() < self.samples_per_channel:
+            self._data_event.wait(0.05)
+            return None
+
+        start_index, view = self.ring_reader.read(self.samples_per_channel)
+        # The conversion of int16 codes already makes a new array; float64 samples are copied out of the ring
+        data = self.scale(view) if self.raw_int16 else view.copy()
+        if not self.ring_reader.is_valid(start_index):
+            self.torn_samples += data.shape[1]
+            return None
+        time_axis = (start_index + np.arange(data.shape[1])) / self.sampling_freq
+        self.sequence += 1
+        return Frame(time_axis, data, self.sequence)
+
+    @property
+    def dropped_samples(self) -> int:
+        if self.ring_reader is None:
+            return 0
+        return self.ring_reader.dropped_samples + self.torn_samples
@@ -0,0 +1,55 @@
+import ctypes
+import numpy as np
+from picosdk.functions import assert_pico_ok
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.picoscope_measurement.ps_backend import ps
+
+
+class PicoBufferPool:
+    """
+    Preallocated capture buffers for block mode, one set per memory segment.
+
+    Each set is a (num_channels, num_samples) int16 array whose rows are registered with ps4000aSetDataBuffer for
+    "its" memory segment once per opened device. Captures then alternate between the segments: while frame N is
+    converted and processed from one set, frame N+1 is captured into the other segment and later transferred into
+    the other set. Nothing is allocated or registered per frame.
+    """
+
+    def __init__(self, num_channels: int, num_samples: int, num_sets: int = 2):
+        self.num_channels = num_channels
+        self.num_samples = num_samples
+        self.num_sets = num_sets
+        self.buffers = [np.zeros((num_channels, num_samples), dtype=np.int16) for _ in range(num_sets)]
+        self.status = {}
+
+    def matches(self, num_channels: int, num_samples: int) -> bool:
+        """True if the pool can be reused for this configuration."""
+        return self.num_channels == num_channels and self.num_samples == num_samples
+
+    def register(self, c_handle: ctypes.c_int16):
+        """Split the scope memory into one segment per buffer set and register all buffers with the driver."""
+        max_samples_per_segment = ctypes.c_int32()
+        self.status["memorySegments"] = ps.ps4000aMemorySegments(c_handle, self.num_sets,
+                                                                 ctypes.byref(max_samples_per_segment))
+        assert_pico_ok(self.status["memorySegments"])
+        if max_samples_per_segment.value < self.num_samples * self.num_channels:
+            raise ValueError(f"Scope memory per segment ({max_samples_per_segment.value} samples) is too small "
+                             f"for {self.num_channels} x {self.num_samples} samples")
+
+        for segment, buffers in enumerate(self.buffers):
+            for i, buffer in enumerate(buffers):
+                self.status[f"setDataBuffer{segment}_{i}"] = ps.ps4000aSetDataBuffer(
+                    c_handle,
+                    i,  # channel
+                    buffer.ctypes.data_as(ctypes.POINTER(ctypes.c_int16)),
+                    self.num_samples,
+                    segment,  # segment index
+                    ps.PS4000A_RATIO_MODE['PS4000A_RATIO_MODE_NONE']
+                )
+                assert_pico_ok(self.status[f"setDataBuffer{segment}_{i}"])
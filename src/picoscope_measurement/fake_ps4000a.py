@@ -0,0 +1,527 @@
+import ctypes
+import time
+import numpy as np
+from picosdk.constants import PICO_STATUS
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+# Input ranges of the PicoScope 4824 in volts, indexed by PS4000A_RANGE
+VOLTAGE_RANGES = [0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 50.0]
+
+# Threshold directions of ps4000aSetSimpleTrigger
+ABOVE, BELOW, RISING, FALLING, RISING_OR_FALLING = range(5)
+
+
+def _value(arg) -> int:
+    """Plain value of an argument that may be a ctypes scalar (e.g. the c_int16 handle)."""
+    return arg.value if isinstance(arg, ctypes._SimpleCData) else arg
+
+
+def _target(ref):
+    """The ctypes object behind a ctypes.byref() argument; other arguments are returned unchanged."""
+    return getattr(ref, "_obj", ref)
+
+
+class _FakeDevice:
+    """State of one opened fake PicoScope."""
+
+    def __init__(self, num_channels: int, memory_samples: int):
+        self.num_channels = num_channels
+        self.memory_samples = memory_samples
+        self.channel_enabled = np.zeros(num_channels, dtype=bool)
+        self.channel_range = np.full(num_channels, 7)
+        self.channel_offset = np.zeros(num_channels)
+        self.trigger = None  # (source, threshold volts, direction, delay samples, auto trigger s)
+        self.num_segments = 1
+        self.num_captures = 1
+        self.buffers = {}  # (channel, segment) -> np.ndarray registered with ps4000aSetDataBuffer
+
+        # Block mode
+        self.sample_interval = None
+        self.ready_time = None
+        self.captured_samples = 0
+        self.capture_offsets = {}  # segment -> index into the wave table of the first captured sample
+
+        # Streaming mode
+        self.streaming = False
+        self.stream_start_time = None
+        self.stream_samples_delivered = 0
+        self.stream_buffer_samples = 0
+        self.stream_buffer_index = 0
+        self.stream_auto_stop_samples = None
+
+        self.wave = None  # (channels, table length) int16
+        self.wave_interval = None
+        self.wave_period = None
+        self.wave_overflow = 0
+
+
+class FakePs4000a:
+    """
+    Software stand-in for `picosdk.ps4000a.ps4000a`, modelled on a PicoScope 4824 (8 channels, 80 MS/s, 256 MS).
+
+    Implements the driver calls used by the PicoScope apps and sources with the same arguments (ctypes handles,
+    byref() outputs, pointers from ndarray.ctypes.data_as) and the same status codes, so it can replace the real
+    module without changing the callers (see ps_backend.py):
+
+    - Block and rapid block: RunBlock takes as long as the hardware would (pre- and post-trigger samples at the
+      sample interval of the timebase, plus the wait for the trigger, for every capture); IsReady reports it;
+      GetValues / GetValuesBulk write the captures into the buffers registered with SetDataBuffer.
+    - Trigger: the simple trigger is evaluated on the simulated signal of its source channel, so the trigger point
+      is at the pre-trigger sample. A threshold the signal never reaches waits for the auto trigger
+      (autoTrigger_ms = 0: forever, like the device).
+    - Streaming: samples accumulate at the sample interval in real time; GetStreamingLatestValues copies them into
+      the overview buffers and calls the callback, and samples older than one overview buffer are lost.
+
+    The signal is a sine of `signal_freq` on every channel, delayed by `channel_delay` seconds per channel, plus
+    Gaussian noise. It is precomputed as an int16 table of whole periods (the frequency is adjusted so that a
+    period is a whole number of samples), so a transfer costs a copy, like the USB transfer it replaces.
+    """
+
+    PS4000A_RATIO_MODE = {
+        'PS4000A_RATIO_MODE_NONE': 0,
+        'PS4000A_RATIO_MODE_AGGREGATE': 1,
+        'PS4000A_RATIO_MODE_DECIMATE': 2,
+        'PS4000A_RATIO_MODE_AVERAGE': 4,
+    }
+    PS4000A_TIME_UNITS = {
+        'PS4000A_FS': 0,
+        'PS4000A_PS': 1,
+        'PS4000A_NS': 2,
+        'PS4000A_US': 3,
+        'PS4000A_MS': 4,
+        'PS4000A_S': 5,
+    }
+    PS4000A_THRESHOLD_DIRECTION = {
+        'PS4000A_ABOVE': ABOVE,
+        'PS4000A_BELOW': BELOW,
+        'PS4000A_RISING': RISING,
+        'PS4000A_FALLING': FALLING,
+        'PS4000A_RISING_OR_FALLING': RISING_OR_FALLING,
+    }
+    PICO_VOLTAGE_RANGE = dict(enumerate(VOLTAGE_RANGES))
+    StreamingReadyType = ctypes.CFUNCTYPE(None, ctypes.c_int16, ctypes.c_int32, ctypes.c_uint32, ctypes.c_int16,
+                                          ctypes.c_uint32, ctypes.c_int16, ctypes.c_int16, ctypes.c_void_p)
+
+    TIME_UNIT_SECONDS = [1e-15, 1e-12, 1e-9, 1e-6, 1e-3, 1.0]
+    BASE_INTERVAL = 12.5e-9  # timebase n samples every (n + 1) * 12.5 ns
+    MAX_ADC = 32767
+    MIN_TABLE_SAMPLES = 65536
+
+    def __init__(self, num_channels: int = 8, memory_samples: int = 256 * 1024 * 1024, signal_freq: float = 1000.0,
+                 amplitude: float = 1.0, channel_delay: float = 1e-5, noise_scale: float = 0.01,
+                 seed: int | None = None):
+        """
+        Args:
+            num_channels (int): Number of analog channels of the simulated scope.
+            memory_samples (int): Capture memory in samples, shared by all enabled channels and segments.
+            signal_freq (float): Frequency of the simulated sine in Hz.
+            amplitude (float): Amplitude of the sine in volts.
+            channel_delay (float): Delay of each channel's signal relative to the previous channel in seconds.
+            noise_scale (float): Standard deviation of the noise in volts.
+            seed (int | None): Seed for the noise and the trigger timing.
+        """
+        self.num_channels = num_channels
+        self.memory_samples = memory_samples
+        self.signal_freq = signal_freq
+        self.amplitude = amplitude
+        self.channel_delay = channel_delay
+        self.noise_scale = noise_scale
+        self.rng = np.random.default_rng(seed)
+        self.devices = {}
+        self._next_handle = 1
+
+    def _device(self, handle) -> _FakeDevice | None:
+        return self.devices.get(_value(handle))
+
+    # Device
+
+    def ps4000aOpenUnit(self, handle, serial):
+        handle_value = self._next_handle
+        self._next_handle += 1
+        self.devices[handle_value] = _FakeDevice(self.num_channels, self.memory_samples)
+        _target(handle).value = handle_value
+        return PICO_STATUS['PICO_OK']
+
+    def ps4000aCloseUnit(self, handle):
+        if self.devices.pop(_value(handle), None) is None:
+            return PICO_STATUS['PICO_INVALID_HANDLE']
+        return PICO_STATUS['PICO_OK']
+
+    def ps4000aStop(self, handle):
+        device = self._device(handle)
+        if device is None:
+            return PICO_STATUS['PICO_INVALID_HANDLE']
+        device.ready_time = None
+        device.streaming = False
+        return PICO_STATUS['PICO_OK']
+
+    def ps4000aMaximumValue(self, handle, value):
+        if self._device(handle) is None:
+            return PICO_STATUS['PICO_INVALID_HANDLE']
+        _target(value).value = self.MAX_ADC
+        return PICO_STATUS['PICO_OK']
+
+    def ps4000aMinimumValue(self, handle, value):
+        if self._device(handle) is None:
+            return PICO_STATUS['PICO_INVALID_HANDLE']
+        _target(value).value = -self.MAX_ADC
+        return PICO_STATUS['PICO_OK']
+
+    def ps4000aSetChannel(self, handle, channel, enabled, coupling, channel_range, analogue_offset):
+        device = self._device(handle)
+        if device is None:
+            return PICO_STATUS['PICO_INVALID_HANDLE']
+        if not 0 <= channel < device.num_channels:
+            return PICO_STATUS['PICO_INVALID_CHANNEL']
+        if not 0 <= channel_range < len(VOLTAGE_RANGES):
+            return PICO_STATUS['PICO_INVALID_VOLTAGE_RANGE']
+        device.channel_enabled[channel] = bool(enabled)
+        device.channel_range[channel] = channel_range
+        device.channel_offset[channel] = analogue_offset
+        device.wave = None
+        return PICO_STATUS['PICO_OK']
+
+    def ps4000aSetSimpleTrigger(self, handle, enable, source, threshold, direction, delay, auto_trigger_ms):
+        device = self._device(handle)
+        if device is None:
+            return PICO_STATUS['PICO_INVALID_HANDLE']
+        if not enable:
+            device.trigger = None
+            return PICO_STATUS['PICO_OK']
+        if not 0 <= source < device.num_channels:
+            return PICO_STATUS['PICO_INVALID_CHANNEL']
+        threshold_volts = threshold / self.MAX_ADC * VOLTAGE_RANGES[device.channel_range[source]]
+        device.trigger = (source, threshold_volts, direction, delay, auto_trigger_ms / 1000)
+        return PICO_STATUS['PICO_OK']
+
+    # Memory and timebase
+
+    def ps4000aMemorySegments(self, handle, num_segments, max_samples):
+        device = self._device(handle)
+        if device is None:
+            return PICO_STATUS['PICO_INVALID_HANDLE']
+        if not 1 <= num_segments <= device.memory_samples:
+            return PICO_STATUS['PICO_TOO_MANY_SEGMENTS']
+        device.num_segments = num_segments
+        device.capture_offsets.clear()
+        _target(max_samples).value = device.memory_samples // num_segments
+        return PICO_STATUS['PICO_OK']
+
+    def ps4000aSetNoOfCaptures(self, handle, num_captures):
+        device = self._device(handle)
+        if device is None:
+            return PICO_STATUS['PICO_INVALID_HANDLE']
+        if not 1 <= num_captures <= device.num_segments:
+            return PICO_STATUS['PICO_TOO_MANY_SEGMENTS']
+        device.num_captures = num_captures
+        return PICO_STATUS['PICO_OK']
+
+    def ps4000aGetTimebase2(self, handle, timebase, num_samples, time_interval_ns, max_samples, segment_index):
+        device = self._device(handle)
+        if device is None:
+            return PICO_STATUS['PICO_INVALID_HANDLE']
+        if timebase < 0:
+            return PICO_STATUS['PICO_INVALID_TIMEBASE']
+        if segment_index >= device.num_segments:
+            return PICO_STATUS['PICO_SEGMENT_OUT_OF_RANGE']
+        if time_interval_ns is not None:
+            _target(time_interval_ns).value = (timebase + 1) * self.BASE_INTERVAL * 1e9
+        if max_samples is not None:
+            _target(max_samples).value = device.memory_samples // device.num_segments
+        return PICO_STATUS['PICO_OK']
+
+    def ps4000aSetDataBuffer(self, handle, channel, buffer, buffer_length, segment_index, mode):
+        device = self._device(handle)
+        if device is None:
+            return PICO_STATUS['PICO_INVALID_HANDLE']
+        if not 0 <= channel < device.num_channels:
+            return PICO_STATUS['PICO_INVALID_CHANNEL']
+        if buffer is None:
+            device.buffers.pop((channel, segment_index), None)
+            return PICO_STATUS['PICO_OK']
+        pointer = ctypes.cast(buffer, ctypes.POINTER(ctypes.c_int16))
+        device.buffers[(channel, segment_index)] = np.ctypeslib.as_array(pointer, shape=(buffer_length,))
+        return PICO_STATUS['PICO_OK']
+
+    # Simulated signal
+
+    def _prepare_wave(self, device: _FakeDevice, sample_interval: float):
+        """Precompute the int16 signal table of all channels for this sample interval and the channel ranges."""
+        if device.wave is not None and device.wave_interval == sample_interval:
+            return
+        period = max(2, int(round(1 / (self.signal_freq * sample_interval))))
+        table_samples = period * int(np.ceil(self.MIN_TABLE_SAMPLES / period))
+        delay_samples = self.channel_delay / sample_interval
+        phase = np.arange(table_samples)[np.newaxis, :] - delay_samples * np.arange(device.num_channels)[:, np.newaxis]
+        volts = self.amplitude * np.sin(2 * np.pi * phase / period)
+        volts += self.rng.normal(0, self.noise_scale, volts.shape)
+        volts += device.channel_offset[:, np.newaxis]
+        ranges = np.array(VOLTAGE_RANGES)[device.channel_range][:, np.newaxis]
+        over_range = np.any(np.abs(volts) > ranges, axis=1)
+
+        device.wave = np.clip(np.round(volts / ranges * self.MAX_ADC), -self.MAX_ADC, self.MAX_ADC).astype(np.int16)
+        device.wave_interval = sample_interval
+        device.wave_period = period
+        device.wave_overflow = int(np.sum(1 << np.flatnonzero(over_range)))
+
+    def _trigger_points(self, device: _FakeDevice) -> np.ndarray:
+        """Indices in the wave table (within the first period) where the simple trigger fires."""
+        source, threshold, direction, _, _ = device.trigger
+        x = device.wave[source, :device.wave_period + 1].astype(np.float64)
+        x *= VOLTAGE_RANGES[device.channel_range[source]] / self.MAX_ADC
+        above = x >= threshold
+        rising = ~above[:-1] & above[1:]
+        falling = above[:-1] & ~above[1:]
+        if direction == RISING:
+            crossings = rising
+        elif direction == FALLING:
+            crossings = falling
+        elif direction == RISING_OR_FALLING:
+            crossings = rising | falling
+        elif direction == ABOVE:
+            crossings = above[1:]
+        else:
+            crossings = ~above[1:]
+        return np.flatnonzero(crossings) + 1
+
+    def _copy_wave(self, device: _FakeDevice, channel: int, start: int, out: np.ndarray):
+        """Copy the signal from wave table index `start` on into `out`, wrapping around the table."""
+        table = device.wave[channel]
+        position = start % len(table)
+        filled = 0
+        while filled < len(out):
+            count = min(len(out) - filled, len(table) - position)
+            out[filled:filled + count] = table[position:position + count]
+            filled += count
+            position = 0
+
+    # Block and rapid block mode
+
+    def ps4000aRunBlock(self, handle, pre_trigger_samples, post_trigger_samples, timebase, time_indisposed_ms,
+                        segment_index, lp_ready, parameter):
+        device = self._device(handle)
+        if device is None:
+            return PICO_STATUS['PICO_INVALID_HANDLE']
+        if timebase < 0:
+            return PICO_STATUS['PICO_INVALID_TIMEBASE']
+        if segment_index + device.num_captures > device.num_segments:
+            return PICO_STATUS['PICO_SEGMENT_OUT_OF_RANGE']
+        num_samples = pre_trigger_samples + post_trigger_samples
+        num_enabled = max(1, int(np.sum(device.channel_enabled)))
+        if num_samples * num_enabled > device.memory_samples // device.num_segments:
+            return PICO_STATUS['PICO_TOO_MANY_SAMPLES']
+
+        sample_interval = (timebase + 1) * self.BASE_INTERVAL
+        self._prepare_wave(device, sample_interval)
+        trigger_points = self._trigger_points(device) if device.trigger is not None else np.array([], dtype=int)
+
+        # Every capture records the pre-trigger samples, waits for the trigger, then records the rest
+        capture_time = 0.0
+        for segment in range(segment_index, segment_index + device.num_captures):
+            if device.trigger is None:
+                trigger_index = self.rng.integers(device.wave_period)
+                trigger_wait = 0.0
+            elif len(trigger_points) > 0:
+                trigger_index = self.rng.choice(trigger_points) + device.trigger[3]
+                trigger_wait = self.rng.uniform(0, device.wave_period * sample_interval)
+            else:
+                auto_trigger = device.trigger[4]
+                if auto_trigger <= 0:
+                    trigger_wait = np.inf
+                else:
+                    trigger_wait = auto_trigger
+                trigger_index = self.rng.integers(device.wave_period)
+            device.capture_offsets[segment] = trigger_index - pre_trigger_samples
+            capture_time += num_samples * sample_interval + trigger_wait
+
+        device.sample_interval = sample_interval
+        device.captured_samples = num_samples
+        device.ready_time = time.perf_counter() + capture_time
+        if time_indisposed_ms is not None:
+            _target(time_indisposed_ms).value = int(min(capture_time, 2 ** 31 / 1000) * 1000)
+        return PICO_STATUS['PICO_OK']
+
+    def ps4000aIsReady(self, handle, ready):
+        device = self._device(handle)
+        if device is None:
+            return PICO_STATUS['PICO_INVALID_HANDLE']
+        _target(ready).value = int(device.ready_time is not None and time.perf_counter() >= device.ready_time)
+        return PICO_STATUS['PICO_OK']
+
+    def _transfer_segment(self, device: _FakeDevice, start_index: int, num_samples: int, segment: int) -> int:
+        """Copy one captured segment into its registered buffers; returns the overflow bit mask."""
+        offset = device.capture_offsets[segment] + start_index
+        for channel in np.flatnonzero(device.channel_enabled):
+            buffer = device.buffers.get((channel, segment))
+            if buffer is not None:
+                self._copy_wave(device, channel, offset, buffer[:num_samples])
+        return device.wave_overflow
+
+    def _check_transfer(self, device: _FakeDevice | None, segments) -> int:
+        if device is None:
+            return PICO_STATUS['PICO_INVALID_HANDLE']
+        if device.ready_time is None or time.perf_counter() < device.ready_time:
+            return PICO_STATUS['PICO_NO_SAMPLES_AVAILABLE']
+        for segment in segments:
+            if segment not in device.capture_offsets:
+                return PICO_STATUS['PICO_SEGMENT_OUT_OF_RANGE']
+            for channel in np.flatnonzero(device.channel_enabled):
+                if (channel, segment) not in device.buffers:
+                    return PICO_STATUS['PICO_INVALID_BUFFER']
+        return PICO_STATUS['PICO_OK']
+
+    def _transfer_length(self, device: _FakeDevice, start_index: int, requested: int, segments) -> int:
+        buffer_length = min(len(device.buffers[(channel, segment)])
+                            for segment in segments for channel in np.flatnonzero(device.channel_enabled))
+        return max(0, min(requested, device.captured_samples - start_index, buffer_length))
+
+    def ps4000aGetValues(self, handle, start_index, num_samples, down_sample_ratio, down_sample_ratio_mode,
+                         segment_index, overflow):
+        device = self._device(handle)
+        status = self._check_transfer(device, [segment_index])
+        if status != PICO_STATUS['PICO_OK']:
+            return status
+        count = self._transfer_length(device, start_index, _target(num_samples).value, [segment_index])
+        overflow_mask = self._transfer_segment(device, start_index, count, segment_index)
+        _target(num_samples).value = count
+        if overflow is not None:
+            _target(overflow).value = overflow_mask
+        return PICO_STATUS['PICO_OK']
+
+    def ps4000aGetValuesBulk(self, handle, num_samples, from_segment_index, to_segment_index, down_sample_ratio,
+                             down_sample_ratio_mode, overflow):
+        device = self._device(handle)
+        segments = range(from_segment_index, to_segment_index + 1)
+        status = self._check_transfer(device, segments)
+        if status != PICO_STATUS['PICO_OK']:
+            return status
+        count = self._transfer_length(device, 0, _target(num_samples).value, segments)
+        overflow_masks = _target(overflow) if overflow is not None else None
+        for i, segment in enumerate(segments):
+            overflow_mask = self._transfer_segment(device, 0, count, segment)
+            if overflow_masks is not None:
+                overflow_masks[i] = overflow_mask
+        _target(num_samples).value = count
+        return PICO_STATUS['PICO_OK']
+
+    # Streaming mode
+
+    def ps4000aRunStreaming(self, handle, sample_interval, sample_interval_time_units, max_pre_trigger_samples,
+                            max_post_trigger_samples, auto_stop, down_sample_ratio, down_sample_ratio_mode,
+                            overview_buffer_size):
+        device = self._device(handle)
+        if device is None:
+            return PICO_STATUS['PICO_INVALID_HANDLE']
+        if overview_buffer_size < 1:
+            return PICO_STATUS['PICO_INVALID_PARAMETER']
+        for channel in np.flatnonzero(device.channel_enabled):
+            buffer = device.buffers.get((channel, 0))
+            if buffer is None or len(buffer) < overview_buffer_size:
+                return PICO_STATUS['PICO_INVALID_BUFFER']
+
+        # The interval is rounded to a whole timebase and returned in the requested unit
+        unit = self.TIME_UNIT_SECONDS[sample_interval_time_units]
+        interval = _target(sample_interval)
+        timebase = max(0, int(round(interval.value * unit / self.BASE_INTERVAL)) - 1)
+        device.sample_interval = (timebase + 1) * self.BASE_INTERVAL
+        interval.value = max(1, int(round(device.sample_interval / unit)))
+
+        self._prepare_wave(device, device.sample_interval)
+        device.stream_buffer_samples = overview_buffer_size
+        device.stream_buffer_index = 0
+        device.stream_samples_delivered = 0
+        device.stream_auto_stop_samples = max_pre_trigger_samples + max_post_trigger_samples if auto_stop else None
+        device.stream_start_time = time.perf_counter()
+        device.ready_time = None
+        device.streaming = True
+        return PICO_STATUS['PICO_OK']
+
+    def ps4000aGetStreamingLatestValues(self, handle, lp_ps4000a_ready, parameter):
+        device = self._device(handle)
+        if device is None:
+            return PICO_STATUS['PICO_INVALID_HANDLE']
+        if not device.streaming:
+            return PICO_STATUS['PICO_NOT_USED']
+
+        recorded = int((time.perf_counter() - device.stream_start_time) / device.sample_interval)
+        if device.stream_auto_stop_samples is not None:
+            recorded = min(recorded, device.stream_auto_stop_samples)
+        pending = recorded - device.stream_samples_delivered
+        if pending == 0:
+            return PICO_STATUS['PICO_BUSY']
+
+        # The overview buffer only holds the newest samples, older ones are overwritten
+        buffer_samples = device.stream_buffer_samples
+        if pending > buffer_samples:
+            lost = pending - buffer_samples
+            device.stream_samples_delivered += lost
+            device.stream_buffer_index = (device.stream_buffer_index + lost) % buffer_samples
+            pending = buffer_samples
+
+        # One callback per call, up to the end of the overview buffer
+        start_index = device.stream_buffer_index
+        count = min(pending, buffer_samples - start_index)
+        for channel in np.flatnonzero(device.channel_enabled):
+            self._copy_wave(device, channel, device.stream_samples_delivered,
+                            device.buffers[(channel, 0)][start_index:start_index + count])
+        device.stream_samples_delivered += count
+        device.stream_buffer_index = (start_index + count) % buffer_samples
+
+        auto_stopped = device.stream_auto_stop_samples is not None and \
+            device.stream_samples_delivered >= device.stream_auto_stop_samples
+        if auto_stopped:
+            device.streaming = False
+        lp_ps4000a_ready(_value(handle), count, start_index, device.wave_overflow, 0, 0, int(auto_stopped), parameter)
+        return PICO_STATUS['PICO_OK']
+
+
+# Shared instance, used like `from picosdk.ps4000a import ps4000a as ps`
+ps4000a = FakePs4000a()
+
+
+def benchmark_fake_ps4000a(num_channels: int = 4, sampling_freq: float = 10_000_000, sampling_time: float = 0.01,
+                           duration: float = 3.0):
+    """
+    Run the block, rapid block and streaming sources against the fake driver and report their frame rates.
+
+    :param num_channels: Number of channels
+    :param sampling_freq: Sampling frequency in Hz
+    :param sampling_time: Length of one frame in seconds
+    :param duration: Run time per acquisition mode in seconds
+    """
+    from src.picoscope_measurement.ps_backend import select_pico_backend
+    from src.picoscope_measurement.pico_source import PicoBlockSource, PicoStreamingSource
+    from src.picoscope_measurement.rapid_block import PicoRapidBlockSource
+
+    select_pico_backend("fake")
+    sources = {
+        "block": lambda: PicoBlockSource(num_channels, sampling_freq, sampling_time),
+        "rapid block": lambda: PicoRapidBlockSource(num_channels, sampling_freq, sampling_time, num_segments=10),
+        "streaming": lambda: PicoStreamingSource(num_channels, sampling_freq, sampling_time),
+    }
+    for name, create_source in sources.items():
+        source = create_source()
+        source.open()
+        frames = 0
+        samples = 0
+        start_time = time.perf_counter()
+        try:
+            while time.perf_counter() - start_time < duration:
+                frame = source.read_frame()
+                if frame is not None:
+                    frames += 1
+                    samples += frame.raw.size // num_channels
+        finally:
+            source.close()
+        elapsed = time.perf_counter() - start_time
+        print(f"{name:>12}: {frames / elapsed:8.2f} frames/s, {samples / elapsed / 1e6:8.2f} MS/s per channel, "
+              f"dropped samples: {getattr(source, 'dropped_samples', 0)}")
+
+
+if __name__ == "__main__":
+    benchmark_fake_ps4000a()
@@ -5,10 +5,17 @@ from PySide6.QtCore import QTimer
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from picosdk.ps4000a import ps4000a as ps
-from picosdk.functions import adc2mV, assert_pico_ok
+from picosdk.functions import assert_pico_ok
 import ctypes
 import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.common.adc_conversion import AdcConverter
+from src.picoscope_measurement.ps_backend import ps, select_pico_backend_from_args
 
 
 class PicoScopeApp(QMainWindow):
@@ -181,7 +188,8 @@ class PicoScopeApp(QMainWindow):
 
         # Set data buffers
 
-        self.buffers = [np.zeros(self.num_samples, dtype=np.int16) for _ in range(self.num_channels)]
+        # One (channels, samples) block, so it is converted in a single pass
+        self.buffers = np.zeros((self.num_channels, self.num_samples), dtype=np.int16)
         for i, buffer in enumerate(self.buffers):
             self.status[f"setDataBufferA{i}"] = ps.ps4000aSetDataBuffer(
                 self.c_handle,
@@ -218,11 +226,11 @@ class PicoScopeApp(QMainWindow):
 
         # Process and update plot
         self.ax.clear()
-        for i, buffer in enumerate(self.buffers):
-            # Convert ADC counts to millivolts
-            channel_range = 7  # PS4000A_2V
-            values = adc2mV(buffer, channel_range, self.max_adc)
-            self.ax.plot(values[:cmaxSamples.value], label=f"Channel {i}")
+        # Convert ADC counts to millivolts (PS4000A_2V on all channels)
+        converter = AdcConverter(self.num_channels, 2000.0, full_scale=self.max_adc.value)
+        values = converter.convert(self.buffers[:, :cmaxSamples.value])
+        for i, channel_values in enumerate(values):
+            self.ax.plot(channel_values, label=f"Channel {i}")
 
         self.ax.legend()
         self.canvas.draw()
@@ -246,6 +254,7 @@ class PicoScopeApp(QMainWindow):
 
 
 if __name__ == "__main__":
+    select_pico_backend_from_args(sys.argv)
     app = QApplication(sys.argv)
     window = PicoScopeApp()
     window.show()
@@ -1,4 +1,5 @@
 from typing import override
+import os
 import numpy as np
 import time
 import sys
@@ -8,6 +9,14 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
+from src.common.acquisition import RawFrame
+from src.common.adc_conversion import AdcConverter
+from src.common.correlation import CrossCorrelationDelayEstimator
+from src.common.decimation import MinMaxPyramid
+from src.common.edge_detection import find_first_edges
+from src.common.growable_array import GrowableArray
+from src.common.row_log import RowLogWriter
+from src.gui_tools.channel_plot import display_points
 from src.picoscope_measurement.main_pico import PicoScopeApp
 
 
@@ -17,119 +26,217 @@ class PicoDtApp(PicoScopeApp):
         super().__init__()
         self.setWindowTitle("PicoScope time delay measurement")
 
+        self.delay_method_ui = self.add_choice_parameter("Delay Method", ["threshold crossing", "cross-correlation"])
         self.threshold_ui = self.add_parameter("Threshold [V]", 0.5)
+        self.hysteresis_ui = self.add_parameter("Hysteresis [V]", 0.05)
+        self.edge_ui = self.add_choice_parameter("Edge", ["rising", "falling"])
+        self.correlation_decimation_ui = self.add_parameter("Correlation Decimation", 8)
+        self.max_lag_ui = self.add_parameter("Max Lag [s] (0 = all)", 0)
+        self.display_window_ui = self.add_parameter("Delay Display Window (0 = all)", 0)
+        self.delay_log_ui = self.add_choice_parameter("Delay Log (next to save path)",
+                                                      ["off", "binary", "binary + csv"])
+        # Rendering the graph at print resolution takes a while, so it is only exported on request
+        self.save_graph_ui = self.add_choice_parameter("Save Delay Graph (300 dpi)", ["no", "yes"])
+        self.logged_rows_ui = self.add_output_field("Logged Rows", "-")
+        # Kept between frames so FFT lengths and windows are reused
+        self.correlation_estimator = CrossCorrelationDelayEstimator()
         self.canvas_proc, self.figure_proc, self.ax_proc = self.add_pyplot_tab("Delays")
+        self.ax_proc.set_xlabel("Measurement Time (s)")
+        self.ax_proc.set_ylabel("Time Delay (s)")
+        self.ax_proc.set_title("Time Delays Relative to Channel 1 Over Time")
+        self.render_scheduler.add_target("delays", self.render_delays, self.canvas_proc)
 
-        # Initialize data storage for time differences
+        # Delay history: measurement times, and one row per channel (2..n) of delays with NaN for misses.
+        # The delays are the raw data of a min/max pyramid, so plotting a long run only queries a few thousand points.
         self.start_time = None
         self.measurement_times = None
-        self.time_differences = None
+        self.delay_pyramid = None
+        self.delay_log = None
+
+    @property
+    def time_differences(self) -> np.ndarray:
+        """Delays relative to channel 1, shape (channels - 1, measurements)."""
+        return self.delay_pyramid.raw.data
 
     def start_measurement(self):
         super().start_measurement()
         self.start_time = time.time()
-        self.measurement_times = []
-        self.time_differences = [[] for _ in range(self.num_channels - 1)]
-
-    def find_rising_edge_crossing(self, x_data, y_data, threshold):
-        # Find where the signal is below the threshold
-        below_threshold = y_data < threshold
-        # Find where the signal transitions from below to above threshold
-        rising_edges = np.where(np.diff(below_threshold.astype(int)) == -1)[0]
-
-        if len(rising_edges) > 0:
-            # Return the time of the first rising edge crossing
-            return x_data[rising_edges[0] + 1]
+        self.measurement_times = GrowableArray(dtype=np.float64)
+        self.delay_pyramid = MinMaxPyramid(self.num_channels - 1, dtype=np.float64)
+        self.open_delay_log()
+
+    def stop_measurement(self):
+        super().stop_measurement()
+        if self.delay_log is not None:
+            self.delay_log.close()
+            print(f"Delay log closed: {self.delay_log.rows_written} rows in {self.delay_log.path}")
+            self.delay_log = None
+
+    def delay_log_path(self) -> str:
+        return os.path.splitext(self.save_path.text())[0] + "_delays.bin"
+
+    @override
+    def raw_recording_path(self) -> str:
+        # The save path itself holds the delay history
+        return (os.path.splitext(self.save_path.text())[0] or time.strftime("recording_%Y%m%d_%H%M%S")) + "_raw.hsq"
+
+    def open_delay_log(self):
+        """Start writing every delay row to disk while the measurement runs, if enabled."""
+        log_mode = self.get_choice_parameter(self.delay_log_ui)
+        if log_mode == "off":
+            return
+        if not self.save_path.text():
+            print("No save path specified, delay log disabled.")
+            return
+        columns = ['Measurement_Time'] + [f'Delay_Ch{i + 2}' for i in range(self.num_channels - 1)]
+        try:
+            self.delay_log = RowLogWriter(self.delay_log_path(), columns, csv_mirror=log_mode == "binary + csv")
+        except OSError as e:
+            print(f"Error opening delay log: {e}")
+
+    @override
+    def process_frame(self, frame: RawFrame):
+        # Both delay methods work on the ADC codes: the threshold is converted to codes instead of every sample to
+        # volts, and the correlation does not depend on the scaling
+        if isinstance(frame, RawFrame) and frame.converter.is_uniform:
+            self.process_data(frame.time_axis, frame.raw, converter=frame.converter)
         else:
-            print("No rising edge crossing found")
-            return None
+            self.process_data(frame.time_axis, frame.data)
 
     @override
-    def process_data(self, x_data: np.ndarray, y_data: list[np.ndarray]) -> None:
+    def process_data(self, x_data: np.ndarray, y_data: list[np.ndarray] | np.ndarray,
+                     converter: AdcConverter | None = None) -> None:
         """
         Process the acquired data to find threshold crossings and calculate time differences.
 
         Args:
             x_data (np.ndarray): The time axis data.
-            y_data (list[np.ndarray]): List of voltage data for each channel.
+            y_data (list[np.ndarray] | np.ndarray): Voltage data for each channel, shape (channels, samples),
+                or (segments, channels, samples) for rapid block captures. Every segment is one measurement.
+            converter (AdcConverter | None): If given, y_data are ADC codes that this (uniform) converter maps to volts.
 
         Returns:
             None: This method updates the internal state and plot but does not return a value.
         """
         # print("Processing data")
 
-        threshold = self.get_float_parameter_value(self.threshold_ui)
+        data = np.asarray(y_data)
+        if data.ndim == 2:
+            data = data[np.newaxis]
 
-        # Find the first rising edge threshold crossing for each channel
-        crossing_times = []
-        for channel_data in y_data:
-            crossing_time = self.find_rising_edge_crossing(x_data, channel_data, threshold)
-            crossing_times.append(crossing_time)
-
-        # Calculate time differences relative to the first channel
-        reference_time = crossing_times[0]
-        current_time_differences = []
-        for crossing_time in crossing_times[1:]:
-            if crossing_time is not None and reference_time is not None:
-                current_time_differences.append(crossing_time - reference_time)
-            else:
-                current_time_differences.append(None)
+        # Time differences relative to the first channel, shape (segments, channels - 1)
+        if self.get_choice_parameter(self.delay_method_ui) == "cross-correlation":
+            current_time_differences = self.correlation_delays(x_data, data)
+        else:
+            current_time_differences = self.threshold_crossing_delays(x_data, data, converter)
 
         # Update the time differences storage
         if self.start_time is None:
             self.start_time = time.time()
 
+        # The segments of one frame were recorded since the previous frame; spread them over that interval
         current_measurement_time = time.time() - self.start_time
-        self.measurement_times.append(current_measurement_time)
-
-        for i, diff in enumerate(current_time_differences):
-            self.time_differences[i].append(diff)
-
-        # Update the delay plot
-        self.ax_proc.clear()
-
-        for i, diffs in enumerate(self.time_differences):
-            valid_times = [t for t, d in zip(self.measurement_times, diffs) if d is not None]
-            valid_diffs = [d for d in diffs if d is not None]
-            if valid_diffs:
-                self.ax_proc.plot(valid_times, valid_diffs, label=f'Channel {i + 2}')
-
-        self.ax_proc.set_xlabel("Measurement Time (s)")
-        self.ax_proc.set_ylabel("Time Delay (s)")
-        self.ax_proc.set_title("Time Delays Relative to Channel 1 Over Time")
-        self.ax_proc.legend()
-
-        # Limit the number of points to display (e.g., last 100 points)
-        # max_points = 100
-        # if len(self.measurement_times) > max_points:
-        #     self.ax_proc.set_xlim(self.measurement_times[-max_points], self.measurement_times[-1])
+        previous_measurement_time = self.measurement_times.data[-1] if len(self.measurement_times) \
+            else current_measurement_time
+        num_segments = data.shape[0]
+        segment_times = np.linspace(previous_measurement_time, current_measurement_time, num_segments + 1)[1:]
+        self.measurement_times.extend(segment_times)
+        self.delay_pyramid.append(current_time_differences.T)
+
+        if self.delay_log is not None:
+            if self.delay_log.error is not None:
+                print(f"Error writing delay log: {self.delay_log.error}")
+            self.delay_log.append(np.column_stack([segment_times, current_time_differences]))
+            self.logged_rows_ui.setText(str(self.delay_log.rows_written))
+
+        # The delay plot is redrawn by the render scheduler
+        self.render_scheduler.submit("delays")
+
+    def threshold_crossing_delays(self, x_data: np.ndarray, data: np.ndarray,
+                                  converter: AdcConverter | None = None) -> np.ndarray:
+        threshold = self.get_float_parameter_value(self.threshold_ui)
+        hysteresis = self.get_float_parameter_value(self.hysteresis_ui)
+        edge = self.get_choice_parameter(self.edge_ui)
+        if converter is not None:
+            # Compare the codes with the threshold in codes
+            threshold, hysteresis = converter.to_codes(threshold), hysteresis / float(converter.scale[0, 0])
+
+        # First crossing of each segment and channel, interpolated between samples
+        crossing_times = find_first_edges(x_data, data, threshold, hysteresis, edge)
+        if np.isnan(crossing_times).any():
+            print(f"No {edge} edge crossing found")
+        return crossing_times[:, 1:] - crossing_times[:, :1]
+
+    def correlation_delays(self, x_data: np.ndarray, data: np.ndarray) -> np.ndarray:
+        max_lag = self.get_float_parameter_value(self.max_lag_ui)
+        decimation = max(1, self.get_int_parameter_value(self.correlation_decimation_ui))
+        # The correlation needs at least 3 samples after decimation; short records are decimated less
+        if data.shape[-1] // decimation < 3:
+            decimation = max(1, data.shape[-1] // 3)
+            print(f"Record too short for the decimation, correlating with decimation {decimation}")
+        self.correlation_estimator.decimation = decimation
+        self.correlation_estimator.max_lag = max_lag if max_lag > 0 else None
+        sample_interval = float(x_data[1] - x_data[0])
+        delays = self.correlation_estimator.estimate(data, sample_interval, reference=0)[:, 1:]
+        if np.isnan(delays).any():
+            print("No correlation delay found")
+        return delays
+
+    def render_delays(self, payload=None):
+        num_measurements = len(self.measurement_times)
+        if num_measurements == 0 or self.delay_pyramid.num_channels == 0:
+            return
+        display_window = self.get_int_parameter_value(self.display_window_ui)
+        first = max(0, num_measurements - display_window) if display_window > 0 else 0
 
-        self.canvas_proc.draw()
+        # The pyramid works on measurement indices; map the returned indices to measurement times. Every row has its
+        # own indices, as the extrema lie at different measurements. Missing crossings (NaN) become gaps.
+        indices, delays = self.delay_pyramid.query(first, num_measurements - 1, display_points(self.canvas_proc))
+        indices = np.minimum(indices.astype(np.int64), num_measurements - 1)
+        self.plot_pyplot_channels(self.canvas_proc, self.ax_proc, self.measurement_times.data[indices], delays,
+                                  labels=[f'Channel {i + 2}' for i in range(self.delay_pyramid.num_channels)])
 
+    @override
     def save_data(self):
+        """Save the delay history and, while measuring, start or stop recording the raw frames (PicoScopeApp)."""
         file_path = self.save_path.text()
         if not file_path:
             print("No save path specified.")
             return
+        if self.worker is not None:
+            super().save_data()
+        if self.measurement_times is None:
+            return
 
         try:
-            # Save processed time delay data
-            processed_data = np.column_stack([self.measurement_times] + self.time_differences)
-            np.savetxt(file_path, processed_data, delimiter=',',
-                       header='Measurement_Time,' + ','.join(f'Delay_Ch{i+2}' for i in range(len(self.time_differences))))
+            if self.delay_log is not None:
+                # Everything is already on disk, only make sure the queued rows are written
+                self.delay_log.flush()
+                print(f"Delay data is logged to {self.delay_log.path}")
+            else:
+                self.save_delay_history(file_path)
 
-            # Save time delay graph
-            self.figure_proc.savefig(f"{file_path}_delay_graph.png", dpi=300, bbox_inches='tight')
+            if self.get_choice_parameter(self.save_graph_ui) == "yes":
+                self.figure_proc.savefig(f"{file_path}_delay_graph.png", dpi=300, bbox_inches='tight')
+                print(f"Delay graph saved to {file_path}_delay_graph.png")
 
-            print(f"Data and graph saved to {file_path}")
+            print(f"Data saved to {file_path}")
         except Exception as e:
             print(f"Error saving data: {e}")
 
+    def save_delay_history(self, file_path):
+        # Save processed time delay data
+        processed_data = np.column_stack([self.measurement_times.data, self.time_differences.T])
+        np.savetxt(file_path, processed_data, delimiter=',',
+                   header='Measurement_Time,' + ','.join(f'Delay_Ch{i+2}' for i in range(len(self.time_differences))))
+
 
 if __name__ == "__main__":
     import sys
     from PySide6.QtWidgets import QApplication
+    from src.picoscope_measurement.ps_backend import select_pico_backend_from_args
 
+    select_pico_backend_from_args(sys.argv)
     app = QApplication(sys.argv)
     window = PicoDtApp()
     window.show()
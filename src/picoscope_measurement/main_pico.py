@@ -1,11 +1,8 @@
 from PySide6.QtCore import QTimer
-import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from picosdk.ps4000a import ps4000a as ps
-from picosdk.functions import adc2mV, assert_pico_ok
-import ctypes
 import time
+from functools import partial
 import sys
 from pathlib import Path
 
@@ -14,7 +11,13 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
 from src.gui_tools.daq_window import DAQWindow
-from src.common.utils import scale_adc_two_complement
+from src.common.acquisition import AcquisitionWorker, FrameQueue, RawFrame
+from src.common.chunk_compression import ChunkCodec
+from src.common.process_acquisition import ProcessAcquisitionWorker
+from src.common.replay_source import ReplaySource
+from src.picoscope_measurement.pico_source import PicoBlockSource, PicoStreamingSource
+from src.picoscope_measurement.rapid_block import PicoRapidBlockSource
+from src.picoscope_measurement.ps_backend import ps, select_pico_backend
 
 
 class PicoScopeApp(DAQWindow):
@@ -30,27 +33,36 @@ class PicoScopeApp(DAQWindow):
         self.num_channels_ui = None
         self.sampling_time_ui = None
         self.sampling_freq_ui = None
+        self.acquisition_mode_ui = None
+        self.acquisition_worker_ui = None
+        self.num_segments_ui = None
+        self.replay_file_ui = None
+        self.replay_pacing_ui = None
+        self.replay_loop_ui = None
+        self.recording_compression_ui = None
+        self.display_rate_ui = None
+        self.display_status_ui = None
+        self.queue_status_ui = None
+        self.dropped_samples_ui = None
+        self.source_rate_ui = None
+        self.recording_status_ui = None
 
         # Plots
         self.figure = None
         self.ax = None
         self.canvas = None
 
-        # PicoScope variables
-        self.c_handle = ctypes.c_int16()
-        self.status = {}
-        self.pico_opened = False
+        # Acquisition worker (owns the PicoScope handle) and the frame hand-off queue
+        self.source = None
+        self.worker = None
+        self.frame_queue = None
+        # Raw frames are recorded to this file while it is set
+        self.recording_path = None
+        # Capture buffers are kept between runs and reused if the configuration does not change
+        self.buffer_pool = None
 
         # Measurement variables
-        self.num_samples = None
-        self.preTriggerSamples = None
-        self.postTriggerSamples = None
-        self.timebase = None
-        self.dt_ns = None
-        self.buffers = None
-        self.max_adc = None
         self.num_channels = None
-        self.values = []
 
         # Setup parameter list and plots
         self.setup_parameter_list()
@@ -60,190 +72,154 @@ class PicoScopeApp(DAQWindow):
         self.num_channels_ui = self.add_parameter("Number of Channels", 4)
         self.sampling_time_ui = self.add_parameter("Sampling Time (s)", 1)
         self.sampling_freq_ui = self.add_parameter("Sampling Frequency (Hz)", 1000000)
+        self.acquisition_mode_ui = self.add_choice_parameter("Acquisition Mode", ["block", "rapid block", "streaming",
+                                                                                 "replay"])
+        self.num_segments_ui = self.add_parameter("Segments (rapid block)", 100)
+        self.replay_file_ui = self.add_parameter("Replay File", "")
+        self.replay_pacing_ui = self.add_choice_parameter("Replay Pacing", list(ReplaySource.PACINGS))
+        self.replay_loop_ui = self.add_choice_parameter("Replay Loop", ["no", "yes"])
+        self.recording_compression_ui = self.add_choice_parameter("Recording Compression",
+                                                                  ["none", *ChunkCodec.CODECS])
+        self.acquisition_worker_ui = self.add_choice_parameter("Acquisition Worker", ["thread", "process"])
+        self.display_rate_ui = self.add_parameter("Max Display Rate (Hz)", 20)
+        self.display_status_ui = self.add_output_field("Display", "-")
+        self.queue_status_ui = self.add_output_field("Queue Depth / Dropped", "-")
+        self.dropped_samples_ui = self.add_output_field("Dropped Samples", "-")
+        self.source_rate_ui = self.add_output_field("Source Rate", "-")
+        self.recording_status_ui = self.add_output_field("Recording", "-")
 
     def setup_plots(self):
         self.canvas, self.figure, self.ax = self.add_pyplot_tab("Waveforms")
+        self.render_scheduler.add_target("waveforms", self.render_waveforms, self.canvas)
         # self.figure, self.ax = plt.subplots()
         # self.canvas = FigureCanvas(self.figure)
         # self.add_widget_tab(self.canvas, "Waveforms")
 
-    def run_block_capture(self):
-        self.status["runBlock"] = ps.ps4000aRunBlock(
-            self.c_handle,
-            self.preTriggerSamples,
-            self.postTriggerSamples,
-            self.timebase,
-            None,
-            0,
-            None,
-            None
-        )
-        assert_pico_ok(self.status["runBlock"])
+    def create_source_factory(self, num_channels, sampling_freq, sampling_time, in_process: bool = True):
+        """Picklable callable that creates the source, so it can also be created in an acquisition process."""
+        acquisition_mode = self.get_choice_parameter(self.acquisition_mode_ui)
+        if acquisition_mode == "replay":
+            # A recording instead of the scope; channels, rate and time come from the file
+            return partial(ReplaySource, self.get_string_parameter(self.replay_file_ui),
+                           pacing=self.get_choice_parameter(self.replay_pacing_ui),
+                           loop=self.get_choice_parameter(self.replay_loop_ui) == "yes")
+        if acquisition_mode == "streaming":
+            return partial(PicoStreamingSource, num_channels, sampling_freq, sampling_time)
+        if acquisition_mode == "rapid block":
+            num_segments = self.get_int_parameter_value(self.num_segments_ui)
+            return partial(PicoRapidBlockSource, num_channels, sampling_freq, sampling_time, num_segments=num_segments)
+        # The buffer pool of the previous run can only be reused in this process
+        return partial(PicoBlockSource, num_channels, sampling_freq, sampling_time,
+                       buffer_pool=self.buffer_pool if in_process else None)
 
     def start_measurement(self):
+        if self.worker is not None and self.worker.is_alive():
+            print("Already running")
+            return
         print("Starting measurement")
         # Configuration paramteres
         self.num_channels = self.get_int_parameter_value(self.num_channels_ui)
         sampling_time = self.get_float_parameter_value(self.sampling_time_ui)
         sampling_freq = self.get_int_parameter_value(self.sampling_freq_ui)
-        channel_range = 7  # PS4000A_2V
-
-        # Open PicoScope
-        self.status["open_unit"] = ps.ps4000aOpenUnit(ctypes.byref(self.c_handle), None)
-        assert_pico_ok(self.status["open_unit"])
-        print(f"Picoscope opened: handle: {self.c_handle.value}")
-
-        # Configure channels
-        for i in range(self.num_channels):
-            channel = i  # Use channel number directly
-            self.status[f"setChA{i}"] = ps.ps4000aSetChannel(
-                self.c_handle,
-                channel,
-                1,  # enabled
-                1,  # dc coupled
-                channel_range,
-                0.0  # analogue offset
-            )
-            assert_pico_ok(self.status[f"setChA{i}"])
-
-        # Set up trigger
-        self.status["setSimpleTrigger"] = ps.ps4000aSetSimpleTrigger(
-            self.c_handle,
-            1,  # enabled
-            0,  # source
-            1024,  # threshold
-            2,  # direction
-            0,  # delay
-            1000  # auto trigger time
-        )
-        assert_pico_ok(self.status["setSimpleTrigger"])
-
-        self.timebase = int((80000000.0/sampling_freq) - 1)
-        sampling_freq = 1 / (self.timebase + 1) * 80000000
-        print(f"Timebase: {self.timebase}, sampling frequency: {sampling_freq}")
-
-        # Set number of pre- and post-trigger samples to be collected
-        self.num_samples = int(sampling_freq * sampling_time)
-        self.preTriggerSamples = self.num_samples // 2
-        self.postTriggerSamples = self.num_samples // 2
-        max_samples = self.preTriggerSamples + self.postTriggerSamples
-
-        print(f"Num samples: {self.num_samples}, pre-trigger: {self.preTriggerSamples}, post-trigger: {self.postTriggerSamples}")
-
-
-        # Get timebase information
-        time_interval_ns = ctypes.c_float()
-        returned_max_samples = ctypes.c_int32()
-        self.status["getTimebase2"] = ps.ps4000aGetTimebase2(
-            self.c_handle,
-            self.timebase,
-            max_samples,
-            ctypes.byref(time_interval_ns),
-            ctypes.byref(returned_max_samples),
-            0
-        )
-        self.dt_ns = time_interval_ns.value
-
-        # Start measurement
-        self.pico_opened = True
-        self.run_block_capture()
-        self.timer.start(50)  # Update every 50 ms
+        display_rate = self.get_float_parameter_value(self.display_rate_ui)
+
+        # The worker opens the scope and publishes frames; the GUI takes the newest one and the render scheduler
+        # redraws at most at the display rate. In a separate process the driver polling does not compete with
+        # processing and drawing for the GIL; the frames come through shared memory.
+        self.frame_queue = FrameQueue(max_size=4)
+        if self.get_choice_parameter(self.acquisition_worker_ui) == "process":
+            self.source = None
+            source_factory = self.create_source_factory(self.num_channels, sampling_freq, sampling_time,
+                                                        in_process=False)
+            self.worker = ProcessAcquisitionWorker(source_factory, self.frame_queue, name="PicoScopeAcquisition",
+                                                   initializer=select_pico_backend, initargs=(ps.name,))
+        else:
+            self.source = self.create_source_factory(self.num_channels, sampling_freq, sampling_time)()
+            self.worker = AcquisitionWorker(self.source, self.frame_queue, name="PicoScopeAcquisition")
+        self.worker.start()
+        self.render_scheduler.set_max_fps(display_rate)
+        self.render_scheduler.reset_statistics()
+        self.timer.start(10)
 
     def update_measurement(self):
-        if not self.pico_opened:
+        if self.worker is None:
             return
-        start_time = time.time()
-
-        # Check if ready
-        ready = ctypes.c_int16(0)
-        check = ctypes.c_int16(0)
-        self.status["isReady"] = ps.ps4000aIsReady(self.c_handle, ctypes.byref(ready))
-        # Return if not ready
-        if ready.value == check.value:
+        if self.worker.error is not None:
+            print(f"Stopping measurement after acquisition error: {self.worker.error}")
+            self.stop_measurement()
             return
 
-        # Set data buffers
+        self.queue_status_ui.setText(f"{self.frame_queue.depth} / {self.frame_queue.dropped_frames}")
+        self.dropped_samples_ui.setText(str(self.worker.source_stat("dropped_samples", 0)))
+        throughput = self.worker.source_stat("throughput")
+        self.source_rate_ui.setText(f"{throughput / 1e6:.2f} MS/s" if throughput is not None else "-")
+        self.display_status_ui.setText(self.render_scheduler.status_text())
+        self.update_recording_status()
 
-        self.buffers = [np.zeros(self.num_samples, dtype=np.int16) for _ in range(self.num_channels)]
-        for i, buffer in enumerate(self.buffers):
-            self.status[f"setDataBufferA{i}"] = ps.ps4000aSetDataBuffer(
-                self.c_handle,
-                i,  # channel
-                buffer.ctypes.data_as(ctypes.POINTER(ctypes.c_int16)),
-                self.num_samples,
-                0,  # segment index
-                0  # ratio mode
-            )
-            assert_pico_ok(self.status[f"setDataBufferA{i}"])
-
-        # Get data from scope
-        cmax_samples = ctypes.c_int32(self.num_samples)
-        for i, buffer in enumerate(self.buffers):
-            self.status[f"getValues{i}"] = ps.ps4000aGetValues(
-                self.c_handle,
-                i,  # channel
-                ctypes.byref(cmax_samples),
-                0,  # downSampleRatio
-                0,  # downSampleRatioMode
-                0,  # segment index
-                None  # overflow
-            )
-            assert_pico_ok(self.status[f"getValues{i}"])
-
-        # Get maximum ADC value
-        self.max_adc = ctypes.c_int16()
-        self.status["maximumValue"] = ps.ps4000aMaximumValue(self.c_handle, ctypes.byref(self.max_adc))
-        assert_pico_ok(self.status["maximumValue"])
-
-        # convert buffers to Voltage and store in self.values
-        self.values = []
-        for i, buffer in enumerate(self.buffers):
-            values = scale_adc_two_complement(buffer[:cmax_samples.value], 16, 2.0)
-            self.values.append(values)
-        # calculate time axis
-        dt_s = self.dt_ns * 1e-9
-        time_axis = np.linspace(- self.preTriggerSamples * dt_s
-                           , (self.postTriggerSamples - 1) * dt_s, self.preTriggerSamples+self.postTriggerSamples)
-        # time = np.linspace(0, (cmaxSamples.value - 1) * timeIntervalns.value, cmaxSamples.value)
-        time_axis = time_axis[:cmax_samples.value]
-
-        # Process and update plot
-        self.ax.clear()
-        # Create time data
-
-        for i, values in enumerate(self.values):
-            # Convert ADC counts to millivolts
-            channel_range = 7  # PS4000A_2V
-            self.ax.plot(time_axis, values, label=f"Channel {i}")
-
-        self.ax.legend()
-        self.canvas.draw()
-
-        # Update output fields
-        end_time = time.time()
-        processing_time = (end_time - start_time) * 1000
-        # self.processing_time_label.setText(f"Average Processing Time: {processing_time:.2f} ms")
-        # self.frame_rate_label.setText(f"Average Frame Rate: {1 / (end_time - start_time):.2f} Hz")
+        # Every frame is processed (e.g. a delay measurement per capture); only the newest one is displayed
+        frames = self.frame_queue.get_all()
+        if not frames:
+            return
+        for frame in frames:
+            self.process_frame(frame)
+        self.render_scheduler.submit("waveforms", frames[-1])
 
-        self.process_data(time_axis, self.values)
+    def process_frame(self, frame: RawFrame):
+        """Processing of every frame; the waveform display needs none. Subclasses convert only what they use."""
+        pass
 
-        # Start next acquisition
-        self.run_block_capture()
+    def render_waveforms(self, frame: RawFrame):
+        # Rapid block frames are (segments, channels, samples), show the last segment. The pyramid of the raw codes
+        # makes zooming into multi-million-sample frames instant and only the drawn points are converted to volts.
+        self.show_pyramid_pyplot(self.canvas, self.ax, frame.pyramid())
 
     def stop_measurement(self):
-        if hasattr(self, 'c_handle') and self.pico_opened:
+        if self.worker is not None:
             print("Stopping measurement")
-            self.status["stop"] = ps.ps4000aStop(self.c_handle)
-            assert_pico_ok(self.status["stop"])
-            self.status["close"] = ps.ps4000aCloseUnit(self.c_handle)
-            assert_pico_ok(self.status["close"])
-            self.pico_opened = False
+            self.worker.stop()
+            self.worker = None
+            self.recording_path = None
+            self.save_button.setText("Save")
+            self.buffer_pool = getattr(self.source, "buffer_pool", self.buffer_pool)
         else:
             print("Not running")
         self.timer.stop()
 
     def save_data(self):
-        print(f"Saving data to: {self.save_path.text()}")
+        """Start or stop recording the raw frames of the running measurement to the save path (StreamRecorder)."""
+        if self.worker is None:
+            print("Start a measurement to record it")
+            return
+        if self.recording_path is not None:
+            self.worker.stop_recording()
+            print(f"Recording stopped: {self.recording_path}")
+            self.recording_path = None
+            self.save_button.setText("Save")
+            return
+        self.recording_path = self.raw_recording_path()
+        acquisition_mode = self.get_choice_parameter(self.acquisition_mode_ui)
+        compression = self.get_choice_parameter(self.recording_compression_ui)
+        self.worker.start_recording(self.recording_path, compression=None if compression == "none" else compression,
+                                    metadata={"app": type(self).__name__, "acquisition_mode": acquisition_mode})
+        self.save_button.setText("Stop Saving")
+        print(f"Recording to: {self.recording_path}")
+
+    def raw_recording_path(self) -> str:
+        """File the raw frames are recorded to: the save path, or a time-stamped name."""
+        return self.save_path.text() or time.strftime("recording_%Y%m%d_%H%M%S.hsq")
+
+    def update_recording_status(self):
+        stats = self.worker.recording_stats
+        if not stats:
+            self.recording_status_ui.setText("-")
+            return
+        if stats["error"] is not None:
+            self.recording_status_ui.setText(f"Error: {stats['error']}")
+            return
+        self.recording_status_ui.setText(f"{stats['bytes_written'] / 1e6:.0f} MB, "
+                                         f"{stats['throughput'] / 1e6:.0f} MB/s, "
+                                         f"ratio {stats['compression_ratio']:.2f}, "
+                                         f"dropped {stats['dropped_samples']}")
 
     def close_daq(self):
         self.stop_measurement()
@@ -253,8 +229,10 @@ class PicoScopeApp(DAQWindow):
 if __name__ == "__main__":
     import sys
     from PySide6.QtWidgets import QApplication
+    from src.picoscope_measurement.ps_backend import select_pico_backend_from_args
 
+    select_pico_backend_from_args(sys.argv)
     app = QApplication(sys.argv)
     window = PicoScopeApp()
     window.show()
-    app.exec()
\ No newline at end of file
+    app.exec()
@@ -0,0 +1,260 @@
+import ctypes
+import time
+from abc import ABC, abstractmethod
+import numpy as np
+from picosdk.functions import assert_pico_ok
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.picoscope_measurement.ps_backend import ps
+from src.common.acquisition import RawFrame
+from src.common.adc_conversion import AdcConverter
+from src.picoscope_measurement.streaming import PicoStreamingEngine
+from src.picoscope_measurement.buffer_pool import PicoBufferPool
+
+
+class PicoSource(ABC):
+    """
+    Common PicoScope 4000A setup for the acquisition sources.
+
+    A source is created on the GUI thread but opened, read and closed by an AcquisitionWorker,
+    which then is the only owner of the device handle.
+    """
+
+    def __init__(self, num_channels: int, sampling_freq: float, sampling_time: float, channel_range: int = 7,
+                 voltage_range: float = 2.0):
+        self.num_channels = num_channels
+        self.sampling_freq = sampling_freq
+        self.sampling_time = sampling_time
+        self.channel_range = channel_range  # 7: PS4000A_2V
+        self.voltage_range = voltage_range
+
+        self.c_handle = ctypes.c_int16()
+        self.status = {}
+        self.pico_opened = False
+        self.num_samples = None
+        self.dt_ns = None
+        self.sequence = 0
+        self.converter = AdcConverter(num_channels, voltage_range)
+
+    def open(self):
+        # Open PicoScope
+        self.status["open_unit"] = ps.ps4000aOpenUnit(ctypes.byref(self.c_handle), None)
+        assert_pico_ok(self.status["open_unit"])
+        self.pico_opened = True
+        print(f"Picoscope opened: handle: {self.c_handle.value}")
+
+        # Configure channels
+        for i in range(self.num_channels):
+            self.status[f"setChA{i}"] = ps.ps4000aSetChannel(
+                self.c_handle,
+                i,  # channel
+                1,  # enabled
+                1,  # dc coupled
+                self.channel_range,
+                0.0  # analogue offset
+            )
+            assert_pico_ok(self.status[f"setChA{i}"])
+
+    @abstractmethod
+    def read_frame(self) -> RawFrame | None:
+        pass
+
+    def make_frame(self, time_axis: np.ndarray, raw: np.ndarray) -> RawFrame:
+        """Frame of the raw codes; the GUI converts only what it displays or processes."""
+        self.sequence += 1
+        return RawFrame(time_axis, raw, self.converter, self.sequence)
+
+    def stop_device(self):
+        """Stop the running capture (ps4000aStop)."""
+        self.status["stop"] = ps.ps4000aStop(self.c_handle)
+        assert_pico_ok(self.status["stop"])
+
+    def close(self):
+        if self.pico_opened:
+            self.stop_device()
+            self.status["close"] = ps.ps4000aCloseUnit(self.c_handle)
+            assert_pico_ok(self.status["close"])
+            self.pico_opened = False
+
+
+class PicoBlockSource(PicoSource):
+    """
+    Triggered block captures: one RunBlock / IsReady / GetValues round trip per frame.
+
+    Captures alternate between two memory segments with pre-registered buffers (PicoBufferPool), so the next capture
+    runs while the previous frame is copied out. Pass the buffer_pool of a previous source to reuse its allocation
+    when the configuration did not change.
+    """
+
+    def __init__(self, *args, buffer_pool: PicoBufferPool = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.preTriggerSamples = None
+        self.postTriggerSamples = None
+        self.timebase = None
+        self.time_axis = None
+        self.capturing = False
+        self.buffer_pool = buffer_pool
+        self.segment = 0
+
+    def open(self):
+        super().open()
+
+        # Set up trigger
+        self.status["setSimpleTrigger"] = ps.ps4000aSetSimpleTrigger(
+            self.c_handle,
+            1,  # enabled
+            0,  # source
+            1024,  # threshold
+            2,  # direction
+            0,  # delay
+            1000  # auto trigger time
+        )
+        assert_pico_ok(self.status["setSimpleTrigger"])
+
+        self.timebase = int((80000000.0 / self.sampling_freq) - 1)
+        sampling_freq = 1 / (self.timebase + 1) * 80000000
+        print(f"Timebase: {self.timebase}, sampling frequency: {sampling_freq}")
+
+        # Set number of pre- and post-trigger samples to be collected
+        self.num_samples = int(sampling_freq * self.sampling_time)
+        self.preTriggerSamples = self.num_samples // 2
+        self.postTriggerSamples = self.num_samples // 2
+        max_samples = self.preTriggerSamples + self.postTriggerSamples
+
+        print(f"Num samples: {self.num_samples}, pre-trigger: {self.preTriggerSamples}, "
+              f"post-trigger: {self.postTriggerSamples}")
+
+        # Get timebase information
+        time_interval_ns = ctypes.c_float()
+        returned_max_samples = ctypes.c_int32()
+        self.status["getTimebase2"] = ps.ps4000aGetTimebase2(
+            self.c_handle,
+            self.timebase,
+            max_samples,
+            ctypes.byref(time_interval_ns),
+            ctypes.byref(returned_max_samples),
+            0
+        )
+        self.dt_ns = time_interval_ns.value
+
+        # The time axis is the same for every frame
+        dt_s = self.dt_ns * 1e-9
+        self.time_axis = np.linspace(- self.preTriggerSamples * dt_s, (self.postTriggerSamples - 1) * dt_s,
+                                     max_samples)
+        self.setup_buffers()
+
+    def setup_buffers(self):
+        # Allocate the capture buffers once per configuration
+        if self.buffer_pool is None or not self.buffer_pool.matches(self.num_channels, self.num_samples):
+            self.buffer_pool = PicoBufferPool(self.num_channels, self.num_samples)
+        self.buffer_pool.register(self.c_handle)
+        self.segment = 0
+
+    def run_block_capture(self):
+        self.status["runBlock"] = ps.ps4000aRunBlock(
+            self.c_handle,
+            self.preTriggerSamples,
+            self.postTriggerSamples,
+            self.timebase,
+            None,
+            self.segment,  # segment index
+            None,
+            None
+        )
+        assert_pico_ok(self.status["runBlock"])
+        self.capturing = True
+
+    def read_frame(self) -> RawFrame | None:
+        if not self.capturing:
+            self.run_block_capture()
+
+        # Check if ready
+        ready = ctypes.c_int16(0)
+        self.status["isReady"] = ps.ps4000aIsReady(self.c_handle, ctypes.byref(ready))
+        if ready.value == 0:
+            time.sleep(0.001)
+            return None
+        self.capturing = False
+
+        # One transfer fills the registered buffers of all enabled channels for this segment
+        segment = self.segment
+        buffers = self.buffer_pool.buffers[segment]
+        cmax_samples = ctypes.c_int32(self.num_samples)
+        self.status["getValues"] = ps.ps4000aGetValues(
+            self.c_handle,
+            0,  # start index
+            ctypes.byref(cmax_samples),
+            0,  # downSampleRatio
+            0,  # downSampleRatioMode
+            segment,  # segment index
+            None  # overflow
+        )
+        assert_pico_ok(self.status["getValues"])
+
+        # Capture the next frame into the other segment while this one is copied out
+        self.segment = (segment + 1) % self.buffer_pool.num_sets
+        self.run_block_capture()
+
+        # The pool buffers are overwritten by later captures, so the frame gets its own copy of the codes
+        num_samples = cmax_samples.value
+        return self.make_frame(self.time_axis[:num_samples], buffers[:, :num_samples].copy())
+
+
+class PicoStreamingSource(PicoSource):
+    """Gapless streaming: consecutive frames of `sampling_time` seconds taken from the streaming ring buffer."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.engine = None
+        self.reader = None
+        # Samples of frames discarded because the driver overwrote them while they were copied
+        self.torn_samples = 0
+
+    def open(self):
+        super().open()
+        sample_interval_ns = max(1, int(round(1e9 / self.sampling_freq)))
+        self.num_samples = int(self.sampling_freq * self.sampling_time)
+        # The driver buffer has to hold everything collected between two polls
+        driver_buffer_samples = max(int(self.sampling_freq * 0.1), 1000)
+        self.engine = PicoStreamingEngine(self.c_handle, self.num_channels, sample_interval_ns,
+                                          ring_samples=4 * self.num_samples,
+                                          driver_buffer_samples=driver_buffer_samples,
+                                          ring_view_samples=self.num_samples)
+        self.engine.start()
+        self.reader = self.engine.ring.reader()
+        self.dt_ns = self.engine.sample_interval_ns
+        print(f"Streaming started: sample interval {self.dt_ns} ns, {self.num_samples} samples per frame")
+
+    @property
+    def dropped_samples(self) -> int:
+        if self.engine is None:
+            return 0
+        return self.engine.dropped_samples + self.reader.dropped_samples + self.torn_samples
+
+    def read_frame(self) -> RawFrame | None:
+        if self.engine.poll() == 0:
+            time.sleep(0.001)
+        if self.reader.available() < self.num_samples:
+            return None
+        start_index, view = self.reader.read(self.num_samples)
+        # The view points into the ring, which the driver keeps filling; the frame gets its own copy
+        raw = view.copy()
+        if not self.reader.is_valid(start_index):
+            self.torn_samples += raw.shape[1]
+            return None
+        time_axis = (start_index + np.arange(raw.shape[1])) * (self.dt_ns * 1e-9)
+        return self.make_frame(time_axis, raw)
+
+    def stop_device(self):
+        if self.engine is None or not self.engine.running:
+            super().stop_device()
+            return
+        # The engine stops the streaming on the device itself
+        self.engine.stop()
+        print(f"Dropped samples: {self.dropped_samples}, "
+              f"overflows per channel: {self.engine.overflow_counts.tolist()}")
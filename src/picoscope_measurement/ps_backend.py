@@ -0,0 +1,31 @@
+import os
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.common.driver_backend import DriverBackend
+
+# Environment variable that selects the driver at startup: "picosdk" (default) or "fake"
+PICO_BACKEND_ENV = "HSQTDAQ_PICO_BACKEND"
+PICO_BACKENDS = {
+    "picosdk": ("picosdk.ps4000a:ps4000a",),
+    "fake": ("src.picoscope_measurement.fake_ps4000a:ps4000a",),
+}
+
+# The PicoScope modules use this instead of `from picosdk.ps4000a import ps4000a as ps`. Importing picosdk.ps4000a
+# loads the PicoSDK library, so with the fake backend nothing of the driver has to be installed.
+ps = DriverBackend(PICO_BACKENDS, os.environ.get(PICO_BACKEND_ENV, "picosdk"))
+
+
+def select_pico_backend(name: str):
+    """Select the driver used by all PicoScope modules, e.g. select_pico_backend("fake")."""
+    ps.select(name)
+
+
+def select_pico_backend_from_args(argv: list[str]):
+    """Use the fake driver if the command line contains --fake-pico."""
+    if "--fake-pico" in argv:
+        select_pico_backend("fake")
@@ -0,0 +1,92 @@
+import ctypes
+import time
+import numpy as np
+from picosdk.functions import assert_pico_ok
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.picoscope_measurement.ps_backend import ps
+from src.common.acquisition import RawFrame
+from src.picoscope_measurement.pico_source import PicoBlockSource
+
+
+class PicoRapidBlockSource(PicoBlockSource):
+    """
+    Rapid block mode: many triggered captures per RunBlock / IsReady / GetValuesBulk round trip.
+
+    The scope memory is split into `num_segments` segments (ps4000aMemorySegments) and one RunBlock records a
+    capture into each of them (ps4000aSetNoOfCaptures). All segments are transferred with a single
+    ps4000aGetValuesBulk call into one preallocated (segments, channels, samples) int16 array, so a frame's data
+    has the shape (num_segments, num_channels, num_samples).
+    """
+
+    def __init__(self, *args, num_segments: int = 100, **kwargs):
+        super().__init__(*args, **kwargs)
+        if num_segments < 1:
+            raise ValueError("Number of segments must be at least 1")
+        self.num_segments = num_segments
+        self.segment_buffers = None
+        self.overflow = None
+
+    def setup_buffers(self):
+        max_samples_per_segment = ctypes.c_int32()
+        self.status["memorySegments"] = ps.ps4000aMemorySegments(self.c_handle, self.num_segments,
+                                                                 ctypes.byref(max_samples_per_segment))
+        assert_pico_ok(self.status["memorySegments"])
+        if max_samples_per_segment.value < self.num_samples * self.num_channels:
+            raise ValueError(f"Scope memory per segment ({max_samples_per_segment.value} samples) is too small "
+                             f"for {self.num_channels} x {self.num_samples} samples")
+
+        self.status["setNoOfCaptures"] = ps.ps4000aSetNoOfCaptures(self.c_handle, self.num_segments)
+        assert_pico_ok(self.status["setNoOfCaptures"])
+
+        # Register every (segment, channel) row once
+        self.segment_buffers = np.zeros((self.num_segments, self.num_channels, self.num_samples), dtype=np.int16)
+        for segment in range(self.num_segments):
+            for i in range(self.num_channels):
+                self.status["setDataBuffer"] = ps.ps4000aSetDataBuffer(
+                    self.c_handle,
+                    i,  # channel
+                    self.segment_buffers[segment, i].ctypes.data_as(ctypes.POINTER(ctypes.c_int16)),
+                    self.num_samples,
+                    segment,  # segment index
+                    ps.PS4000A_RATIO_MODE['PS4000A_RATIO_MODE_NONE']
+                )
+                assert_pico_ok(self.status["setDataBuffer"])
+        self.overflow = (ctypes.c_int16 * self.num_segments)()
+        self.segment = 0
+
+    def read_frame(self) -> RawFrame | None:
+        if not self.capturing:
+            self.run_block_capture()
+
+        # Check if all captures are done
+        ready = ctypes.c_int16(0)
+        self.status["isReady"] = ps.ps4000aIsReady(self.c_handle, ctypes.byref(ready))
+        if ready.value == 0:
+            time.sleep(0.001)
+            return None
+        self.capturing = False
+
+        # One transfer for all segments and channels
+        cmax_samples = ctypes.c_uint32(self.num_samples)
+        self.status["getValuesBulk"] = ps.ps4000aGetValuesBulk(
+            self.c_handle,
+            ctypes.byref(cmax_samples),
+            0,  # from segment index
+            self.num_segments - 1,  # to segment index
+            1,  # downSampleRatio
+            ps.PS4000A_RATIO_MODE['PS4000A_RATIO_MODE_NONE'],
+            ctypes.byref(self.overflow)
+        )
+        assert_pico_ok(self.status["getValuesBulk"])
+
+        # The next batch of captures runs while this one is copied out
+        self.run_block_capture()
+
+        num_samples = cmax_samples.value
+        return self.make_frame(self.time_axis[:num_samples], self.segment_buffers[:, :, :num_samples].copy())
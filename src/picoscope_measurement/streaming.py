@@ -0,0 +1,185 @@
+import ctypes
+import threading
+import time
+import numpy as np
+from picosdk.functions import assert_pico_ok
+from picosdk.constants import PICO_STATUS
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.picoscope_measurement.ps_backend import ps
+from src.common.shared_ring_buffer import SharedRingBuffer
+
+
+class PicoStreamingEngine:
+    """
+    Gapless PicoScope 4000A streaming acquisition.
+
+    The driver copies new samples into one preallocated overview buffer per channel and reports them through the
+    ps4000aGetStreamingLatestValues callback. Every chunk is appended to a multi-channel SharedRingBuffer; every
+    consumer (frame source, recorder, display) takes its own ring.reader() and reads zero-copy views of the newest
+    samples (or everything since its last read) at its own pace.
+
+    poll() can be called from a QTimer. For sustained throughput (several MS/s on 8 channels) call
+    start_sustained() instead, which polls the driver from a dedicated thread; ctypes releases the GIL while
+    the driver is busy, so the GUI thread keeps running.
+    """
+
+    def __init__(self, c_handle: ctypes.c_int16, num_channels: int, sample_interval_ns: int, ring_samples: int,
+                 driver_buffer_samples: int = 1_000_000, ring_view_samples: int | None = None,
+                 shared_ring: bool = False):
+        self.c_handle = c_handle
+        self.num_channels = num_channels
+        self.sample_interval_ns = sample_interval_ns
+        self.driver_buffer_samples = driver_buffer_samples
+        self.status = {}
+
+        # ring_view_samples: longest contiguous read, e.g. one frame; shared_ring places the ring in shared memory
+        self.ring = SharedRingBuffer(num_channels, ring_samples, dtype=np.int16, max_view=ring_view_samples,
+                                     shared=shared_ring)
+        # One contiguous row per channel, registered once with the driver
+        self.driver_buffers = np.zeros((num_channels, driver_buffer_samples), dtype=np.int16)
+        # Keep a reference to the ctypes callback, otherwise it is garbage collected while the driver uses it
+        self._c_callback = ps.StreamingReadyType(self._streaming_callback)
+
+        self.running = False
+        self.auto_stopped = False
+        self._thread = None
+        self._poll_interval = 0.0
+        self._next_start_index = 0
+
+        # Statistics
+        self.samples_received = 0
+        self.callback_count = 0
+        self.driver_dropped_samples = 0
+        self.overflow_counts = np.zeros(num_channels, dtype=np.int64)
+        self.start_time = None
+
+    @property
+    def sample_rate(self) -> float:
+        return 1e9 / self.sample_interval_ns
+
+    @property
+    def is_sustained(self) -> bool:
+        return self._thread is not None
+
+    @property
+    def dropped_samples(self) -> int:
+        """Samples lost in the driver (gaps between chunks); ring overruns are counted by each reader."""
+        return self.driver_dropped_samples
+
+    @property
+    def throughput(self) -> float:
+        """Average number of samples per channel and second received since start."""
+        if self.start_time is None:
+            return 0.0
+        elapsed = time.perf_counter() - self.start_time
+        return self.samples_received / elapsed if elapsed > 0 else 0.0
+
+    def _streaming_callback(self, handle, num_samples, start_index, overflow, trigger_at, triggered, auto_stop,
+                            parameter):
+        self.callback_count += 1
+        if auto_stop:
+            self.auto_stopped = True
+        if num_samples == 0:
+            return
+
+        # The driver wraps around its overview buffer; a start index other than the expected one means it
+        # overwrote samples we did not fetch in time
+        if start_index != self._next_start_index:
+            self.driver_dropped_samples += (start_index - self._next_start_index) % self.driver_buffer_samples
+        self._next_start_index = (start_index + num_samples) % self.driver_buffer_samples
+
+        # overflow is a bit mask of the channels whose input went over range
+        if overflow:
+            for i in range(self.num_channels):
+                if overflow & (1 << i):
+                    self.overflow_counts[i] += 1
+
+        self.ring.write(self.driver_buffers[:, start_index:start_index + num_samples])
+        self.samples_received += num_samples
+
+    def start(self):
+        """Register the driver buffers and start streaming."""
+        for i in range(self.num_channels):
+            self.status[f"setDataBuffer{i}"] = ps.ps4000aSetDataBuffer(
+                self.c_handle,
+                i,  # channel
+                self.driver_buffers[i].ctypes.data_as(ctypes.POINTER(ctypes.c_int16)),
+                self.driver_buffer_samples,
+                0,  # segment index
+                ps.PS4000A_RATIO_MODE['PS4000A_RATIO_MODE_NONE']
+            )
+            assert_pico_ok(self.status[f"setDataBuffer{i}"])
+
+        sample_interval = ctypes.c_uint32(self.sample_interval_ns)
+        self.status["runStreaming"] = ps.ps4000aRunStreaming(
+            self.c_handle,
+            ctypes.byref(sample_interval),
+            ps.PS4000A_TIME_UNITS['PS4000A_NS'],
+            0,  # max pre-trigger samples
+            self.ring.capacity,  # max post-trigger samples
+            0,  # no auto stop: stream until stop() is called
+            1,  # downsample ratio
+            ps.PS4000A_RATIO_MODE['PS4000A_RATIO_MODE_NONE'],
+            self.driver_buffer_samples
+        )
+        assert_pico_ok(self.status["runStreaming"])
+        # The driver returns the sample interval it actually uses
+        self.sample_interval_ns = sample_interval.value
+
+        self.ring.reset()
+        self._next_start_index = 0
+        self.samples_received = 0
+        self.callback_count = 0
+        self.driver_dropped_samples = 0
+        self.overflow_counts[:] = 0
+        self.auto_stopped = False
+        self.start_time = time.perf_counter()
+        self.running = True
+
+    def poll(self) -> int:
+        """
+        Fetch all samples the driver collected since the last call.
+
+        Returns:
+            int: Number of new samples per channel.
+        """
+        if not self.running:
+            return 0
+        received_before = self.samples_received
+        # The driver invokes the callback (if it has new data) before returning
+        self.status["getStreamingLatestValues"] = ps.ps4000aGetStreamingLatestValues(
+            self.c_handle, self._c_callback, None)
+        if self.status["getStreamingLatestValues"] != PICO_STATUS['PICO_BUSY']:
+            assert_pico_ok(self.status["getStreamingLatestValues"])
+        return self.samples_received - received_before
+
+    def _poll_loop(self):
+        while self.running:
+            if self.poll() == 0:
+                time.sleep(self._poll_interval)
+
+    def start_sustained(self, poll_interval: float = 0.001):
+        """
+        Start streaming and poll the driver continuously from a background thread.
+
+        Args:
+            poll_interval (float): Pause in seconds when the driver has no new data.
+        """
+        self.start()
+        self._poll_interval = poll_interval
+        self._thread = threading.Thread(target=self._poll_loop, name="PicoStreaming", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.status["stop"] = ps.ps4000aStop(self.c_handle)
+        assert_pico_ok(self.status["stop"])
@@ -1,4 +1,3 @@
-import numpy as np
 from PySide6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QPushButton, QLineEdit, \
     QLabel, QComboBox
 from PySide6.QtCore import QTimer, Slot
@@ -11,7 +10,12 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
-from src.common.utils import generate_composite_signal
+from src.common.acquisition import AcquisitionWorker, FrameQueue
+from src.common.decimation import minmax_decimate
+from src.common.utils import SignalChunkGenerator
+from src.gui_tools.channel_plot import display_points
+from src.gui_tools.render_scheduler import RenderScheduler
+from src.simple_simulation.simulated_source import SimulatedSource
 
 
 class SimulationWindow(QMainWindow):
@@ -23,6 +27,7 @@ class SimulationWindow(QMainWindow):
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
         self.layout = QVBoxLayout(self.central_widget)
+        self.render_scheduler = RenderScheduler(max_fps=30, parent=self)
 
         self.create_input_fields()
         self.create_buttons()
@@ -33,9 +38,9 @@ class SimulationWindow(QMainWindow):
         self.timer.timeout.connect(self.update_plot)
 
         self.is_running = False
-        self.data = None
-        self.time_axis = None
-        self.current_index = 0
+        self.source = None
+        self.worker = None
+        self.frame_queue = None
         self.start_time = time.time()
         self.iterations = 0
 
@@ -44,17 +49,23 @@ class SimulationWindow(QMainWindow):
         self.sampling_freq_input = QLineEdit("10000")
         self.sampling_time_input = QLineEdit("10")
         self.update_rate_input = QLineEdit("10")
+        self.max_fps_input = QLineEdit("30")
+        self.trigger_rate_input = QLineEdit("0")
         self.num_channels_input = QLineEdit("16")
         self.channels_per_plot_input = QLineEdit("4")
         self.wave_type_input = QComboBox()
-        self.wave_type_input.addItems(['sine', 'square', 'sawtooth', 'chirp'])
+        self.wave_type_input.addItems(list(SignalChunkGenerator.WAVE_TYPES))
 
         input_layout.addWidget(QLabel("Sampling Freq (Hz):"))
         input_layout.addWidget(self.sampling_freq_input)
-        input_layout.addWidget(QLabel("Sampling Time (s):"))
+        input_layout.addWidget(QLabel("Sampling Time / Sweep (s):"))
         input_layout.addWidget(self.sampling_time_input)
         input_layout.addWidget(QLabel("Update Rate (Hz):"))
         input_layout.addWidget(self.update_rate_input)
+        input_layout.addWidget(QLabel("Max FPS:"))
+        input_layout.addWidget(self.max_fps_input)
+        input_layout.addWidget(QLabel("Trigger Rate (Hz):"))
+        input_layout.addWidget(self.trigger_rate_input)
         input_layout.addWidget(QLabel("Num Channels:"))
         input_layout.addWidget(self.num_channels_input)
         input_layout.addWidget(QLabel("Channels per Plot:"))
@@ -83,21 +94,23 @@ class SimulationWindow(QMainWindow):
     def create_plot(self):
         self.plot_widget = pg.PlotWidget()
         self.layout.addWidget(self.plot_widget)
+        self.render_scheduler.add_target("simulation", self.render_plot, self.plot_widget)
 
     def create_output_fields(self):
         output_layout = QHBoxLayout()
         self.frame_rate_label = QLabel("Frame Rate: 0 Hz")
         self.processing_time_label = QLabel("Processing Time: 0 ms")
+        self.device_status_label = QLabel("Device: -")
 
         output_layout.addWidget(self.frame_rate_label)
         output_layout.addWidget(self.processing_time_label)
+        output_layout.addWidget(self.device_status_label)
 
         self.layout.addLayout(output_layout)
 
     @Slot()
     def start_simulation(self):
         if not self.is_running:
-            self.is_running = True
             self.sampling_freq = int(self.sampling_freq_input.text())
             self.sampling_time = int(self.sampling_time_input.text())
             self.update_rate = int(self.update_rate_input.text())
@@ -105,10 +118,21 @@ class SimulationWindow(QMainWindow):
             self.channels_per_plot = int(self.channels_per_plot_input.text())
             self.wave_type = self.wave_type_input.currentText()
 
-            self.data = generate_composite_signal(self.sampling_freq, self.sampling_time, self.num_channels,
-                                                  self.wave_type)
-            self.time_axis = np.linspace(0, self.sampling_time, self.sampling_freq * self.sampling_time, endpoint=False)
-            self.current_index = 0
+            # Every frame needs at least one sample
+            frame_samples = self.sampling_freq // self.update_rate if self.update_rate > 0 else 0
+            if frame_samples < 1:
+                self.device_status_label.setText(
+                    f"Device: update rate must be between 1 and the sampling frequency ({self.sampling_freq} Hz)")
+                return
+            self.is_running = True
+
+            # A paced simulated device delivers frames through the same worker and queue as the instrument apps
+            self.source = SimulatedSource(self.num_channels, self.sampling_freq, frame_samples,
+                                          self.wave_type, sweep_time=self.sampling_time,
+                                          trigger_rate=float(self.trigger_rate_input.text()))
+            self.frame_queue = FrameQueue(max_size=4)
+            self.worker = AcquisitionWorker(self.source, self.frame_queue, name="SimulatedAcquisition")
+            self.worker.start()
 
             self.plot_widget.clear()
             self.curves = []
@@ -118,31 +142,39 @@ class SimulationWindow(QMainWindow):
                 curve = self.plot_widget.plot(pen=color)
                 self.curves.append(curve)
 
-            self.timer.start(1000 // self.update_rate)
+            self.render_scheduler.set_max_fps(float(self.max_fps_input.text()))
+            self.timer.start(10)
         self.start_time = time.time()
         self.iterations = 0
+        self.render_scheduler.reset_statistics()
 
     @Slot()
     def stop_simulation(self):
         self.is_running = False
         self.timer.stop()
+        if self.worker is not None:
+            self.worker.stop()
+            self.worker = None
 
     @Slot()
     def update_plot(self):
         if self.is_running:
+            if self.worker.error is not None:
+                print(f"Simulation error: {self.worker.error}")
+                self.stop_simulation()
+                return
+            self.device_status_label.setText(
+                f"Device: {self.source.throughput / 1000:.0f} kS/s, dropped {self.source.dropped_samples}, "
+                f"late {self.source.late_chunks}, triggers {self.source.trigger_count}, "
+                f"skipped frames {self.frame_queue.skipped_frames + self.frame_queue.dropped_frames}")
+
+            frame = self.frame_queue.get_latest()
+            if frame is None:
+                return
             start_time = time.time()
 
-
-            end_index = min(self.current_index + self.sampling_freq // self.update_rate, len(self.time_axis))
-            x = self.time_axis[self.current_index:end_index]
-
-            for i, curve in enumerate(self.curves):
-                y = self.data[i][self.current_index:end_index]
-                curve.setData(x, y)
-
-            self.current_index = end_index
-            if self.current_index >= len(self.time_axis):
-                self.current_index = 0
+            # The render scheduler only draws the newest frame at up to Max FPS
+            self.render_scheduler.submit("simulation", (frame.time_axis, frame.data))
 
             processing_time = (time.time() - start_time) * 1000
             total_time = (time.time() - self.start_time) * 1000
@@ -150,8 +182,17 @@ class SimulationWindow(QMainWindow):
             self.iterations += 1
 
             self.processing_time_label.setText(f"Average time: {average_time:.2f} ms")
-            self.frame_rate_label.setText(f"Iteration: {self.iterations}")
-            # self.frame_rate_label.setText(f"Frame Rate: {1000 / update_time:.2f} Hz")
+            self.frame_rate_label.setText(f"Iteration: {self.iterations}, "
+                                          f"Display: {self.render_scheduler.status_text()}")
+
+    def render_plot(self, payload):
+        x, y = minmax_decimate(*payload, display_points(self.plot_widget))
+        for i, curve in enumerate(self.curves):
+            curve.setData(x[i], y[i])
+
+    def closeEvent(self, event):
+        self.stop_simulation()
+        event.accept()
 
 
 def main():
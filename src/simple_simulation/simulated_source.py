@@ -0,0 +1,171 @@
+import threading
+import time
+from collections import deque
+import numpy as np
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.common.acquisition import Frame
+from src.common.ring_buffer import RingBuffer
+from src.common.utils import SignalChunkGenerator
+
+
+class SimulatedSource:
+    """
+    Simulated continuous acquisition device, paced in real time like hardware.
+
+    A producer thread plays the device: it generates `chunk_size` samples per channel (SignalChunkGenerator) and
+    delivers each chunk when the device clock has recorded it, i.e. at chunk_size / sampling_freq intervals plus a
+    random delivery jitter. Chunks go into a RingBuffer that stands in for the device FIFO; if the consumer does not
+    keep up, the oldest samples are overwritten and counted in `dropped_samples` (an overrun). Trigger events are
+    injected as pulses that arrive on every channel `trigger_delay` seconds after the previous one, so the delay
+    measurement can be tested as well.
+
+    Implements the source interface of AcquisitionWorker (open / read_frame / close), like the Pico and NI sources;
+    read_frame() returns consecutive frames of `frame_samples` samples with an absolute time axis.
+    """
+
+    def __init__(self, num_channels: int, sampling_freq: float, frame_samples: int, wave_type: str = "sine",
+                 noise_scale: float = 0.1, sweep_time: float = 10.0, chunk_size: int | None = None,
+                 fifo_samples: int | None = None, jitter: float = 0.001, trigger_rate: float = 0.0,
+                 trigger_amplitude: float = 2.0, trigger_width: float = 1e-3, trigger_delay: float = 1e-4,
+                 seed: int | None = None):
+        """
+        Args:
+            num_channels (int): Number of channels.
+            sampling_freq (float): Sample rate in Hz.
+            frame_samples (int): Samples per channel in every frame returned by read_frame().
+            wave_type (str): Signal of the SignalChunkGenerator.
+            noise_scale (float): Standard deviation of the noise.
+            sweep_time (float): Duration of one chirp sweep in seconds.
+            chunk_size (int | None): Samples per channel the device delivers at once (default: 10 ms of samples).
+            fifo_samples (int | None): Size of the device FIFO per channel (default: 4 frames, at least 4 chunks).
+            jitter (float): Standard deviation of the delivery time in seconds.
+            trigger_rate (float): Mean number of trigger events per second (Poisson distributed), 0 for none.
+            trigger_amplitude (float): Height of the trigger pulses in volts.
+            trigger_width (float): Width of the trigger pulses in seconds.
+            trigger_delay (float): Delay between the pulses of consecutive channels in seconds.
+            seed (int | None): Seed for the signal, jitter and triggers.
+        """
+        self.num_channels = num_channels
+        self.sampling_freq = sampling_freq
+        self.frame_samples = frame_samples
+        self.chunk_size = chunk_size or max(1, int(sampling_freq * 0.01))
+        self.fifo_samples = fifo_samples or max(4 * frame_samples, 4 * self.chunk_size)
+        self.jitter = jitter
+        self.trigger_rate = trigger_rate
+        self.trigger_amplitude = trigger_amplitude
+        self.trigger_width_samples = max(1, int(round(trigger_width * sampling_freq)))
+        self.trigger_delay_samples = np.round(np.arange(num_channels) * trigger_delay * sampling_freq).astype(int)
+
+        seed_sequence = np.random.SeedSequence(seed)
+        signal_seed, timing_seed = seed_sequence.spawn(2)
+        self.generator = SignalChunkGenerator(sampling_freq, num_channels, self.chunk_size, wave_type, noise_scale,
+                                              sweep_time, seed=signal_seed)
+        self.rng = np.random.default_rng(timing_seed)
+
+        self.fifo = None
+        self.sequence = 0
+        self.error = None
+        # Statistics
+        self.trigger_count = 0
+        self.trigger_indices = deque(maxlen=1000)  # absolute sample index of the latest trigger events
+        self.late_chunks = 0  # chunks the producer delivered more than one chunk period late (CPU too slow)
+        self.max_delivery_delay = 0.0
+        self._pending_pulses = []  # (channel, absolute start, absolute end) of pulses that reach into later chunks
+        self._data_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._start_time = None
+
+    def open(self):
+        self.fifo = RingBuffer(self.num_channels, self.fifo_samples, dtype=np.float32)
+        self._start_time = time.perf_counter()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._produce, name="SimulatedDevice", daemon=True)
+        self._thread.start()
+
+    def _produce(self):
+        try:
+            chunk_period = self.chunk_size / self.sampling_freq
+            start_time = self._start_time
+            chunk_number = 0
+            while not self._stop_event.is_set():
+                chunk = self.generator.next_chunk()
+                self._add_triggers(chunk, chunk_number * self.chunk_size)
+                chunk_number += 1
+
+                # The chunk is complete once the device clock has passed its last sample
+                delivery_time = start_time + chunk_number * chunk_period + abs(self.rng.normal(0, self.jitter))
+                delay = time.perf_counter() - delivery_time
+                if delay > 0:
+                    self.max_delivery_delay = max(self.max_delivery_delay, delay)
+                    if delay > chunk_period:
+                        self.late_chunks += 1
+                elif self._stop_event.wait(-delay):
+                    break
+
+                self.fifo.write(chunk)
+                self._data_event.set()
+        except Exception as e:
+            self.error = e
+            self._data_event.set()
+
+    def _add_triggers(self, chunk: np.ndarray, first_sample: int):
+        """Add trigger pulses to a chunk starting at absolute sample `first_sample`."""
+        chunk_end = first_sample + self.chunk_size
+        if self.trigger_rate > 0:
+            num_triggers = self.rng.poisson(self.trigger_rate * self.chunk_size / self.sampling_freq)
+            for trigger_index in np.sort(self.rng.integers(first_sample, chunk_end, num_triggers)):
+                self.trigger_count += 1
+                self.trigger_indices.append(int(trigger_index))
+                for channel, channel_delay in enumerate(self.trigger_delay_samples):
+                    pulse_start = trigger_index + channel_delay
+                    self._pending_pulses.append((channel, pulse_start, pulse_start + self.trigger_width_samples))
+
+        # Pulses may start or end in a later chunk
+        remaining = []
+        for channel, pulse_start, pulse_end in self._pending_pulses:
+            start = max(pulse_start, first_sample) - first_sample
+            end = min(pulse_end, chunk_end) - first_sample
+            if end > start:
+                chunk[channel, start:end] += self.trigger_amplitude
+            if pulse_end > chunk_end:
+                remaining.append((channel, pulse_start, pulse_end))
+        self._pending_pulses = remaining
+
+    def read_frame(self) -> Frame | None:
+        if self.error is not None:
+            raise self.error
+        self._data_event.clear()
+        if self.fifo.available() < self.frame_samples:
+            self._data_event.wait(0.05)
+            return None
+
+        start_index, data = self.fifo.read_new(self.frame_samples)
+        time_axis = (start_index + np.arange(data.shape[1])) / self.sampling_freq
+        self.sequence += 1
+        return Frame(time_axis, data, self.sequence)
+
+    def close(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.generator.close()
+
+    @property
+    def dropped_samples(self) -> int:
+        """Samples lost to FIFO overruns."""
+        return self.fifo.dropped_samples if self.fifo is not None else 0
+
+    @property
+    def throughput(self) -> float:
+        """Samples per second and channel actually delivered since open(); below sampling_freq if the producer lags."""
+        if self.fifo is None:
+            return 0.0
+        return self.fifo.write_index / max(time.perf_counter() - self._start_time, 1e-9)